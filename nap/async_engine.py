@@ -0,0 +1,446 @@
+"""
+An asyncio flavored ResourceEngine. Requires python 3 and httpx.
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import asyncio
+import inspect
+import threading
+import time
+import weakref
+
+try:
+    import httpx
+except ImportError as e:
+    raise ImportError("Error loading httpx: %s" % e)
+
+from .cache.base import VaryIndex
+from .collection import ListWithAttributes
+from .engine import ResourceEngine
+from .http import NapRequest, NapResponse
+from .utils import handle_slash
+from six.moves.urllib.parse import urlsplit
+
+
+async def maybe_await(value):
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+class AsyncClientRegistry(object):
+
+    """
+    Hands out pooled ``httpx.AsyncClient`` objects keyed by host. Clients are
+    bound to the event loop that created them, so each running loop gets its
+    own set of clients.
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get_key(self, url, pool_maxsize, max_retries, keep_alive):
+        split_url = urlsplit(url)
+        host = "%s://%s" % (split_url.scheme, split_url.netloc)
+        return (host, pool_maxsize, max_retries, keep_alive)
+
+    def get_client(self, url, pool_maxsize, max_retries=0, keep_alive=True):
+        loop = asyncio.get_running_loop()
+        key = self.get_key(url, pool_maxsize, max_retries, keep_alive)
+
+        with self._lock:
+            loop_clients = self._clients.setdefault(loop, {})
+            client = loop_clients.get(key)
+            if client is None:
+                client = self.create_client(pool_maxsize, max_retries, keep_alive)
+                loop_clients[key] = client
+
+        return client
+
+    def create_client(self, pool_maxsize, max_retries, keep_alive):
+        limits = httpx.Limits(
+            max_connections=pool_maxsize,
+            max_keepalive_connections=pool_maxsize if keep_alive else 0,
+        )
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=max_retries)
+        # requests doesn't time out by default, unlike httpx
+        return httpx.AsyncClient(transport=transport, timeout=None)
+
+    async def aclose(self):
+        "Close and forget every client bound to the running loop"
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            loop_clients = self._clients.pop(loop, {})
+
+        for client in loop_clients.values():
+            await client.aclose()
+
+
+client_registry = AsyncClientRegistry()
+
+# requests arguments httpx only takes when creating a client, or not at all
+UNSUPPORTED_REQUEST_KWARGS = ('cert', 'hooks', 'proxies', 'stream', 'verify')
+
+# httpx counterparts of RetryPolicy's default retried exceptions. Requests
+# failing to connect never reached the API, so they're retried whatever
+# their method
+RETRY_EXCEPTIONS = (httpx.TransportError,)
+CONNECT_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout)
+
+
+def sync_only(name):
+    "Stand-in for a ResourceEngine method async engines don't support"
+    def method(self, *args, **kwargs):
+        raise TypeError("%s isn't supported by async engines, use the "
+            "model's objects engine instead" % name)
+
+    method.__name__ = str(name)
+    return method
+
+
+class AsyncResourceEngine(ResourceEngine):
+
+    """
+    Mirrors ResourceEngine's access and write methods as coroutines.
+
+    Middleware may define ``ahandle_request``/``ahandle_response`` coroutines,
+    which are awaited in place of their synchronous counterparts. Likewise,
+    cache backends may define ``aget``/``aset`` coroutines; backends without
+    them are called synchronously. Cache tag versions (see
+    ``invalidate_on_write``) are always read and written synchronously, and
+    so are the indexes of responses varying on request headers.
+
+    ``iter_filter`` and the synchronous helpers behind ResourceEngine's
+    access methods raise TypeError.
+    """
+
+    # synchronous ResourceEngine methods relying on the ones made coroutines
+    # here, which they can't await
+    get_response = sync_only('get_response')
+    resolve_cached_response = sync_only('resolve_cached_response')
+    refresh_in_background = sync_only('refresh_in_background')
+    revalidate = sync_only('revalidate')
+    obj_from_get_response = sync_only('obj_from_get_response')
+    get_many_from_cache = sync_only('get_many_from_cache')
+    fetch_collection = sync_only('fetch_collection')
+    iter_filter = sync_only('iter_filter')
+    get_page_data = sync_only('get_page_data')
+
+    async def _request(self, request_method, url, *args, **kwargs):
+        "Construct a NapRequest and send it via a pooled httpx client"
+
+        self.logger.info("Calling %s url: %s" % (request_method, self.get_full_url(url)))
+
+        request = await self.prepare_request(request_method, url, *args, **kwargs)
+
+        resource_response = await self._send(request)
+        response = NapResponse(
+            url=request.url,
+            status_code=resource_response.status_code,
+            headers=resource_response.headers,
+            content=resource_response.content,
+            request_method=request_method,
+        )
+
+        for mw in reversed(self.model._meta['middleware']):
+            response = await self._call_middleware(
+                mw, 'handle_response', request, response)
+
+        response.request_headers = request.headers
+        response.request_authorized = request.auth is not None
+        return response
+
+    async def prepare_request(self, request_method, url, *args, **kwargs):
+        "NapRequest for ``url``, as modified by the model's middleware"
+        request_args = self.get_request_args(kwargs)
+        request = NapRequest(request_method, self.get_full_url(url), *args, **request_args)
+
+        for mw in self.model._meta['middleware']:
+            request = await self._call_middleware(mw, 'handle_request', request)
+
+        return request
+
+    async def _call_middleware(self, mw, hook, *args):
+        async_hook = getattr(mw, 'a%s' % hook, None)
+        if async_hook is not None:
+            return await async_hook(*args)
+
+        return getattr(mw, hook)(*args)
+
+    async def _send(self, request):
+        """Send ``request`` over the model's pooled client, retrying
+        according to the model's retry_policy. Backoff delays are awaited,
+        so retries don't block the event loop
+        """
+        retry_policy = self.model._meta['retry_policy']
+        if retry_policy is None:
+            return await self._send_once(request)
+
+        retry_policy.budget.deposit()
+
+        attempt = 0
+        delay = retry_policy.base_delay
+        while True:
+            try:
+                response = await self._send_once(request)
+            except RETRY_EXCEPTIONS + tuple(retry_policy.exceptions) as e:
+                retryable = request.method.upper() in retry_policy.idempotent_methods \
+                    or isinstance(e, CONNECT_EXCEPTIONS)
+                if not retry_policy.should_retry(attempt, retryable):
+                    raise
+                response = None
+            else:
+                retryable = retry_policy.is_retryable_response(request.method, response)
+                if not retry_policy.should_retry(attempt, retryable):
+                    return response
+
+            attempt += 1
+            delay = retry_policy.get_delay(delay, response)
+            await asyncio.sleep(delay)
+
+    async def _send_once(self, request):
+        """Send ``request`` once, through the model's rate_limiter and
+        circuit_breaker. Waits for the rate limit are awaited, so they don't
+        block the event loop
+        """
+        rate_limiter = self.model._meta['rate_limiter']
+        if rate_limiter is None:
+            return await self._send_through_circuit_breaker(request)
+
+        key = rate_limiter.get_key(self.model, request.url)
+        while True:
+            delay = rate_limiter.try_acquire(key)
+            if not delay:
+                break
+            await asyncio.sleep(delay)
+
+        response = await self._send_through_circuit_breaker(request)
+        rate_limiter.update(key, response)
+        return response
+
+    async def _send_through_circuit_breaker(self, request):
+        circuit_breaker = self.model._meta['circuit_breaker']
+        if circuit_breaker is None:
+            return await self._send_request(request)
+
+        key = self.model._meta['root_url']
+        circuit_breaker.before_call(key)
+
+        started = time.time()
+        try:
+            response = await self._send_request(request)
+        except httpx.HTTPError:
+            circuit_breaker.record(key, failed=True)
+            raise
+        except BaseException:
+            # cancelled, for instance
+            circuit_breaker.release(key)
+            raise
+
+        circuit_breaker.record_response(key, response, time.time() - started)
+        return response
+
+    async def _send_request(self, request):
+        client = self.get_client()
+        return await client.request(
+            request.method, request.url,
+            content=request.data,
+            headers=request.headers,
+            auth=request.auth,
+            **self.get_send_kwargs(request)
+        )
+
+    def get_send_kwargs(self, request):
+        """httpx equivalents of the requests arguments of ``request``.
+        Redirects are followed unless ``allow_redirects=False``, as with
+        requests. Raises ValueError for arguments httpx only takes when
+        creating a client
+        """
+        kwargs = dict(request.extra_kwargs)
+        unsupported = sorted(set(kwargs) & set(UNSUPPORTED_REQUEST_KWARGS))
+        if unsupported:
+            raise ValueError("Unsupported arguments for async requests: %s"
+                % ', '.join(unsupported))
+
+        kwargs['follow_redirects'] = kwargs.pop('allow_redirects', True)
+        return kwargs
+
+    def get_client(self):
+        meta = self.model._meta
+        return client_registry.get_client(
+            self.get_full_url(''),
+            pool_maxsize=meta['pool_maxsize'],
+            max_retries=meta['max_retries'],
+            keep_alive=meta['keep_alive'],
+        )
+
+    # access methods
+    async def get(self, uri=None, skip_cache=False, **kwargs):
+        if uri:
+            return await self.get_from_uri(uri, skip_cache=skip_cache)
+
+        return await self.lookup(skip_cache=skip_cache, **kwargs)
+
+    async def lookup(self, skip_cache=False, **lookup_vars):
+        uri = self.get_lookup_url(**lookup_vars)
+        return await self.get_from_uri(uri, skip_cache=skip_cache)
+
+    async def get_from_uri(self, url, skip_cache=False, *args, **kwargs):
+        cleaned_url = handle_slash(url, self.model._meta['add_slash'])
+
+        if skip_cache:
+            cached_response = None
+        else:
+            cached_response = await self.get_from_cache('GET', cleaned_url)
+
+        if cached_response:
+            response = cached_response
+        else:
+            response = await self._request('GET', cleaned_url, *args, **kwargs)
+
+        if self.cache.is_negative_response(response):
+            await self.cache_response(response)
+
+        self.validate_get_response(response)
+        self.handle_get_response(response)
+        await self.cache_response(response)
+
+        obj = self.obj_from_response(response)
+
+        obj._full_url = cleaned_url
+        return obj
+
+    async def get_many(self, lookups, max_workers=None, skip_cache=False):
+        """Concurrently get a resource for each item in ``lookups``, running
+        at most ``max_workers`` requests at once. Failed lookups return the
+        exception they raised in place of a resource.
+        """
+        if max_workers is None:
+            max_workers = self.model._meta['pool_maxsize']
+
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def fetch(lookup):
+            url = self.get_many_url(lookup)
+            async with semaphore:
+                return await self.modify_request().get_from_uri(
+                    url, skip_cache=skip_cache)
+
+        return await asyncio.gather(
+            *[fetch(lookup) for lookup in lookups],
+            return_exceptions=True
+        )
+
+    async def all(self):
+        return await self.filter()
+
+    async def filter(self, skip_cache=True, **lookup_vars):
+        url = self.get_collection_url(**lookup_vars)
+
+        if skip_cache:
+            cached_response = None
+        else:
+            cached_response = await self.get_from_cache('GET', url)
+
+        if cached_response:
+            response = cached_response
+        else:
+            response = await self._request('GET', url)
+
+        self.validate_collection_response(response)
+
+        r_data = self.get_response_data(response)
+        resource_list, extra_data = self.objs_from_collection_data(r_data)
+
+        if not skip_cache:
+            await self.cache_response(response)
+
+        return ListWithAttributes(resource_list, extra_data)
+
+    # write methods
+    async def update(self, resource_obj, **kwargs):
+        url = self.get_update_url(resource_obj=resource_obj, **kwargs)
+        if not url:
+            raise ValueError('No update url found')
+
+        response = await self._request(
+            self.model._meta['update_method'], url,
+            data=self.serialize(resource_obj, for_read=True)
+        )
+
+        self.validate_update_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
+        return self.handle_update_response(response)
+
+    async def create(self, resource_obj, **kwargs):
+        new_obj_data = self.serialize(resource_obj, for_read=True)
+        response = await self._request(
+            'POST', self.get_create_url(resource_obj, **kwargs),
+            data=new_obj_data
+        )
+
+        self.validate_create_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
+        self.delete_negative_lookup(resource_obj)
+        return self.handle_create_response(response)
+
+    async def delete(self, resource_obj, **kwargs):
+        delete_url = self.get_delete_url(resource_obj, **kwargs)
+        response = await self._request('DELETE', delete_url)
+
+        self.validate_delete_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
+        self.handle_delete_response(response)
+
+    def handle_response(self, response):
+        """
+        Caching is awaited separately by the access methods, so only reset
+        temporary request arguments here
+        """
+        self._tmp_request_args = {}
+
+    async def get_from_cache(self, request_method, url):
+        if request_method not in self.model._meta['cached_methods']:
+            return
+
+        full_url = self.get_full_url(url)
+        cache_key = self.cache.get_cache_key(
+            model=self.model,
+            url=full_url,
+        )
+        cache_get = getattr(self.cache, 'aget', self.cache.get)
+        cached_response = await maybe_await(cache_get(cache_key))
+        if isinstance(cached_response, VaryIndex):
+            cache_key = await self.get_variant_cache_key(cache_key, cached_response, url)
+            cached_response = await maybe_await(cache_get(cache_key))
+
+        if not cached_response:
+            return None
+
+        if not isinstance(cached_response, NapResponse):
+            self.logger.error("Expected to get a NapResponse from cache, but got %s instead: %s",
+                type(cached_response), cached_response)
+            return None
+
+        if cached_response.is_stale():
+            return None
+
+        cached_response.use_cache = False
+        return self.check_cache_tags([cached_response])[0]
+
+    async def get_variant_cache_key(self, cache_key, vary_index, url):
+        request = await self.prepare_request('GET', url)
+        return self.cache.get_variant_cache_key(cache_key, vary_index.vary, request.headers)
+
+    async def cache_response(self, response):
+        cache_key = self.prepare_cached_response(response)
+        if cache_key is None:
+            return
+
+        self.stamp_cache_tags([response])
+        cache_set = getattr(self.cache, 'aset', self.cache.set)
+        await maybe_await(cache_set(cache_key, response, response=response))
@@ -1,11 +1,35 @@
 from __future__ import unicode_literals
-import re
+from __future__ import absolute_import
+import copy
+import math
+import random
+import time
 from hashlib import md5
 
+from ..http import NapResponse
+from .compression import get_codec
+from .headers import parse_cache_control, parse_header_list, parse_http_date, parse_seconds
+
 DEFAULT_TIMEOUT = 60 * 5
+# How long past their timeout responses with ETag/Last-Modified validators
+# are kept around so they can be revalidated instead of re-downloaded
+DEFAULT_REVALIDATE_TIMEOUT = 60 * 60
 # Default value for max cache key length favors memcached limitation of 250 byte key
 # and the assumption the web framework may append additional version to the key.
 MAX_CACHE_KEY_LENGTH = 240
+# Status codes of lookups cached as negative responses, when enabled
+NEGATIVE_STATUS_CODES = (404, 410)
+
+
+class VaryIndex(object):
+
+    """
+    Stored under a url's cache key when its responses vary on the request
+    headers named in ``vary``. Each variant is stored under its own key
+    """
+
+    def __init__(self, vary):
+        self.vary = vary
 
 
 class BaseCacheBackend(object):
@@ -13,25 +37,293 @@ class BaseCacheBackend(object):
     CACHE_EMPTY = "!!!DNE!!!"
 
     def __init__(self, default_timeout=DEFAULT_TIMEOUT,
-                 obey_cache_headers=True, cache_max_key_size=MAX_CACHE_KEY_LENGTH):
+                 obey_cache_headers=True, cache_max_key_size=MAX_CACHE_KEY_LENGTH,
+                 revalidate_timeout=DEFAULT_REVALIDATE_TIMEOUT,
+                 stale_while_revalidate=0, stale_if_error=0,
+                 compress_threshold=None, compression='zlib',
+                 negative_timeout=None, negative_status_codes=NEGATIVE_STATUS_CODES,
+                 early_refresh_beta=0, rebuild_lock_timeout=None, shared=False):
         self.obey_cache_headers = obey_cache_headers
         self.default_timeout = default_timeout
         self.cache_max_key_size = cache_max_key_size
+        self.revalidate_timeout = revalidate_timeout
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+
+        # responses with more than compress_threshold bytes of content are
+        # stored compressed, if set
+        self.compress_threshold = compress_threshold
+        self.compression = compression
+        if compress_threshold is not None:
+            get_codec(compression)
+
+        # lookups of resources that don't exist are cached for
+        # negative_timeout seconds, if set
+        self.negative_timeout = negative_timeout
+        self.negative_status_codes = negative_status_codes
+
+        # responses are refreshed early, at random, before they expire, the
+        # more likely the closer to expiring and the slower to fetch, if set
+        self.early_refresh_beta = early_refresh_beta
+        # only one process at a time refreshes an entry, holding a lock
+        # stored in the cache for rebuild_lock_timeout seconds, if set
+        self.rebuild_lock_timeout = rebuild_lock_timeout
+
+        # shared caches honor s-maxage and don't store private responses
+        self.shared = shared
 
     def get(self, key):
         return None
 
-    def set(self, key, value, response=None):
+    def set(self, key, value, response=None, timeout=None):
+        """Store ``value`` under ``key`` for ``timeout`` seconds, defaulting
+        to the storage timeout of ``response``. Nothing is stored for
+        timeouts of 0 or less, which some caches read as never expiring
+        """
         return None
 
+    def delete(self, key):
+        return None
+
+    def add(self, key, value, timeout=None):
+        """Store ``value`` under ``key`` only if it has no value yet,
+        returning whether it was stored. Backends override this with an
+        atomic version
+        """
+        if timeout is None:
+            timeout = self.get_storage_timeout(self.as_response(value))
+        if timeout <= 0 or self.get(key) is not None:
+            return False
+
+        self.set(key, value, timeout=timeout)
+        return True
+
+    def get_many(self, keys):
+        """Return a dictionary of the values found for ``keys``. Backends
+        override this to fetch every key in a single round trip
+        """
+        values = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                values[key] = value
+
+        return values
+
+    def set_many(self, mapping, timeout=None):
+        """Store every value of ``mapping``. Values are used as their own
+        response to get their storage timeouts, unless ``timeout`` is given
+        """
+        for key, value in mapping.items():
+            self.set(key, value, response=self.as_response(value), timeout=timeout)
+
+    def delete_many(self, keys):
+        for key in keys:
+            self.delete(key)
+
+    def encode_value(self, value):
+        """Value to store for ``value``: responses with more content than
+        compress_threshold get a copy with compressed content, recording the
+        codec used
+        """
+        if self.compress_threshold is None or not isinstance(value, NapResponse):
+            return value
+
+        content = value.content
+        if not isinstance(content, bytes) or len(content) <= self.compress_threshold \
+                or getattr(value, 'content_codec', None):
+            return value
+
+        codec = get_codec(self.compression)
+        compressed = codec.compress(content)
+        if len(compressed) >= len(content):
+            return value
+
+        value = copy.copy(value)
+        value.content = compressed
+        value.content_codec = codec.name
+        return value
+
+    def decode_value(self, value):
+        """Value read from storage, with the content of responses stored
+        compressed decompressed. Entries stored without compression are
+        returned as is
+        """
+        codec_name = getattr(value, 'content_codec', None) \
+            if isinstance(value, NapResponse) else None
+        if not codec_name:
+            return value
+
+        value = copy.copy(value)
+        value.content = get_codec(codec_name).decompress(value.content)
+        value.content_codec = None
+        return value
+
+    def as_response(self, value):
+        "``value`` if it is a response cache headers can be read from"
+        return value if hasattr(value, 'headers') else None
+
+    def group_by_timeout(self, mapping, timeout=None):
+        """Split ``mapping`` into one dictionary per storage timeout, for
+        backends whose bulk set takes a single timeout. Values that
+        shouldn't be stored, with a timeout of 0 or less, are left out
+        """
+        groups = {}
+        for key, value in mapping.items():
+            if timeout is None:
+                value_timeout = self.get_storage_timeout(self.as_response(value))
+            else:
+                value_timeout = timeout
+            if value_timeout > 0:
+                groups.setdefault(value_timeout, {})[key] = value
+
+        return groups
+
+    def get_cache_control(self, response):
+        "Directives of ``response``'s Cache-Control header"
+        return parse_cache_control(response.headers.get('cache-control'))
+
     def get_timeout_from_header(self, response):
-        cache_headers = response.headers.get('cache-control')
-        if cache_headers is None:
+        """Freshness lifetime ``response``'s headers give it: its s-maxage
+        (for shared caches), max-age, or Expires header relative to its Date
+        header. None if they give none
+        """
+        directives = self.get_cache_control(response)
+        names = ('s-maxage', 'max-age') if self.shared else ('max-age',)
+        for name in names:
+            seconds = parse_seconds(directives.get(name))
+            if seconds is not None:
+                return seconds
+
+        expires = response.headers.get('expires')
+        if expires is None:
             return None
 
-        cache_header_age = re.search(r'max\-?age=(\d+)', cache_headers)
-        if cache_header_age:
-            return int(cache_header_age.group(1))
+        expires_at = parse_http_date(expires)
+        if expires_at is None:
+            # invalid dates, such as 0, mean already expired
+            return 0
+
+        date = parse_http_date(response.headers.get('date'))
+        if date is None:
+            date = self.get_response_time(response)
+        return max(0, int(expires_at - date))
+
+    def get_seconds_from_header(self, response, directive):
+        "Value of a ``directive=seconds`` Cache-Control directive, or None"
+        return parse_seconds(self.get_cache_control(response).get(directive))
+
+    def get_age(self, response):
+        """How old ``response`` already was when it was received, from its
+        Age and Date headers
+        """
+        age = parse_seconds(response.headers.get('age')) or 0
+
+        date = parse_http_date(response.headers.get('date'))
+        if date is not None:
+            age = max(age, self.get_response_time(response) - date)
+
+        return int(age)
+
+    def get_response_time(self, response):
+        "When ``response`` was received, as far as the cache knows"
+        cached_at = getattr(response, 'cached_at', None)
+        if isinstance(cached_at, (int, float)):
+            return cached_at
+
+        return time.time()
+
+    def must_revalidate(self, response):
+        """Whether ``response`` must not be served stale without
+        revalidating it first
+        """
+        directives = self.get_cache_control(response)
+        names = ['no-cache', 'must-revalidate']
+        if self.shared:
+            names.append('proxy-revalidate')
+
+        return any(name in directives for name in names)
+
+    def is_cacheable(self, response):
+        """Whether ``response`` may be stored, following its Cache-Control
+        and Vary headers
+        """
+        if not self.obey_cache_headers:
+            return True
+
+        directives = self.get_cache_control(response)
+        if 'no-store' in directives:
+            return False
+
+        if '*' in self.get_vary_headers(response):
+            return False
+
+        if self.shared:
+            if 'private' in directives:
+                return False
+
+            request_headers = dict(
+                (name.lower(), value)
+                for (name, value) in (getattr(response, 'request_headers', None) or {}).items()
+            )
+            authorized = 'authorization' in request_headers \
+                or getattr(response, 'request_authorized', False)
+            if authorized and not any(
+                    name in directives for name in ('public', 's-maxage', 'must-revalidate')):
+                return False
+
+        return True
+
+    def get_vary_headers(self, response):
+        "Lowercased names of the request headers ``response`` varies on"
+        if not self.obey_cache_headers:
+            return []
+
+        return parse_header_list(response.headers.get('vary'))
+
+    def get_variant_cache_key(self, cache_key, vary, request_headers):
+        """Cache key of the variant of the response stored under
+        ``cache_key`` matching the values of the ``vary`` headers in
+        ``request_headers``
+        """
+        request_headers = dict(
+            (name.lower(), value) for (name, value) in (request_headers or {}).items())
+        variant = '\n'.join(
+            '%s:%s' % (name, request_headers.get(name, '')) for name in sorted(vary))
+
+        variant_key = '%s::%s' % (cache_key, md5(variant.encode('utf-8')).hexdigest())
+        if self.cache_max_key_size is not None and len(variant_key) > self.cache_max_key_size:
+            variant_key = md5(variant_key.encode('utf-8')).hexdigest()
+
+        return variant_key
+
+    def get_stale_while_revalidate(self, response=None):
+        """How long after going stale ``response`` may still be served while
+        it is refreshed in the background
+        """
+        if response is not None and self.obey_cache_headers:
+            if self.must_revalidate(response):
+                return 0
+
+            header_value = self.get_seconds_from_header(response, 'stale-while-revalidate')
+            if header_value is not None:
+                return header_value
+
+        return self.stale_while_revalidate
+
+    def get_stale_if_error(self, response=None):
+        """How long after going stale ``response`` may still be served when
+        refreshing it fails
+        """
+        if response is not None and self.obey_cache_headers:
+            if self.must_revalidate(response):
+                return 0
+
+            header_value = self.get_seconds_from_header(response, 'stale-if-error')
+            if header_value is not None:
+                return header_value
+
+        return self.stale_if_error
 
     def get_cache_key(self, model, url):
         """ Cache key format is %(resource_name)s::%(url)s where the URL may be
@@ -51,11 +343,66 @@ class BaseCacheBackend(object):
         cache_key = cache_key.replace(" ", "")
         return cache_key
 
-    def get_timeout(self, response=None):
+    def is_negative_response(self, response):
+        """Whether ``response`` says the resource doesn't exist and should
+        be cached as such
+        """
+        return self.negative_timeout is not None \
+            and response.status_code in self.negative_status_codes
+
+    def should_refresh_early(self, response, now=None):
+        """Whether a fresh ``response`` should be refreshed ahead of its
+        expiry, spreading the refreshes of a busy entry over time instead of
+        having every process refresh it as it expires. Follows the XFetch
+        algorithm, weighting the chance by how long the response took to
+        fetch
+        """
+        if not self.early_refresh_beta or response.cached_at is None \
+                or response.cache_timeout is None:
+            return False
 
+        fetch_duration = getattr(response, 'fetch_duration', None)
+        if not fetch_duration:
+            return False
+
+        if now is None:
+            now = time.time()
+        expires_at = response.cached_at + response.cache_timeout
+        # 1 - random() is never 0
+        gap = -fetch_duration * self.early_refresh_beta * math.log(1 - random.random())
+        return now + gap >= expires_at
+
+    def get_timeout(self, response=None):
+        """How long ``response`` stays fresh once cached: its freshness
+        lifetime less its age when received, or the default timeout when its
+        headers don't give one. Responses with ``no-cache`` are stale at once
+        """
         if response and self.obey_cache_headers:
+            if 'no-cache' in self.get_cache_control(response):
+                return 0
+
             header_timeout = self.get_timeout_from_header(response)
-            if header_timeout:
-                return header_timeout
+            if header_timeout is not None:
+                return max(0, header_timeout - self.get_age(response))
+
+        if response is not None and self.is_negative_response(response):
+            return self.negative_timeout
 
         return self.default_timeout
+
+    def get_storage_timeout(self, response=None):
+        """How long a backend should store ``response`` for. This is longer
+        than its cache timeout when it may be served or revalidated after
+        going stale. Negative responses are never served stale
+        """
+        if response is not None and self.is_negative_response(response):
+            return self.get_timeout(response)
+
+        stale_timeouts = [
+            self.get_stale_while_revalidate(response),
+            self.get_stale_if_error(response),
+        ]
+        if response is not None and getattr(response, 'has_validators', False):
+            stale_timeouts.append(self.revalidate_timeout)
+
+        return self.get_timeout(response) + max(stale_timeouts)
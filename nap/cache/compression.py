@@ -0,0 +1,72 @@
+"""
+Codecs compressing the content of cached responses
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import zlib
+
+
+class ZlibCodec(object):
+
+    name = 'zlib'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+class Lz4Codec(object):
+
+    "Faster than zlib, compressing less. Requires ``lz4``"
+
+    name = 'lz4'
+
+    def __init__(self):
+        import lz4.frame
+        self._lz4 = lz4.frame
+
+    def compress(self, data):
+        return self._lz4.compress(data)
+
+    def decompress(self, data):
+        return self._lz4.decompress(data)
+
+
+class ZstdCodec(object):
+
+    "Faster than zlib, compressing more. Requires ``zstandard``"
+
+    name = 'zstd'
+
+    def __init__(self, level=3):
+        import zstandard
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def decompress(self, data):
+        return self._decompressor.decompress(data)
+
+
+CODECS = dict((codec.name, codec) for codec in (ZlibCodec, Lz4Codec, ZstdCodec))
+
+_codecs = {}
+
+
+def get_codec(name):
+    """Shared instance of the codec called ``name``. Raises ImportError if
+    its library isn't installed and ValueError for unknown codecs
+    """
+    if name not in _codecs:
+        if name not in CODECS:
+            raise ValueError("Unknown compression codec: %s" % name)
+        _codecs[name] = CODECS[name]()
+
+    return _codecs[name]
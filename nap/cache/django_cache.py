@@ -12,8 +12,34 @@ from .base import BaseCacheBackend
 class DjangoCacheBackend(BaseCacheBackend):
 
     def get(self, key):
-        return cache.get(key)
+        return self.decode_value(cache.get(key))
 
-    def set(self, key, value, response=None):
-        timeout = self.get_timeout(response)
-        return cache.set(key, value, timeout)
+    def set(self, key, value, response=None, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(response)
+        if timeout <= 0:
+            return
+        return cache.set(key, self.encode_value(value), timeout)
+
+    def delete(self, key):
+        return cache.delete(key)
+
+    def add(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(self.as_response(value))
+        if timeout <= 0:
+            return False
+        return cache.add(key, self.encode_value(value), timeout)
+
+    def get_many(self, keys):
+        values = cache.get_many(keys)
+        return dict((key, self.decode_value(value)) for (key, value) in values.items())
+
+    def set_many(self, mapping, timeout=None):
+        for group_timeout, group in self.group_by_timeout(mapping, timeout).items():
+            cache.set_many(dict(
+                (key, self.encode_value(value)) for (key, value) in group.items()
+            ), group_timeout)
+
+    def delete_many(self, keys):
+        return cache.delete_many(keys)
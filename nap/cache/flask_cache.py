@@ -16,8 +16,38 @@ class FlaskCacheBackend(BaseCacheBackend):
         self.cache = flask_caching.Cache(app, config=config)
 
     def get(self, key):
-        return self.cache.get(key)
+        return self.decode_value(self.cache.get(key))
 
-    def set(self, key, value, response=None):
-        timeout = self.get_timeout(response)
-        return self.cache.set(key, value, timeout)
+    def set(self, key, value, response=None, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(response)
+        if timeout <= 0:
+            return False
+        return self.cache.set(key, self.encode_value(value), timeout)
+
+    def delete(self, key):
+        return self.cache.delete(key)
+
+    def add(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(self.as_response(value))
+        if timeout <= 0:
+            return False
+        return self.cache.add(key, self.encode_value(value), timeout)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = self.cache.get_many(*keys)
+        return dict(
+            (key, self.decode_value(value)) for (key, value) in zip(keys, values)
+            if value is not None
+        )
+
+    def set_many(self, mapping, timeout=None):
+        for group_timeout, group in self.group_by_timeout(mapping, timeout).items():
+            self.cache.set_many(dict(
+                (key, self.encode_value(value)) for (key, value) in group.items()
+            ), group_timeout)
+
+    def delete_many(self, keys):
+        return self.cache.delete_many(*keys)
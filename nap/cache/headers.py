@@ -0,0 +1,62 @@
+"""
+Parsing of the HTTP headers deciding how responses are cached
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import re
+from email.utils import mktime_tz, parsedate_tz
+
+CACHE_CONTROL_DIRECTIVE = re.compile(r'([^\s,=]+)(?:\s*=\s*("[^"]*"|[^\s,]*))?')
+
+
+def parse_cache_control(value):
+    """Dictionary of the directives of a Cache-Control header ``value``,
+    with lowercased names. Directives without an argument map to None
+    """
+    directives = {}
+    if not value:
+        return directives
+
+    for name, argument in CACHE_CONTROL_DIRECTIVE.findall(value):
+        if argument.startswith('"'):
+            argument = argument[1:-1]
+        # the first occurrence of a duplicated directive wins
+        directives.setdefault(name.lower(), argument or None)
+
+    return directives
+
+
+def parse_seconds(value):
+    "Number of seconds in a delta-seconds ``value``, or None if invalid"
+    if value is None:
+        return None
+
+    try:
+        seconds = int(value)
+    except ValueError:
+        return None
+
+    return seconds if seconds >= 0 else None
+
+
+def parse_http_date(value):
+    "Timestamp of an HTTP-date ``value``, or None if invalid"
+    if not value:
+        return None
+
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+
+    try:
+        return mktime_tz(parsed)
+    except (OverflowError, ValueError):
+        return None
+
+
+def parse_header_list(value):
+    "Lowercased names of a comma separated header ``value``, such as Vary"
+    if not value:
+        return []
+
+    return [name.strip().lower() for name in value.split(',') if name.strip()]
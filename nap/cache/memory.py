@@ -0,0 +1,130 @@
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import collections
+import threading
+import time
+
+from six.moves import cPickle as pickle
+
+from .base import BaseCacheBackend
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+
+class LocalMemoryCacheBackend(BaseCacheBackend):
+
+    """
+    In-process cache, bounded to about ``max_size`` bytes of stored data.
+    Least recently used entries are evicted first once the bound is reached,
+    and entries expire after their storage timeout.
+
+    Values are stored pickled, so every hit returns a fresh copy and the
+    stored size is known. The backend is thread safe; it isn't shared
+    between processes.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, **kwargs):
+        super(LocalMemoryCacheBackend, self).__init__(**kwargs)
+        self.max_size = max_size
+
+        # key -> (pickled value, expiry time), least recently used first
+        self._entries = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # move to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            self.hits += 1
+
+        return self.decode_value(pickle.loads(entry[0]))
+
+    def set(self, key, value, response=None, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(response)
+        data = pickle.dumps(self.encode_value(value), pickle.HIGHEST_PROTOCOL)
+        expires_at = time.time() + timeout
+
+        with self._lock:
+            self._store(key, data, expires_at, timeout)
+
+    def add(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(self.as_response(value))
+        data = pickle.dumps(self.encode_value(value), pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return False
+
+            return self._store(key, data, now + timeout, timeout)
+
+    def _store(self, key, data, expires_at, timeout):
+        "Store an entry, evicting others as needed. Call with the lock held"
+        if key in self._entries:
+            self._remove(key)
+
+        entry_size = self.get_entry_size(key, data)
+        if timeout <= 0 or entry_size > self.max_size:
+            return False
+
+        self._entries[key] = (data, expires_at)
+        self._size += entry_size
+
+        while self._size > self.max_size:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+        return True
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_entry_size(self, key, data):
+        "Approximate memory used by an entry"
+        return len(key) + len(data)
+
+    def _remove(self, key):
+        data, expires_at = self._entries.pop(key)
+        self._size -= self.get_entry_size(key, data)
+
+    def stats(self):
+        "Monitoring snapshot of the cache's usage"
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_size': self.max_size,
+            }
@@ -0,0 +1,286 @@
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import contextlib
+import os
+import sqlite3
+import threading
+import time
+
+from six.moves import cPickle as pickle
+
+from .base import BaseCacheBackend
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+DEFAULT_VACUUM_INTERVAL = 60 * 5
+# Once over max_size, least recently used entries are evicted until the
+# cache is back under this share of it, so eviction doesn't run on every set
+CULL_RATIO = 0.9
+# Access times are only rewritten when older than this, so most hits don't
+# need a write
+ACCESS_RESOLUTION = 60
+
+SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS entries_expires_at ON entries (expires_at)",
+    "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)",
+    "CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta (id, size) VALUES (0, 0)",
+    """CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+        UPDATE meta SET size = size + NEW.size WHERE id = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+        UPDATE meta SET size = size - OLD.size WHERE id = 0;
+    END""",
+)
+
+
+class SQLiteCacheBackend(BaseCacheBackend):
+
+    """
+    Cache stored in a SQLite database at ``path``, so it stays warm across
+    restarts and is shared by every worker process on the host. The
+    database uses WAL mode, so readers don't block writers.
+
+    Entries expire after their storage timeout. Once the pickled values
+    take more than ``max_size`` bytes, least recently used entries are
+    evicted. Every ``vacuum_interval`` seconds a background thread removes
+    expired entries and gives unused space back to the file system.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE,
+            vacuum_interval=DEFAULT_VACUUM_INTERVAL, busy_timeout=5, **kwargs):
+        super(SQLiteCacheBackend, self).__init__(**kwargs)
+        self.path = path
+        self.max_size = max_size
+        self.vacuum_interval = vacuum_interval
+        self.busy_timeout = busy_timeout
+
+        self.hits = 0
+        self.misses = 0
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._initialized_pid = None
+
+        with self.transaction() as connection:
+            for statement in SCHEMA:
+                connection.execute(statement)
+
+    def get_connection(self):
+        """Connection for the current thread. Connections aren't shared
+        between threads, nor kept across forks
+        """
+        pid = os.getpid()
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == pid:
+            return connection
+
+        connection = sqlite3.connect(
+            self.path, timeout=self.busy_timeout, isolation_level=None)
+        # auto_vacuum must be set before the database's first table
+        connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+
+        self._local.connection = connection
+        self._local.pid = pid
+
+        self.start_vacuum_thread(pid)
+        return connection
+
+    @contextlib.contextmanager
+    def transaction(self):
+        "Write transaction, locking the database for writing up front"
+        connection = self.get_connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+        else:
+            connection.execute("COMMIT")
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        now = time.time()
+        connection = self.get_connection()
+        rows = []
+        # stay well under SQLite's limit on query parameters
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows.extend(connection.execute(
+                "SELECT key, value, accessed_at FROM entries "
+                "WHERE key IN (%s) AND expires_at > ?" % ', '.join('?' * len(batch)),
+                batch + [now],
+            ).fetchall())
+
+        touched = [key for (key, value, accessed_at) in rows
+            if accessed_at < now - ACCESS_RESOLUTION]
+        if touched:
+            with self.transaction() as connection:
+                connection.executemany(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?",
+                    [(now, key) for key in touched])
+
+        with self._lock:
+            self.hits += len(rows)
+            self.misses += len(keys) - len(rows)
+
+        return dict(
+            (key, self.decode_value(pickle.loads(bytes(value))))
+            for (key, value, accessed_at) in rows
+        )
+
+    def set(self, key, value, response=None, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(response)
+        self._set_entries([(key, value, timeout)])
+
+    def set_many(self, mapping, timeout=None):
+        entries = []
+        for key, value in mapping.items():
+            value_timeout = timeout
+            if value_timeout is None:
+                value_timeout = self.get_storage_timeout(self.as_response(value))
+            entries.append((key, value, value_timeout))
+
+        self._set_entries(entries)
+
+    def _set_entries(self, entries):
+        now = time.time()
+        rows = []
+        for key, value, timeout in entries:
+            data = pickle.dumps(self.encode_value(value), pickle.HIGHEST_PROTOCOL)
+            if timeout > 0 and len(data) <= self.max_size:
+                rows.append((key, sqlite3.Binary(data), len(data), now + timeout, now))
+
+        with self.transaction() as connection:
+            # delete then insert, so the size triggers see replaced entries
+            connection.executemany(
+                "DELETE FROM entries WHERE key = ?",
+                [(entry[0],) for entry in entries])
+            connection.executemany(
+                "INSERT INTO entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)", rows)
+
+            if self._get_size(connection) > self.max_size:
+                self._cull(connection, now)
+
+    def add(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = self.get_storage_timeout(self.as_response(value))
+        now = time.time()
+        data = pickle.dumps(self.encode_value(value), pickle.HIGHEST_PROTOCOL)
+        if timeout <= 0 or len(data) > self.max_size:
+            return False
+
+        with self.transaction() as connection:
+            if connection.execute(
+                    "SELECT 1 FROM entries WHERE key = ? AND expires_at > ?",
+                    (key, now)).fetchone():
+                return False
+
+            connection.execute("DELETE FROM entries WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT INTO entries (key, value, size, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(data), len(data), now + timeout, now))
+
+            if self._get_size(connection) > self.max_size:
+                self._cull(connection, now)
+
+        return True
+
+    def delete(self, key):
+        self.delete_many([key])
+
+    def delete_many(self, keys):
+        with self.transaction() as connection:
+            connection.executemany(
+                "DELETE FROM entries WHERE key = ?", [(key,) for key in keys])
+
+    def clear(self):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM entries")
+
+    def _get_size(self, connection):
+        return connection.execute("SELECT size FROM meta WHERE id = 0").fetchone()[0]
+
+    def _cull(self, connection, now):
+        "Delete expired entries, then least recently used ones while too big"
+        connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+
+        excess = self._get_size(connection) - self.max_size * CULL_RATIO
+        if excess <= 0:
+            return
+
+        evicted = []
+        cursor = connection.execute("SELECT key, size FROM entries ORDER BY accessed_at")
+        for key, size in cursor:
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        cursor.close()
+
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def vacuum(self):
+        """Remove expired entries, evict entries past max_size and give
+        unused space back to the file system
+        """
+        now = time.time()
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            if self._get_size(connection) > self.max_size:
+                self._cull(connection, now)
+
+        # execute() would step the pragma once, freeing a single page
+        connection.executescript("PRAGMA incremental_vacuum;")
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def start_vacuum_thread(self, pid):
+        "Start this process's background vacuum thread, if not running yet"
+        with self._lock:
+            if not self.vacuum_interval or self._initialized_pid == pid:
+                return
+            self._initialized_pid = pid
+
+        def run():
+            while True:
+                time.sleep(self.vacuum_interval)
+                try:
+                    self.vacuum()
+                except sqlite3.Error:
+                    # the next run retries; another process may hold the lock
+                    pass
+
+        thread = threading.Thread(target=run, name='nap-sqlite-cache-vacuum')
+        thread.daemon = True
+        thread.start()
+
+    def stats(self):
+        "Monitoring snapshot of the cache's usage"
+        connection = self.get_connection()
+        entries, = connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': entries,
+                'size': self._get_size(connection),
+                'max_size': self.max_size,
+            }
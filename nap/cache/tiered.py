@@ -0,0 +1,185 @@
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import threading
+import time
+
+from .base import BaseCacheBackend
+
+# How long entries are served from the in-process tier before checking the
+# shared one again, bounding how stale other processes' copies can be
+DEFAULT_L1_TIMEOUT = 30
+
+
+def l2_setting(name):
+    "Read-only attribute following the setting ``name`` of ``l2``"
+    return property(lambda self: getattr(self.l2, name))
+
+
+class TieredCacheBackend(BaseCacheBackend):
+
+    """
+    Chains a small, fast in-process cache (``l1``, usually a
+    LocalMemoryCacheBackend) in front of a shared one (``l2``, eg a
+    DjangoCacheBackend). Gets try ``l1`` first and copy ``l2`` hits into
+    it; sets and deletes go to both.
+
+    Entries are kept in ``l1`` for at most ``l1_timeout`` seconds, so
+    changes made through other processes' caches show up within that
+    time. Cache keys, timeouts, cache headers, negative caching and early
+    refreshes follow ``l2``'s current settings, and rebuild locks are only
+    stored in ``l2``.
+    """
+
+    obey_cache_headers = l2_setting('obey_cache_headers')
+    default_timeout = l2_setting('default_timeout')
+    cache_max_key_size = l2_setting('cache_max_key_size')
+    revalidate_timeout = l2_setting('revalidate_timeout')
+    stale_while_revalidate = l2_setting('stale_while_revalidate')
+    stale_if_error = l2_setting('stale_if_error')
+    negative_timeout = l2_setting('negative_timeout')
+    negative_status_codes = l2_setting('negative_status_codes')
+    early_refresh_beta = l2_setting('early_refresh_beta')
+    rebuild_lock_timeout = l2_setting('rebuild_lock_timeout')
+    shared = l2_setting('shared')
+
+    # values are stored as given, each tier compressing them its own way
+    compress_threshold = None
+    compression = None
+
+    def __init__(self, l1, l2, l1_timeout=DEFAULT_L1_TIMEOUT):
+        # settings are read from l2 rather than set by BaseCacheBackend
+        self.l1 = l1
+        self.l2 = l2
+        self.l1_timeout = l1_timeout
+
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        value = self.l1.get(key)
+        if value is not None:
+            self._count('l1_hits')
+            return value
+
+        value = self.l2.get(key)
+        if value is None:
+            self._count('misses')
+            return None
+
+        self._count('l2_hits')
+        timeout = self.get_l1_timeout(value)
+        if timeout > 0:
+            self.l1.set(key, value, response=value, timeout=timeout)
+
+        return value
+
+    def set(self, key, value, response=None, timeout=None):
+        self.l2.set(key, value, response=response, timeout=timeout)
+
+        if timeout is None:
+            timeout = self.get_storage_timeout(response)
+        self.l1.set(key, value, response=response, timeout=min(timeout, self.l1_timeout))
+
+    def delete(self, key):
+        self.l1.delete(key)
+        self.l2.delete(key)
+
+    def add(self, key, value, timeout=None):
+        return self.l2.add(key, value, timeout=timeout)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        values = self.l1.get_many(keys)
+        missing = [key for key in keys if key not in values]
+
+        l2_values = self.l2.get_many(missing) if missing else {}
+        for key, value in l2_values.items():
+            timeout = self.get_l1_timeout(value)
+            if timeout > 0:
+                self.l1.set(key, value, response=value, timeout=timeout)
+
+        with self._lock:
+            self.l1_hits += len(values)
+            self.l2_hits += len(l2_values)
+            self.misses += len(missing) - len(l2_values)
+
+        values.update(l2_values)
+        return values
+
+    def set_many(self, mapping, timeout=None):
+        self.l2.set_many(mapping, timeout=timeout)
+
+        for key, value in mapping.items():
+            value_timeout = timeout
+            if value_timeout is None:
+                value_timeout = self.get_storage_timeout(self.as_response(value))
+            self.l1.set(key, value, timeout=min(value_timeout, self.l1_timeout))
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        self.l1.delete_many(keys)
+        self.l2.delete_many(keys)
+
+    def get_l1_timeout(self, value):
+        """How long to keep a ``value`` found in ``l2`` in ``l1``: at most
+        l1_timeout, and no longer than ``l2`` keeps it
+        """
+        cached_at = getattr(value, 'cached_at', None)
+        if cached_at is None:
+            return self.l1_timeout
+
+        remaining = cached_at + self.get_storage_timeout(value) - time.time()
+        return min(self.l1_timeout, remaining)
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self):
+        "Monitoring snapshot of hits served by each tier"
+        with self._lock:
+            return {
+                'l1_hits': self.l1_hits,
+                'l2_hits': self.l2_hits,
+                'misses': self.misses,
+            }
+
+    # keys, timeouts and cacheability are those of the shared cache
+
+    def get_cache_key(self, model, url):
+        return self.l2.get_cache_key(model, url)
+
+    def get_timeout(self, response=None):
+        return self.l2.get_timeout(response)
+
+    def get_stale_while_revalidate(self, response=None):
+        return self.l2.get_stale_while_revalidate(response)
+
+    def get_stale_if_error(self, response=None):
+        return self.l2.get_stale_if_error(response)
+
+    def get_storage_timeout(self, response=None):
+        return self.l2.get_storage_timeout(response)
+
+    def is_cacheable(self, response):
+        return self.l2.is_cacheable(response)
+
+    def get_vary_headers(self, response):
+        return self.l2.get_vary_headers(response)
+
+    def get_variant_cache_key(self, cache_key, vary, request_headers):
+        return self.l2.get_variant_cache_key(cache_key, vary, request_headers)
+
+    def get_cache_control(self, response):
+        return self.l2.get_cache_control(response)
+
+    def must_revalidate(self, response):
+        return self.l2.must_revalidate(response)
+
+    def is_negative_response(self, response):
+        return self.l2.is_negative_response(response)
+
+    def should_refresh_early(self, response, now=None):
+        return self.l2.should_refresh_early(response, now=now)
@@ -0,0 +1,172 @@
+"""
+Per-API circuit breaking, to fail fast while an upstream API is down
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import collections
+import threading
+import time
+
+import requests
+
+from .exceptions import CircuitOpenError
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitState(object):
+
+    "Sliding window of call outcomes for a single root_url"
+
+    def __init__(self):
+        self.state = CLOSED
+        self.opened_at = None
+        self.probes = 0
+        self.calls = collections.deque()
+
+    def prune(self, now, window):
+        while self.calls and self.calls[0][0] <= now - window:
+            self.calls.popleft()
+
+    @property
+    def failures(self):
+        return sum(1 for (called_at, failed) in self.calls if failed)
+
+
+class CircuitBreaker(object):
+
+    """
+    Tracks failed and slow calls per root_url over a sliding ``window`` of
+    seconds. Once at least ``minimum_calls`` were made and the failure rate
+    reaches ``failure_threshold``, the circuit opens and calls fail
+    immediately with CircuitOpenError. After ``reset_timeout`` seconds the
+    circuit half-opens and lets ``half_open_probes`` calls through: the
+    circuit closes if they succeed and re-opens if they fail.
+
+    Exceptions raised while sending, 5xx responses and calls taking longer
+    than ``slow_call_duration`` seconds (if set) count as failures.
+    """
+
+    def __init__(self, failure_threshold=0.5, minimum_calls=10, window=30,
+            reset_timeout=30, half_open_probes=1, slow_call_duration=None):
+        self.failure_threshold = failure_threshold
+        self.minimum_calls = minimum_calls
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.slow_call_duration = slow_call_duration
+        self._circuits = {}
+        self._lock = threading.Lock()
+
+    def call(self, key, send):
+        """Call ``send`` through the circuit for ``key``
+
+        :param key: circuit to use, usually a model's root_url
+        :param send: callable sending a request and returning its response
+        """
+        self.before_call(key)
+
+        started = time.time()
+        try:
+            response = send()
+        except requests.RequestException:
+            self.record(key, failed=True)
+            raise
+        except BaseException:
+            self.release(key)
+            raise
+
+        self.record_response(key, response, time.time() - started)
+        return response
+
+    def before_call(self, key):
+        "Raise CircuitOpenError if the circuit for ``key`` doesn't allow a call"
+        now = time.time()
+        with self._lock:
+            circuit = self._circuits.setdefault(key, CircuitState())
+
+            if circuit.state == OPEN:
+                if now - circuit.opened_at < self.reset_timeout:
+                    raise CircuitOpenError(key)
+                circuit.state = HALF_OPEN
+                circuit.probes = 0
+
+            if circuit.state == HALF_OPEN:
+                if circuit.probes >= self.half_open_probes:
+                    raise CircuitOpenError(key)
+                circuit.probes += 1
+
+    def release(self, key):
+        """Give back the probe taken by a call to ``key`` that ended without
+        an outcome, such as a cancelled one, so the circuit can be probed
+        again
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is not None and circuit.state == HALF_OPEN and circuit.probes > 0:
+                circuit.probes -= 1
+
+    def record_response(self, key, response, duration):
+        "Record a call to ``key`` answered with ``response`` after ``duration`` seconds"
+        failed = response.status_code >= 500 or (
+            self.slow_call_duration is not None and duration > self.slow_call_duration)
+        self.record(key, failed=failed)
+
+    def record(self, key, failed):
+        now = time.time()
+        with self._lock:
+            circuit = self._circuits.setdefault(key, CircuitState())
+
+            if circuit.state == HALF_OPEN:
+                if failed:
+                    self._open(circuit, now)
+                else:
+                    circuit.probes -= 1
+                    if circuit.probes <= 0:
+                        circuit.state = CLOSED
+                        circuit.calls.clear()
+                return
+
+            circuit.calls.append((now, failed))
+            circuit.prune(now, self.window)
+
+            if circuit.state == CLOSED and len(circuit.calls) >= self.minimum_calls:
+                failure_rate = circuit.failures / float(len(circuit.calls))
+                if failure_rate >= self.failure_threshold:
+                    self._open(circuit, now)
+
+    def _open(self, circuit, now):
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.probes = 0
+        circuit.calls.clear()
+
+    def get_state(self, key):
+        "Monitoring snapshot of the circuit for ``key``"
+        now = time.time()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None:
+                return {'state': CLOSED, 'calls': 0, 'failures': 0, 'opened_at': None}
+
+            circuit.prune(now, self.window)
+            return {
+                'state': circuit.state,
+                'calls': len(circuit.calls),
+                'failures': circuit.failures,
+                'opened_at': circuit.opened_at,
+            }
+
+    def states(self):
+        "Monitoring snapshots of every known circuit, keyed by root_url"
+        return dict((key, self.get_state(key)) for key in list(self._circuits))
+
+    def reset(self, key=None):
+        "Close the circuit for ``key``, or every circuit"
+        with self._lock:
+            if key is None:
+                self._circuits = {}
+            else:
+                self._circuits.pop(key, None)
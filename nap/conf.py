@@ -7,6 +7,9 @@ import logging
 
 from .cache.base import BaseCacheBackend
 from .engine import ResourceEngine
+from .http import DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE
+from .serializers import JSONSerializer
+from .singleflight import SingleFlight
 
 
 DEFAULT_CONFIG = {
@@ -20,6 +23,7 @@ DEFAULT_CONFIG = {
     'update_method': 'PUT',
     'auth': (),
     'engine_class': ResourceEngine,
+    'async_engine_class': None,
     'middleware': (),
     'collection_field': None,
     'valid_get_status': (200,),
@@ -30,9 +34,21 @@ DEFAULT_CONFIG = {
     'log_level': 'INFO',
     'cache_backend': BaseCacheBackend(),
     'cached_methods': ('GET', ),
+    'invalidate_on_write': False,
+    'write_through_cache': False,
     'request_args': {},
     'headers': {},
-    'content_type': 'application/json'
+    'content_type': 'application/json',
+    'serializer_class': JSONSerializer,
+    'keep_alive': True,
+    'pool_connections': DEFAULT_POOL_CONNECTIONS,
+    'pool_maxsize': DEFAULT_POOL_MAXSIZE,
+    'max_retries': 0,
+    'single_flight': SingleFlight(),
+    'retry_policy': None,
+    'circuit_breaker': None,
+    'rate_limiter': None,
+    'paginator': None,
 }
 
 REQUIRED_CONFIG = ('resource_name', 'urls')
@@ -83,6 +99,9 @@ class NapConfig(dict):
 
         config['logger'] = logger
 
+        # serializers are stateless, so every request shares one instance
+        config['serializer'] = config['serializer_class']()
+
         # Backwards compatible issue: middleware is now generic and not just
         # for auth. Add all auth to the end of middleware so they are the
         # last middleware classes ran
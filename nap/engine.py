@@ -1,13 +1,33 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
+import collections
 import copy
-import json
+import functools
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
+
+from .cache.base import VaryIndex
 from .collection import ListWithAttributes
-from .exceptions import InvalidStatusError, BadRequestError
-from .http import NapRequest, NapResponse
-from .serializers import JSONSerializer
-from .utils import handle_slash, make_url, to_unicode
+from .exceptions import InvalidStatusError, BadRequestError, CircuitOpenError
+from .http import NapRequest, NapResponse, executor_registry, session_registry
+from .pagination import BasePaginator
+from .query import QuerySet
+from .streaming import DEFAULT_CHUNK_SIZE, JSONArrayStream
+from .utils import handle_slash, make_url
+
+# Cache tag of every collection response of a model
+COLLECTION_TAG = 'collection'
+# Tag versions are kept well past the lifetime of the entries they validate
+TAG_VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+# Cache entries currently being refreshed in the background, shared by all
+# engines so a stale entry is only ever refreshed once at a time
+_background_refreshes = set()
+_background_refresh_lock = threading.Lock()
 
 
 class ResourceEngine(object):
@@ -17,33 +37,126 @@ class ResourceEngine(object):
         self._tmp_request_args = {}
 
     def _request(self, request_method, url, *args, **kwargs):
-        "Construct a NapRequest and send it via a requests.rest call"
-
-        full_url = self.get_full_url(url)
+        "Construct a NapRequest and send it via a pooled requests session"
+
+        self.logger.info("Calling %s url: %s" % (request_method, self.get_full_url(url)))
+
+        request = self.prepare_request(request_method, url, *args, **kwargs)
+
+        # streamed bodies can only be read once, so they are never shared
+        single_flight = self.model._meta['single_flight']
+        if single_flight is not None and request.method == 'GET' \
+                and not request.extra_kwargs.get('stream'):
+            response = single_flight.do(
+                self.get_single_flight_key(request),
+                self._fetch, request, request_method
+            )
+            # callers sharing a response each decode their own copy, so
+            # their objects never share mutable data
+            response = copy.copy(response)
+        else:
+            response = self._fetch(request, request_method)
 
-        self.logger.info("Calling %s url: %s" % (request_method, full_url))
+        response.request_headers = request.headers
+        response.request_authorized = request.auth is not None
+        return response
 
+    def prepare_request(self, request_method, url, *args, **kwargs):
+        "NapRequest for ``url``, as modified by the model's middleware"
         request_args = self.get_request_args(kwargs)
-
-        request = NapRequest(request_method, full_url, *args, **request_args)
+        request = NapRequest(request_method, self.get_full_url(url), *args, **request_args)
 
         for mw in self.model._meta['middleware']:
             request = mw.handle_request(request)
 
-        resource_response = request.send()
-        response = NapResponse(
-            url=request.url,
-            status_code=resource_response.status_code,
-            headers=resource_response.headers,
-            content=resource_response.content,
-            request_method=request_method,
-        )
+        return request
+
+    def _fetch(self, request, request_method):
+        "Send a fully prepared ``request`` and run response middleware"
+
+        started_at = time.time()
+        resource_response = self._send(request)
+        fetch_duration = time.time() - started_at
+
+        if request.extra_kwargs.get('stream'):
+            response = NapResponse(
+                url=request.url,
+                status_code=resource_response.status_code,
+                headers=resource_response.headers,
+                content=None,
+                request_method=request_method,
+                raw_response=resource_response,
+            )
+        else:
+            response = NapResponse(
+                url=request.url,
+                status_code=resource_response.status_code,
+                headers=resource_response.headers,
+                content=resource_response.content,
+                request_method=request_method,
+            )
+        response.fetch_duration = fetch_duration
 
         for mw in reversed(self.model._meta['middleware']):
             response = mw.handle_response(request, response)
 
         return response
 
+    def get_single_flight_key(self, request):
+        """Key identifying requests that can share a single in-flight
+        response: same method, full url, headers, auth and extra arguments
+        """
+        return repr((
+            request.method,
+            request.url,
+            sorted(request.headers.items()),
+            request.auth,
+            request.data,
+            request.extra_args,
+            sorted(request.extra_kwargs.items()),
+        ))
+
+    def _send(self, request):
+        """Send ``request`` over the model's pooled session, through the
+        model's circuit_breaker and rate_limiter, retrying according to its
+        retry_policy
+        """
+        session = self.get_session()
+
+        def send():
+            return request.send(session=session)
+
+        circuit_breaker = self.model._meta['circuit_breaker']
+        if circuit_breaker is not None:
+            send = functools.partial(
+                circuit_breaker.call, self.model._meta['root_url'], send)
+
+        rate_limiter = self.model._meta['rate_limiter']
+        if rate_limiter is not None:
+            send = functools.partial(
+                rate_limiter.call, rate_limiter.get_key(self.model, request.url), send)
+
+        retry_policy = self.model._meta['retry_policy']
+        if retry_policy is None:
+            return send()
+
+        return retry_policy.call(request.method, send)
+
+    def get_session(self):
+        """Return the pooled session shared by every model using this
+        model's root_url, or None if keep_alive is disabled
+        """
+        meta = self.model._meta
+        if not meta['keep_alive']:
+            return None
+
+        return session_registry.get_session(
+            self.get_full_url(''),
+            pool_connections=meta['pool_connections'],
+            pool_maxsize=meta['pool_maxsize'],
+            max_retries=meta['max_retries'],
+        )
+
     # url methods
     def _generate_url(self, url_type='lookup', resource_obj=None, **kwargs):
         """Iterates through object's URL list to find an approrpiate match
@@ -169,16 +282,196 @@ class ResourceEngine(object):
         """instance method to perform all non-collection get requests
         """
         cleaned_url = handle_slash(url, self.model._meta['add_slash'])
+        response = self.get_response(cleaned_url, skip_cache, *args, **kwargs)
+
+        return self.obj_from_get_response(response, cleaned_url)
 
+    def get_response(self, url, skip_cache=False, *args, **kwargs):
+        """Get a response for a GET request to ``url``, using the cache
+        unless ``skip_cache`` is set
+
+        :param url: url to request
+        :param skip_cache: if true, don't check the cache for existing values
+        """
         if skip_cache:
             cached_response = None
         else:
-            cached_response = self.get_from_cache('GET', cleaned_url)
+            cached_response = self.get_from_cache('GET', url)
 
-        if cached_response:
-            response = cached_response
-        else:
-            response = self._request('GET', cleaned_url, *args, **kwargs)
+        return self.resolve_cached_response(url, cached_response, *args, **kwargs)
+
+    def resolve_cached_response(self, url, cached_response, *args, **kwargs):
+        """Return ``cached_response`` if it is still fresh. Otherwise, request
+        ``url``, conditionally revalidating a stale ``cached_response`` when
+        it has an ETag or Last-Modified validator.
+
+        Within its stale-while-revalidate window, a stale response is returned
+        immediately while it is refreshed in the background. Within its
+        stale-if-error window, it is returned if the request fails or the
+        API responds with a server error. Fresh responses may be refreshed
+        in the background ahead of their expiry, and stale ones are returned
+        while another process holds the lock to refresh them, unless they
+        must be revalidated.
+
+        :param url: url the cached response was stored for
+        :param cached_response: a NapResponse retrieved from the cache, or None
+        """
+        if not cached_response:
+            return self._request('GET', url, *args, **kwargs)
+
+        stale_for = cached_response.stale_for()
+        if stale_for < 0:
+            if self.cache.should_refresh_early(cached_response):
+                self.refresh_in_background(url, cached_response, *args, **kwargs)
+            return cached_response
+
+        if stale_for < self.cache.get_stale_while_revalidate(cached_response):
+            self.refresh_in_background(url, cached_response, *args, **kwargs)
+            return cached_response
+
+        locked = self.acquire_rebuild_lock(url)
+        # no-cache and must-revalidate responses are never served stale
+        if not locked and not self.cache.must_revalidate(cached_response):
+            self.logger.debug("%s is being refreshed elsewhere, serving stale cached response" % url)
+            return cached_response
+
+        try:
+            response = self.revalidate(url, cached_response, *args, **kwargs)
+        except (requests.RequestException, CircuitOpenError):
+            if not self.can_serve_stale_on_error(cached_response):
+                raise
+            self.logger.warning("Request to %s failed, serving stale cached response" % url)
+            return cached_response
+        finally:
+            if locked:
+                self.release_rebuild_lock(url)
+
+        if response.status_code >= 500 and self.can_serve_stale_on_error(cached_response):
+            self.logger.warning("Got %s from %s, serving stale cached response" % (
+                response.status_code, url))
+            return cached_response
+
+        return response
+
+    def can_serve_stale_on_error(self, cached_response):
+        "Whether a stale ``cached_response`` is within its stale-if-error window"
+        stale_if_error = self.cache.get_stale_if_error(cached_response)
+        return cached_response.stale_for() < stale_if_error
+
+    def refresh_in_background(self, url, cached_response, *args, **kwargs):
+        """Refresh a stale ``cached_response`` in a background thread, unless
+        a refresh for ``url`` is already running. Returns the started thread.
+        """
+        refresh_key = (self.model._meta['resource_name'], self.get_full_url(url))
+        with _background_refresh_lock:
+            if refresh_key in _background_refreshes:
+                return None
+            _background_refreshes.add(refresh_key)
+
+        if not self.acquire_rebuild_lock(url):
+            with _background_refresh_lock:
+                _background_refreshes.discard(refresh_key)
+            return None
+
+        engine = self.modify_request()
+
+        def refresh():
+            try:
+                response = engine.revalidate(url, cached_response, *args, **kwargs)
+                if response.status_code in self.model._meta['valid_get_status']:
+                    engine.cache_response(response)
+            except Exception:
+                self.logger.exception("Background refresh of %s failed" % url)
+            finally:
+                engine.release_rebuild_lock(url)
+                with _background_refresh_lock:
+                    _background_refreshes.discard(refresh_key)
+
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def acquire_rebuild_lock(self, url):
+        """Whether this process may refresh the cached response for
+        ``url``. With a ``rebuild_lock_timeout`` on the cache backend, a
+        lock is added to the cache, so each entry is refreshed by a single
+        process at a time. Locks are released by release_rebuild_lock, and
+        expire after the timeout in case their process dies
+        """
+        timeout = self.cache.rebuild_lock_timeout
+        if not timeout:
+            return True
+
+        return self.cache.add(self.get_rebuild_lock_key(url), 1, timeout=timeout)
+
+    def release_rebuild_lock(self, url):
+        "Release the lock taken by acquire_rebuild_lock once ``url`` was refreshed"
+        if self.cache.rebuild_lock_timeout:
+            self.cache.delete(self.get_rebuild_lock_key(url))
+
+    def get_rebuild_lock_key(self, url):
+        return self.cache.get_cache_key(
+            model=self.model,
+            url='rebuild:%s' % self.get_full_url(url),
+        )
+
+    def revalidate(self, url, cached_response, *args, **kwargs):
+        """Request ``url`` to replace a stale ``cached_response``, sending a
+        conditional request if it has an ETag or Last-Modified validator
+        """
+        if not cached_response.has_validators:
+            return self._request('GET', url, *args, **kwargs)
+
+        request_args = self.get_request_args(kwargs)
+        headers = request_args.get('headers', {}).copy()
+        headers.update(self.get_revalidation_headers(cached_response))
+        kwargs['headers'] = headers
+
+        response = self._request('GET', url, *args, **kwargs)
+        if response.status_code == 304:
+            self.logger.debug("Revalidated cached response for %s" % url)
+            return self.refresh_cached_response(cached_response, response)
+
+        return response
+
+    def get_revalidation_headers(self, cached_response):
+        "Conditional request headers built from ``cached_response``'s validators"
+        headers = {}
+        if cached_response.etag:
+            headers['If-None-Match'] = cached_response.etag
+        if cached_response.last_modified:
+            headers['If-Modified-Since'] = cached_response.last_modified
+
+        return headers
+
+    def refresh_cached_response(self, cached_response, not_modified_response):
+        """Build a fresh, cacheable response from a stale ``cached_response``
+        and the headers of a 304 Not Modified response to its revalidation
+        """
+        headers = cached_response.headers.copy()
+        headers.update(not_modified_response.headers)
+
+        response = NapResponse(
+            content=cached_response.content,
+            url=cached_response.url,
+            status_code=cached_response.status_code,
+            headers=headers,
+            request_method=cached_response.request_method,
+        )
+        response.fetch_duration = getattr(not_modified_response, 'fetch_duration', None)
+        response.request_headers = getattr(not_modified_response, 'request_headers', None)
+        return response
+
+    def obj_from_get_response(self, response, url):
+        """Validate and handle a get response, returning the ResourceModel
+        object it represents
+
+        :param response: a NapResponse to a get request
+        :param url: the cleaned url ``response`` was requested from
+        """
+        if self.cache.is_negative_response(response):
+            self.cache_response(response)
 
         self.validate_get_response(response)
         self.handle_get_response(response)
@@ -186,9 +479,106 @@ class ResourceEngine(object):
         # should this be handled by handle_get_response? i think probably.
         obj = self.obj_from_response(response)
 
-        obj._full_url = cleaned_url
+        obj._full_url = url
         return obj
 
+    def get_many(self, lookups, max_workers=None, skip_cache=False):
+        """Concurrently get a resource for each item in ``lookups``.
+
+        Cached responses are used first, looked up with a single cache
+        call; any misses are fetched on a pool of at most ``max_workers``
+        threads, shared by every model using the same host and
+        ``max_workers``, and cached together. Results are returned in the same order
+        as ``lookups``. A lookup that fails does not abort the batch: the
+        exception it raised is returned in its place.
+
+        :param lookups: iterable of resource ids or dictionaries of lookup
+            variables to send to get_lookup_url
+        :param max_workers: maximum number of concurrent requests. Defaults
+            to the model's ``pool_maxsize``
+        :param skip_cache: if true, don't check the cache for existing values
+        """
+        if max_workers is None:
+            max_workers = self.model._meta['pool_maxsize']
+
+        results = []
+        urls = {}
+        for index, lookup in enumerate(lookups):
+            try:
+                urls[index] = self.get_many_url(lookup)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+
+        indexes = sorted(urls)
+        if skip_cache:
+            cached_responses = [None] * len(indexes)
+        else:
+            cached_responses = self.get_many_from_cache(
+                'GET', [urls[index] for index in indexes])
+
+        # handle_response resets temporary request arguments, so each
+        # response is handled by its own engine
+        misses = []
+        for index, cached_response in zip(indexes, cached_responses):
+            if cached_response and not cached_response.is_stale():
+                results[index] = self._obj_or_exception(
+                    self.modify_request(), cached_response, urls[index])
+            else:
+                misses.append((index, cached_response))
+
+        if not misses:
+            return results
+
+        def fetch(url, cached_response):
+            engine = self.modify_request()
+            return engine, engine.resolve_cached_response(url, cached_response)
+
+        fetched = []
+        to_cache = []
+        executor = executor_registry.get_executor(self.get_full_url(''), max_workers)
+        futures = [
+            (index, executor.submit(fetch, urls[index], cached_response))
+            for (index, cached_response) in misses
+        ]
+        for index, future in futures:
+            try:
+                engine, response = future.result()
+                if self.cache.is_negative_response(response):
+                    to_cache.append(response)
+                engine.validate_get_response(response)
+            except Exception as e:
+                results[index] = e
+            else:
+                fetched.append((index, engine, response))
+                to_cache.append(response)
+
+        self.cache_responses(to_cache)
+        for index, engine, response in fetched:
+            results[index] = self._obj_or_exception(engine, response, urls[index])
+
+        return results
+
+    def _obj_or_exception(self, engine, response, url):
+        try:
+            return engine.obj_from_get_response(response, url)
+        except Exception as e:
+            return e
+
+    def get_many_url(self, lookup):
+        """Generate a cleaned lookup url for a single get_many item
+
+        :param lookup: a resource id, or a dictionary of lookup variables
+        """
+        if isinstance(lookup, dict):
+            lookup_vars = lookup
+        else:
+            resource_id_name = self.model._meta.get('resource_id_field_name')
+            lookup_vars = {resource_id_name or 'resource_id': lookup}
+
+        url = self.get_lookup_url(**lookup_vars)
+        return handle_slash(url, self.model._meta['add_slash'])
+
     def validate_get_response(self, response):
         """Validate get response is valid to use for updating our object
         """
@@ -201,8 +591,7 @@ class ResourceEngine(object):
         """Handle any actions needed after a HTTP Response has ben validated
         for a get (get, refresh, lookup) action
         """
-        content_str = to_unicode(response.content)
-        resource_data = self.deserialize(content_str)
+        resource_data = self.get_response_data(response)
 
         self._raw_response_content = resource_data
         self.handle_response(response)
@@ -227,29 +616,206 @@ class ResourceEngine(object):
         return self.filter()
 
     def filter(self, skip_cache=True, **lookup_vars):
+        """
+        Returns a lazy QuerySet for the first URL set as a collections URL.
+        No request is sent until the QuerySet is evaluated.
+
+        :param skip_cache: If true don't cache results (defaults to true for backwards compatibilty) and don't check cache for an existing value for this request
+        :param lookup_vars: variables to pass to _generate_url
+        """
+        return QuerySet(self, lookup_vars=lookup_vars, skip_cache=skip_cache)
+
+    def fetch_collection(self, skip_cache=True, **lookup_vars):
         """
         Accesses the first URL set as a collections URL with no additional
         parameters passed. Returns a list of current ResourceModel objects
 
-        :param skip_cache: If true don't cache results (defaults to true for backwards compatibilty) and don't check cache for an existing value for this request
+        :param skip_cache: If true don't cache results and don't check cache for an existing value for this request
         :param lookup_vars: variables to pass to _generate_url
         """
         url = self.get_collection_url(**lookup_vars)
+        response = self.get_response(url, skip_cache)
 
-        if skip_cache:
-            cached_response = None
-        else:
-            cached_response = self.get_from_cache('GET', url)
+        self.validate_collection_response(response)
 
-        if cached_response:
-            response = cached_response
-        else:    
-            response = self._request('GET', url)
+        r_data = self.get_response_data(response)
+        resource_list, extra_data = self.objs_from_collection_data(r_data)
+        self.write_through_collection(self.split_collection_data(r_data)[0], response)
 
+        if not skip_cache:
+            self.cache_response(response)
+
+        return ListWithAttributes(resource_list, extra_data)
+
+    def iter_filter(self, skip_cache=True, paginator=None, prefetch=None,
+            stream=False, **lookup_vars):
+        """
+        Lazily iterate over every object in a paginated collection, yielding
+        ResourceModel objects one at a time. Only one page is held in memory
+        at once.
+
+        With paginators that can compute page urls up front (offset and page
+        number pagination), ``prefetch`` pages are requested concurrently
+        while the current one is consumed. Pages are still yielded in order,
+        and at most ``prefetch`` pages besides the current one are held in
+        memory.
+
+        With ``stream``, each page's body is read and decoded incrementally
+        and objects are yielded as they are parsed, so only one object is
+        held in memory at a time. Streamed pages are never cached.
+
+        :param skip_cache: If true don't cache pages and don't check cache
+            for existing values
+        :param paginator: pagination scheme to follow. Defaults to the
+            model's ``paginator`` option; without one, only the first page is
+            fetched
+        :param prefetch: number of pages to request ahead of the current one
+        :param stream: if true, decode pages incrementally while they are read
+        :param lookup_vars: variables to pass to _generate_url
+        """
+        if paginator is None:
+            paginator = self.get_paginator()
+
+        url = paginator.get_first_url(self.get_collection_url(**lookup_vars))
+        if stream:
+            if prefetch:
+                raise ValueError("prefetch can't be used with stream")
+
+            for obj in self._iter_streamed(paginator, url):
+                yield obj
+            return
+
+        if prefetch:
+            if not hasattr(paginator, 'get_page_url'):
+                raise ValueError("prefetch requires a paginator that can "
+                    "compute page urls, such as OffsetPaginator")
+
+            for obj in self._iter_prefetched(paginator, url, prefetch, skip_cache):
+                yield obj
+            return
+
+        while url:
+            response = self.get_response(url, skip_cache)
+            obj_list, r_data = self.get_page_data(response, skip_cache)
+            next_url = paginator.get_next_url(url, response, r_data, len(obj_list))
+
+            # drop references to this page before fetching the next one
+            response = r_data = None
+            for obj_dict in obj_list:
+                yield self.model(**obj_dict)
+
+            obj_list = None
+            url = next_url
+
+    def _iter_streamed(self, paginator, url):
+        "Yield objects from pages decoded while they are read"
+        while url:
+            response = self._request('GET', url, stream=True)
+            try:
+                self.validate_collection_response(response)
+
+                page = self.get_page_stream(response)
+                item_count = 0
+                for obj_dict in page:
+                    item_count += 1
+                    yield self.model(**obj_dict)
+            finally:
+                response.close()
+
+            # the collection itself isn't kept, only the remaining keys
+            url = paginator.get_next_url(url, response, page.extra_data, item_count)
+
+    def get_page_stream(self, response):
+        """Return a JSONArrayStream over the objects of a streamed collection
+        page response
+
+        :param response: NapResponse to a collection request made with
+            ``stream=True``
+        """
+        return JSONArrayStream(
+            response.iter_content(DEFAULT_CHUNK_SIZE),
+            collection_field=self.model._meta.get('collection_field'),
+            encoding=response.encoding,
+        )
+
+    def _iter_prefetched(self, paginator, first_url, prefetch, skip_cache):
+        "Yield objects from pages requested ``prefetch`` at a time"
+
+        def fetch(url):
+            # handle_response resets temporary request arguments, so each
+            # request gets its own engine
+            engine = self.modify_request()
+            response = engine.get_response(url, skip_cache)
+            return engine.get_page_data(response, skip_cache)[0]
+
+        executor = ThreadPoolExecutor(max_workers=prefetch + 1)
+        in_flight = collections.deque()
+        page_index = 0
+        try:
+            while True:
+                # the current page, plus prefetch pages ahead of it
+                while len(in_flight) <= prefetch:
+                    url = paginator.get_page_url(first_url, page_index)
+                    in_flight.append((url, executor.submit(fetch, url)))
+                    page_index += 1
+
+                url, future = in_flight.popleft()
+                obj_list = future.result()
+                is_last_page = paginator.is_last_page(url, len(obj_list))
+
+                for obj_dict in obj_list:
+                    yield self.model(**obj_dict)
+
+                if is_last_page:
+                    return
+        finally:
+            # requests for pages past the last one are discarded
+            for url, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def get_page_data(self, response, skip_cache=True):
+        """Validate a collection page response, returning its list of object
+        dictionaries and its full deserialized content
+
+        :param response: NapResponse to a collection request
+        :param skip_cache: If true, don't cache ``response``
+        """
         self.validate_collection_response(response)
 
-        serializer = self.get_serializer()
-        r_data = serializer.deserialize(to_unicode(response.content))
+        r_data = self.get_response_data(response)
+        obj_list, extra_data = self.split_collection_data(r_data)
+        self.write_through_collection(obj_list, response)
+
+        if not skip_cache:
+            self.cache_response(response)
+
+        return obj_list, r_data
+
+    def get_paginator(self):
+        paginator = self.model._meta['paginator']
+        if paginator is None:
+            return BasePaginator()
+
+        return paginator
+
+    def objs_from_collection_data(self, r_data):
+        """Split deserialized collection data into a list of ResourceModel
+        objects and a dictionary of any extra, non-collection data
+
+        :param r_data: deserialized collection response content
+        """
+        obj_list, extra_data = self.split_collection_data(r_data)
+        resource_list = [self.model(**obj_dict) for obj_dict in obj_list]
+
+        return resource_list, extra_data
+
+    def split_collection_data(self, r_data):
+        """Split deserialized collection data into a list of object
+        dictionaries and a dictionary of any extra, non-collection data
+
+        :param r_data: deserialized collection response content
+        """
         collection_field = self.model._meta.get('collection_field')
         if collection_field and collection_field in r_data:
             obj_list = r_data[collection_field]
@@ -267,12 +833,7 @@ class ResourceEngine(object):
             except (KeyError, AttributeError):
                 raise ValueError('expected list of dictionaries')
 
-        resource_list = [self.model(**obj_dict) for obj_dict in obj_list]
-
-        if not skip_cache:
-            self.cache_response(response)
-
-        return ListWithAttributes(resource_list, extra_data)
+        return obj_list, extra_data
 
     def validate_collection_response(self, response):
         """Validate get response is valid to use for updating our object
@@ -300,6 +861,8 @@ class ResourceEngine(object):
         )
 
         self.validate_update_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
         return self.handle_update_response(response)
 
     def validate_update_response(self, response):
@@ -307,7 +870,7 @@ class ResourceEngine(object):
         self.validate_response(response)
 
         if response.status_code in self.model._meta['bad_request_status']:
-            errors = json.loads(to_unicode(response.content))
+            errors = self.get_response_data(response)
             raise BadRequestError(response, errors)
 
         if response.status_code not in self.model._meta['valid_update_status']:
@@ -329,6 +892,8 @@ class ResourceEngine(object):
             obj = self.obj_from_response(response)
         except ValueError:
             obj = None
+        else:
+            self.write_through([(obj, response.content)], response)
 
         self.handle_response(response)
 
@@ -348,6 +913,9 @@ class ResourceEngine(object):
         )
 
         self.validate_create_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
+        self.delete_negative_lookup(resource_obj)
         return self.handle_create_response(response)
 
     def delete(self, resource_obj, **kwargs):
@@ -361,6 +929,8 @@ class ResourceEngine(object):
         response = self._request('DELETE', delete_url)
 
         self.validate_delete_response(response)
+        if self.model._meta['invalidate_on_write']:
+            self.invalidate_cache(resource_obj)
         self.handle_delete_response(response)
 
     def validate_create_response(self, response):
@@ -368,7 +938,7 @@ class ResourceEngine(object):
         self.validate_response(response)
 
         if response.status_code in self.model._meta['bad_request_status']:
-            errors = json.loads(to_unicode(response.content))
+            errors = self.get_response_data(response)
             raise BadRequestError(response, errors)
 
         if response.status_code not in self.model._meta['valid_create_status']:
@@ -391,6 +961,10 @@ class ResourceEngine(object):
             obj = self.obj_from_response(response)
         except ValueError:
             obj = None
+        else:
+            # the created object may only be known by a server-assigned id
+            self.delete_negative_lookup(obj)
+            self.write_through([(obj, response.content)], response)
 
         self.handle_response(response)
 
@@ -436,7 +1010,20 @@ class ResourceEngine(object):
         return obj_dict
 
     def get_serializer(self):
-        return JSONSerializer()
+        "The model's serializer, shared by all of its requests"
+        return self.model._meta['serializer']
+
+    def get_response_data(self, response):
+        """Deserialized content of ``response``, decoded only once per
+        response
+
+        :param response: a NapResponse, or any response-like object with
+            ``content``
+        """
+        if isinstance(response, NapResponse):
+            return response.get_data(self.get_serializer())
+
+        return self.deserialize(response.content)
 
     def validate_response(self, response):
         """
@@ -461,8 +1048,7 @@ class ResourceEngine(object):
         :param field_data: dict-like object with 'Field Name'->'New  Value'
         """
         obj = self.model()
-        serializer = self.get_serializer()
-        field_data = serializer.deserialize(to_unicode(response.content))
+        field_data = self.get_response_data(response)
         obj.update_fields(field_data)
         obj._full_url = response.url
 
@@ -481,6 +1067,44 @@ class ResourceEngine(object):
         )
         self.logger.debug("Trying to get cached response for %s" % cache_key)
         cached_response = self.cache.get(cache_key)
+        if isinstance(cached_response, VaryIndex):
+            cache_key = self.get_variant_cache_key(cache_key, cached_response, url)
+            cached_response = self.cache.get(cache_key)
+
+        cached_response = self.check_cached_response(cache_key, cached_response)
+        return self.check_cache_tags([cached_response])[0]
+
+    def get_many_from_cache(self, request_method, urls):
+        """Cached responses for each of ``urls`` (or None where there are
+        none), fetched from the cache backend in a single call
+        """
+        if request_method not in self.model._meta['cached_methods']:
+            return [None] * len(urls)
+
+        cache_keys = [
+            self.cache.get_cache_key(model=self.model, url=self.get_full_url(url))
+            for url in urls
+        ]
+        cached_responses = self.cache.get_many(cache_keys)
+
+        # responses varying on request headers take a second call
+        variant_keys = dict(
+            (cache_key, self.get_variant_cache_key(cache_key, cached_responses[cache_key], url))
+            for (cache_key, url) in zip(cache_keys, urls)
+            if isinstance(cached_responses.get(cache_key), VaryIndex)
+        )
+        if variant_keys:
+            variants = self.cache.get_many(list(variant_keys.values()))
+            for cache_key, variant_key in variant_keys.items():
+                cached_responses[cache_key] = variants.get(variant_key)
+
+        return self.check_cache_tags([
+            self.check_cached_response(cache_key, cached_responses.get(cache_key))
+            for cache_key in cache_keys
+        ])
+
+    def check_cached_response(self, cache_key, cached_response):
+        "Return ``cached_response`` if it can be used, or None"
         if cached_response:
             self.logger.debug("Got cached response for %s" % cache_key)
 
@@ -498,22 +1122,248 @@ class ResourceEngine(object):
                 return cached_response
 
     def cache_response(self, response):
-        if response.request_method not in self.model._meta['cached_methods']\
-                or not response.use_cache:
+        cache_key = self.prepare_cached_response(response)
+        if cache_key is None:
             return
 
-        cache_key = self.cache.get_cache_key(
-            model=self.model,
-            url=response.url,
-        )
-
         # Cache backends are meant to possibly store more than just
         # NapResponse objects, so if future features need to cache
         # anything else it's possible.
         # Thus, we pass response both as `value` and the response
         # object
+        self.stamp_cache_tags([response])
         self.cache.set(cache_key, response, response=response)
 
+    def cache_responses(self, responses):
+        """Cache several responses with a single cache backend call. Cached
+        responses aren't cached again by handle_response
+        """
+        to_cache = {}
+        for response in responses:
+            cache_key = self.prepare_cached_response(response)
+            if cache_key is not None:
+                to_cache[cache_key] = response
+
+        if not to_cache:
+            return
+
+        self.stamp_cache_tags(to_cache.values())
+        self.cache.set_many(to_cache)
+        for response in to_cache.values():
+            response.use_cache = False
+
+    def prepare_cached_response(self, response):
+        """Stamp ``response`` with its caching time and timeout, returning
+        its cache key, or None if it shouldn't be cached. Responses with a
+        Vary header get a key per variant, indexed under the url's key
+        """
+        if response.request_method not in self.model._meta['cached_methods']\
+                or not response.use_cache or not self.cache.is_cacheable(response):
+            return None
+
+        cache_key = self.cache.get_cache_key(
+            model=self.model,
+            url=response.url,
+        )
+        response.cached_at = time.time()
+        response.cache_timeout = self.cache.get_timeout(response)
+
+        vary = self.cache.get_vary_headers(response)
+        if vary:
+            # the url's key points to the key of each variant
+            self.cache.set(
+                cache_key, VaryIndex(vary),
+                timeout=self.cache.get_storage_timeout(response),
+            )
+            cache_key = self.cache.get_variant_cache_key(
+                cache_key, vary, response.request_headers)
+
+        return cache_key
+
+    def get_variant_cache_key(self, cache_key, vary_index, url):
+        """Cache key of the variant listed by ``vary_index`` matching the
+        headers a request for ``url`` would be sent with, once modified by
+        the model's middleware
+        """
+        headers = self.prepare_request('GET', url).headers
+        return self.cache.get_variant_cache_key(cache_key, vary_index.vary, headers)
+
+    def write_through(self, objs_content, response):
+        """Cache ``(resource_obj, content)`` pairs as responses to lookups
+        of each object's canonical url (see ``ResourceModel.cache_key``), if
+        the model writes through its cache. Nothing is cached for a
+        ``response`` that was itself read from the cache
+        """
+        if not self.model._meta['write_through_cache'] or not response.use_cache:
+            return
+
+        headers = {}
+        cache_control = response.headers.get('cache-control')
+        if cache_control:
+            headers['cache-control'] = cache_control
+
+        lookup_responses = []
+        for resource_obj, content in objs_content:
+            try:
+                url = self.get_lookup_url(resource_obj)
+            except ValueError:
+                continue
+
+            lookup_responses.append(NapResponse(
+                content=content,
+                url=self.get_full_url(url),
+                status_code=self.model._meta['valid_get_status'][0],
+                headers=headers.copy(),
+                request_method='GET',
+            ))
+
+        self.cache_responses(lookup_responses)
+
+    def write_through_collection(self, obj_list, response):
+        """Cache each object dictionary of a collection ``response`` as
+        the response to a lookup of that object
+        """
+        if not self.model._meta['write_through_cache'] or not response.use_cache:
+            return
+
+        serializer = self.get_serializer()
+        self.write_through([
+            (self.model(**obj_dict), serializer.serialize(obj_dict))
+            for obj_dict in obj_list
+        ], response)
+
+    def delete_negative_lookup(self, resource_obj):
+        """Remove a cached negative response to a lookup of a newly
+        created ``resource_obj``, if the cache backend stores them
+        """
+        if self.cache.negative_timeout is None:
+            return
+
+        try:
+            url = self.get_lookup_url(resource_obj)
+        except ValueError:
+            return
+
+        self.cache.delete(self.cache.get_cache_key(model=self.model, url=self.get_full_url(url)))
+
+    # cache invalidation
+
+    def get_cache_tags(self, response):
+        """Tags of the cache entry for ``response``: its object's tag for
+        responses to a single object, otherwise the collection tag, so any
+        write to the model invalidates it
+        """
+        try:
+            data = self.get_response_data(response)
+        except ValueError:
+            return [COLLECTION_TAG]
+
+        collection_field = self.model._meta['collection_field']
+        if not isinstance(data, dict) or (collection_field and collection_field in data):
+            return [COLLECTION_TAG]
+
+        resource_id = self.get_resource_id_from_data(data)
+        if resource_id is None:
+            return [COLLECTION_TAG]
+
+        return [self.get_object_tag(resource_id)]
+
+    def get_object_tag(self, resource_id):
+        "Cache tag of the object with ``resource_id``"
+        return 'object:%s' % resource_id
+
+    def get_resource_id_from_data(self, data):
+        "Resource id found in an object's deserialized ``data``, or None"
+        field_name = self.model._meta['resource_id_field_name']
+        if not field_name:
+            return None
+
+        field = self.model._meta['fields'][field_name]
+        return data.get(field.api_name or field_name)
+
+    def get_tag_cache_key(self, tag):
+        return self.cache.get_cache_key(model=self.model, url='tag:%s' % tag)
+
+    def get_tag_versions(self, tags):
+        """Current version of each of ``tags`` that has one, fetched from
+        the cache backend in a single call
+        """
+        tag_keys = dict((self.get_tag_cache_key(tag), tag) for tag in tags)
+        if not tag_keys:
+            return {}
+
+        versions = self.cache.get_many(list(tag_keys))
+        return dict((tag_keys[key], version) for (key, version) in versions.items())
+
+    def set_new_tag_versions(self, tags):
+        "Give each of ``tags`` a new version, returning them"
+        versions = dict((tag, uuid.uuid4().hex) for tag in tags)
+        if versions:
+            self.cache.set_many(
+                dict((self.get_tag_cache_key(tag), version)
+                    for (tag, version) in versions.items()),
+                timeout=TAG_VERSION_TIMEOUT,
+            )
+
+        return versions
+
+    def stamp_cache_tags(self, responses):
+        """Record the current version of each of the cache tags of
+        ``responses``, if the model invalidates its cache on writes
+        """
+        if not self.model._meta['invalidate_on_write']:
+            return
+
+        tagged = [(response, self.get_cache_tags(response)) for response in responses]
+        tags = set()
+        for response, response_tags in tagged:
+            tags.update(response_tags)
+
+        versions = self.get_tag_versions(tags)
+        versions.update(self.set_new_tag_versions(tags - set(versions)))
+
+        for response, response_tags in tagged:
+            response.cache_tags = dict((tag, versions[tag]) for tag in response_tags)
+
+    def check_cache_tags(self, cached_responses):
+        """Replace each of ``cached_responses`` whose tags have changed
+        version since it was cached with None, if the model invalidates its
+        cache on writes
+        """
+        if not self.model._meta['invalidate_on_write']:
+            return cached_responses
+
+        tags = set()
+        for cached_response in cached_responses:
+            if cached_response is not None:
+                tags.update(getattr(cached_response, 'cache_tags', None) or ())
+
+        versions = self.get_tag_versions(tags)
+
+        def is_current(cached_response):
+            cache_tags = getattr(cached_response, 'cache_tags', None)
+            if not cache_tags:
+                # cached before invalidation was turned on
+                return False
+
+            return all(versions.get(tag) == version for (tag, version) in cache_tags.items())
+
+        return [
+            cached_response if cached_response is not None and is_current(cached_response) else None
+            for cached_response in cached_responses
+        ]
+
+    def invalidate_cache(self, resource_obj=None):
+        """Invalidate the model's cached collection responses and, if
+        given, ``resource_obj``'s cached lookups, by giving their cache tags
+        new versions
+        """
+        tags = [COLLECTION_TAG]
+        if resource_obj is not None and resource_obj.resource_id is not None:
+            tags.append(self.get_object_tag(resource_obj.resource_id))
+
+        self.set_new_tag_versions(tags)
+
     @property
     def logger(self):
         return self.model._meta['logger']
@@ -553,6 +1403,10 @@ class ResourceEngine(object):
         except KeyError:
             raise ValueError("Nap requests require root_url to be defined")
 
+        # absolute urls, such as next page links, are used as is
+        if uri.startswith(('http://', 'https://')):
+            return uri
+
         full_url = "%s/%s" % (root_url.rstrip('/'), uri.lstrip('/'))
         return full_url
 
@@ -25,3 +25,11 @@ class BadRequestError(InvalidStatusError):
         self.response = response
         self.errors = errors
         super(InvalidStatusError, self).__init__(errors)
+
+
+class CircuitOpenError(Exception):
+
+    def __init__(self, key):
+        self.key = key
+        super(CircuitOpenError, self).__init__(
+            "Circuit for %s is open, not sending request" % key)
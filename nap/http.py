@@ -1,11 +1,25 @@
 from __future__ import unicode_literals
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from requests.adapters import HTTPAdapter
+from six.moves.http_cookiejar import DefaultCookiePolicy
+from six.moves.urllib.parse import urlsplit
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+# Marks a response whose content wasn't deserialized yet
+_NOT_DECODED = object()
 
 
 class NapResponse(object):
 
     def __init__(self, content, url, status_code,
-            use_cache=None, headers=None, request_method=None):
+            use_cache=None, headers=None, request_method=None,
+            raw_response=None):
         self.status_code = status_code
         self.content = content
         self.url = url
@@ -15,6 +29,98 @@ class NapResponse(object):
         self.headers = headers
         self.request_method = request_method
 
+        # Streamed responses keep the unread transport response instead of
+        # their content
+        self.raw_response = raw_response
+
+        self._data = _NOT_DECODED
+
+        # Set by the engine when the response is cached
+        self.cached_at = None
+        self.cache_timeout = None
+        # tag -> tag version the entry was cached under, see
+        # ResourceEngine.stamp_cache_tags
+        self.cache_tags = None
+        # seconds the request took, weighting early refreshes
+        self.fetch_duration = None
+        # headers of the request, to key responses varying on them. They are
+        # never stored, as they may hold credentials
+        self.request_headers = None
+        # whether the request carried credentials through its auth argument,
+        # which don't show in its headers
+        self.request_authorized = False
+
+    def get_data(self, serializer):
+        """Deserialize the content with ``serializer``. The result is kept, so
+        the content is only deserialized once however many times it's used.
+        It is shared by every caller and should not be modified.
+        """
+        if self._data is _NOT_DECODED:
+            self._data = serializer.deserialize(self.content)
+
+        return self._data
+
+    def __getstate__(self):
+        # decoded data and request headers aren't cached or copied with the
+        # response
+        state = self.__dict__.copy()
+        state.pop('_data', None)
+        state.pop('request_headers', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._data = _NOT_DECODED
+        self.request_headers = None
+
+    @property
+    def encoding(self):
+        return getattr(self.raw_response, 'encoding', None) or 'utf-8'
+
+    def iter_content(self, chunk_size=1):
+        "Iterate over the body in chunks, reading streamed responses lazily"
+        if self.raw_response is not None:
+            return self.raw_response.iter_content(chunk_size)
+
+        return iter([self.content])
+
+    def close(self):
+        "Release the connection of a streamed response"
+        if self.raw_response is not None:
+            self.raw_response.close()
+
+    @property
+    def etag(self):
+        return self.headers.get('etag')
+
+    @property
+    def last_modified(self):
+        return self.headers.get('last-modified')
+
+    @property
+    def has_validators(self):
+        "Whether a stale copy of this response can be conditionally revalidated"
+        return bool(self.etag or self.last_modified)
+
+    def is_stale(self, now=None):
+        """
+        Whether a cached response has outlived its cache timeout. Responses
+        that were never cached are never stale.
+        """
+        return self.stale_for(now) >= 0
+
+    def stale_for(self, now=None):
+        """
+        Seconds since a cached response went stale; negative while it is
+        still fresh. Responses that were never cached are always fresh.
+        """
+        if self.cached_at is None or self.cache_timeout is None:
+            return -1
+
+        if now is None:
+            now = time.time()
+        return now - self.cached_at - self.cache_timeout
+
     @property
     def use_cache(self):
         """
@@ -61,8 +167,14 @@ class NapRequest(object):
             raise ValueError("Invalid method")
         self._method = value
 
-    def send(self):
-        response = requests.request(self.method, self.url,
+    def send(self, session=None):
+        """Send the request through ``session``, or through a one-shot
+        ``requests.request`` call when no session is given
+        """
+        if session is None:
+            session = requests
+
+        response = session.request(self.method, self.url,
             data=self.data,
             headers=self.headers,
             auth=self.auth,
@@ -70,3 +182,106 @@ class NapRequest(object):
             **self.extra_kwargs)
 
         return response
+
+
+class SessionRegistry(object):
+
+    """
+    Hands out pooled ``requests.Session`` objects keyed by host, so every
+    model pointing at the same root_url reuses the same keep-alive
+    connections instead of opening a new one per request.
+    """
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, url, pool_connections, pool_maxsize, max_retries):
+        split_url = urlsplit(url)
+        host = "%s://%s" % (split_url.scheme, split_url.netloc)
+        return (host, pool_connections, pool_maxsize, max_retries)
+
+    def get_session(self, url, pool_connections=DEFAULT_POOL_CONNECTIONS,
+            pool_maxsize=DEFAULT_POOL_MAXSIZE, max_retries=0):
+        key = self.get_key(url, pool_connections, pool_maxsize, max_retries)
+
+        session = self._sessions.get(key)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self.create_session(
+                    pool_connections, pool_maxsize, max_retries)
+                self._sessions[key] = session
+
+        return session
+
+    def create_session(self, pool_connections, pool_maxsize, max_retries):
+        session = requests.Session()
+        # sessions are shared by every model and thread, so cookies set by
+        # one response must never be sent with another request
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        return session
+
+    def clear(self):
+        "Close and forget every pooled session"
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions = {}
+
+        for session in sessions:
+            session.close()
+
+
+session_registry = SessionRegistry()
+
+
+class ExecutorRegistry(object):
+
+    """
+    Hands out thread pools keyed by host, shared by every concurrent batch
+    of requests to that host, so together they never run more requests at
+    once than the pool has workers.
+    """
+
+    def __init__(self):
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, url, max_workers):
+        split_url = urlsplit(url)
+        host = "%s://%s" % (split_url.scheme, split_url.netloc)
+        return (host, max_workers)
+
+    def get_executor(self, url, max_workers):
+        key = self.get_key(url, max_workers)
+
+        with self._lock:
+            executor = self._executors.get(key)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers)
+                self._executors[key] = executor
+
+        return executor
+
+    def clear(self):
+        "Shut down and forget every thread pool"
+        with self._lock:
+            executors = list(self._executors.values())
+            self._executors = {}
+
+        for executor in executors:
+            executor.shutdown(wait=False)
+
+
+executor_registry = ExecutorRegistry()
@@ -0,0 +1,168 @@
+"""
+Pagination schemes followed by ResourceEngine.iter_filter
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+from requests.utils import parse_header_links
+from six.moves.urllib.parse import urljoin
+
+from .utils import get_url_params, set_url_params
+
+
+def get_path(data, path):
+    "Look up a dotted ``path`` (eg ``meta.next``) in nested dictionaries"
+    for key in path.split('.'):
+        if not hasattr(data, 'get'):
+            return None
+        data = data.get(key)
+
+    return data
+
+
+class BasePaginator(object):
+
+    """
+    Paginators decide which url to request first and, from each page's
+    response, which url to request next.
+    """
+
+    def get_first_url(self, url):
+        return url
+
+    def get_next_url(self, url, response, data, item_count):
+        """Return the url of the page after ``url``, or None if it was the
+        last page
+
+        :param url: url of the current page
+        :param response: NapResponse for the current page
+        :param data: deserialized content of the current page
+        :param item_count: number of items found on the current page
+        """
+        return None
+
+
+class NextURLPaginator(BasePaginator):
+
+    "Follows a next page url found in the response body, eg ``meta.next``"
+
+    def __init__(self, field='next'):
+        self.field = field
+
+    def get_next_url(self, url, response, data, item_count):
+        next_url = get_path(data, self.field)
+        if not next_url:
+            return None
+
+        return urljoin(response.url, next_url)
+
+
+class LinkHeaderPaginator(BasePaginator):
+
+    "Follows RFC 5988 ``Link`` headers, as used by the GitHub API"
+
+    def __init__(self, rel='next'):
+        self.rel = rel
+
+    def get_next_url(self, url, response, data, item_count):
+        link_header = response.headers.get('link')
+        if not link_header:
+            return None
+
+        for link in parse_header_links(link_header):
+            if link.get('rel') == self.rel and link.get('url'):
+                return urljoin(response.url, link['url'])
+
+        return None
+
+
+class OffsetPaginator(BasePaginator):
+
+    """
+    Walks ``limit``/``offset`` query parameters, stopping at the first page
+    holding less than ``limit`` items
+    """
+
+    def __init__(self, limit=20, limit_param='limit', offset_param='offset'):
+        self.limit = limit
+        self.limit_param = limit_param
+        self.offset_param = offset_param
+
+    def get_first_url(self, url):
+        params = get_url_params(url)
+        params.setdefault(self.limit_param, self.limit)
+        params.setdefault(self.offset_param, 0)
+        return set_url_params(url, params)
+
+    def get_page_url(self, url, index):
+        "Url of the ``index``\\ th page after the first page at ``url``"
+        params = get_url_params(url)
+        limit = int(params.get(self.limit_param, self.limit))
+        offset = int(params.get(self.offset_param, 0))
+        params[self.offset_param] = offset + index * limit
+        return set_url_params(url, params)
+
+    def is_last_page(self, url, item_count):
+        limit = int(get_url_params(url).get(self.limit_param, self.limit))
+        return item_count < limit or item_count == 0
+
+    def get_next_url(self, url, response, data, item_count):
+        if self.is_last_page(url, item_count):
+            return None
+        return self.get_page_url(url, 1)
+
+
+class PageNumberPaginator(BasePaginator):
+
+    """
+    Walks a page number query parameter, stopping at the first empty page or,
+    if ``page_size`` is given, the first page holding less than ``page_size``
+    items
+    """
+
+    def __init__(self, page_param='page', first_page=1, page_size=None):
+        self.page_param = page_param
+        self.first_page = first_page
+        self.page_size = page_size
+
+    def get_first_url(self, url):
+        params = get_url_params(url)
+        params.setdefault(self.page_param, self.first_page)
+        return set_url_params(url, params)
+
+    def get_page_url(self, url, index):
+        "Url of the ``index``\\ th page after the page at ``url``"
+        params = get_url_params(url)
+        page = int(params.get(self.page_param, self.first_page))
+        params[self.page_param] = page + index
+        return set_url_params(url, params)
+
+    def is_last_page(self, url, item_count):
+        if self.page_size is not None:
+            return item_count < self.page_size
+        return item_count == 0
+
+    def get_next_url(self, url, response, data, item_count):
+        if self.is_last_page(url, item_count):
+            return None
+        return self.get_page_url(url, 1)
+
+
+class CursorPaginator(BasePaginator):
+
+    """
+    Sends the cursor found in the response body (eg ``meta.next_cursor``) as
+    a query parameter to get the next page
+    """
+
+    def __init__(self, cursor_field='next_cursor', cursor_param='cursor'):
+        self.cursor_field = cursor_field
+        self.cursor_param = cursor_param
+
+    def get_next_url(self, url, response, data, item_count):
+        cursor = get_path(data, self.cursor_field)
+        if not cursor:
+            return None
+
+        params = get_url_params(url)
+        params[self.cursor_param] = cursor
+        return set_url_params(url, params)
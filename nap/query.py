@@ -0,0 +1,176 @@
+"""
+Lazy, chainable collection queries returned by ResourceEngine.filter
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import itertools
+
+import six
+
+from .collection import ListWithAttributes
+
+
+class QuerySet(object):
+
+    """
+    A lazy collection request. Lookup variables accumulate across chained
+    ``filter()`` calls and no request is sent until the QuerySet is
+    evaluated by iterating, ``len()``, ``bool()``, indexing or accessing
+    ``extra_data``. Results are cached once evaluated.
+
+    Slicing an unevaluated QuerySet returns a new QuerySet limited with the
+    model's limit/offset parameters.
+    """
+
+    def __init__(self, engine, lookup_vars=None, skip_cache=True,
+            offset=None, limit=None):
+        self.engine = engine
+        self.lookup_vars = lookup_vars or {}
+        self.skip_cache = skip_cache
+        self.offset = offset
+        self.limit = limit
+        self._result_cache = None
+
+    def _clone(self, **kwargs):
+        clone_kwargs = {
+            'lookup_vars': self.lookup_vars.copy(),
+            'skip_cache': self.skip_cache,
+            'offset': self.offset,
+            'limit': self.limit,
+        }
+        clone_kwargs.update(kwargs)
+        return self.__class__(self.engine, **clone_kwargs)
+
+    def filter(self, skip_cache=None, **lookup_vars):
+        "Return a new QuerySet with ``lookup_vars`` added to this one's"
+        new_lookup_vars = self.lookup_vars.copy()
+        new_lookup_vars.update(lookup_vars)
+
+        if skip_cache is None:
+            skip_cache = self.skip_cache
+        return self._clone(lookup_vars=new_lookup_vars, skip_cache=skip_cache)
+
+    def all(self):
+        return self._clone()
+
+    def get_limit_params(self):
+        "Names of the model's limit and offset query parameters"
+        paginator = self.engine.model._meta['paginator']
+        limit_param = getattr(paginator, 'limit_param', 'limit')
+        offset_param = getattr(paginator, 'offset_param', 'offset')
+        return limit_param, offset_param
+
+    def get_lookup_vars(self):
+        lookup_vars = self.lookup_vars.copy()
+        limit_param, offset_param = self.get_limit_params()
+        if self.limit is not None:
+            lookup_vars[limit_param] = self.limit
+        if self.offset:
+            lookup_vars[offset_param] = self.offset
+
+        return lookup_vars
+
+    def _fetch_all(self):
+        if self._result_cache is None and self.limit == 0:
+            # APIs often read limit=0 as no limit, so don't ask
+            self._result_cache = ListWithAttributes([])
+
+        if self._result_cache is None:
+            results = self.engine.fetch_collection(
+                skip_cache=self.skip_cache, **self.get_lookup_vars())
+
+            # in case the API doesn't honor the limit parameter
+            if self.limit is not None and len(results) > self.limit:
+                results = ListWithAttributes(results[:self.limit], results.extra_data)
+
+            self._result_cache = results
+
+        return self._result_cache
+
+    @property
+    def extra_data(self):
+        return self._fetch_all().extra_data
+
+    def iterator(self, stream=False):
+        """Lazily iterate over every page of the collection using the model's
+        paginator, without caching results. Objects of sliced QuerySets are
+        skipped up to their offset, and no more pages are requested once
+        their limit is reached
+
+        :param stream: if true, decode pages incrementally while they are read
+        """
+        objs = self.engine.iter_filter(
+            skip_cache=self.skip_cache, stream=stream, **self.lookup_vars)
+        if self.offset is None and self.limit is None:
+            return objs
+
+        start = self.offset or 0
+        stop = start + self.limit if self.limit is not None else None
+        return itertools.islice(objs, start, stop)
+
+    def first(self):
+        "First object of the collection, or None. Requests a single object"
+        if self._result_cache is not None:
+            results = self._result_cache
+        else:
+            results = self[:1]._fetch_all()
+
+        return results[0] if results else None
+
+    def exists(self):
+        "Whether the collection has any objects. Requests a single object"
+        return self.first() is not None
+
+    def __getitem__(self, key):
+        if self._result_cache is not None:
+            return self._result_cache[key]
+
+        if isinstance(key, slice):
+            start, stop, step = key.start or 0, key.stop, key.step
+            if start < 0 or (stop is not None and stop < 0) or step not in (None, 1):
+                return self._fetch_all()[key]
+
+            offset = (self.offset or 0) + start
+            if stop is None:
+                limit = max(0, self.limit - start) if self.limit is not None else None
+            else:
+                limit = max(0, stop - start)
+                if self.limit is not None:
+                    limit = max(0, min(limit, self.limit - start))
+
+            return self._clone(offset=offset, limit=limit)
+
+        if not isinstance(key, six.integer_types):
+            raise TypeError("QuerySet indices must be integers or slices")
+
+        if key < 0:
+            return self._fetch_all()[key]
+
+        results = self[key:key + 1]._fetch_all()
+        if not results:
+            raise IndexError("QuerySet index out of range")
+        return results[0]
+
+    def __iter__(self):
+        return iter(self._fetch_all())
+
+    def __len__(self):
+        return len(self._fetch_all())
+
+    def __bool__(self):
+        return bool(self._fetch_all())
+    __nonzero__ = __bool__
+
+    def __eq__(self, other):
+        if isinstance(other, QuerySet):
+            other = other._fetch_all()
+        return list(self._fetch_all()) == list(other)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    # hashed by identity, as their results may not be fetched yet
+    __hash__ = object.__hash__
+
+    def __repr__(self):
+        return "<%s: %r>" % (self.__class__.__name__, list(self._fetch_all()))
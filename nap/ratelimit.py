@@ -0,0 +1,185 @@
+"""
+Client-side rate limiting, pacing requests to stay within an API's quota
+"""
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import contextlib
+import json
+import threading
+import time
+
+from six.moves.urllib.parse import urlsplit
+
+from .utils import parse_retry_after
+
+# X-RateLimit-Reset values above this are epoch timestamps rather than
+# seconds from now
+EPOCH_THRESHOLD = 10 ** 9
+
+
+class RateLimiter(object):
+
+    """
+    Token bucket limiting requests to ``rate`` per second (with bursts of up
+    to ``burst``), shared between threads. Limits are kept per host, or per
+    model when ``scope`` is ``'model'``.
+
+    The limiter also follows quota headers returned by the API: with
+    ``X-RateLimit-Remaining`` and ``X-RateLimit-Reset``, requests stop once
+    the quota is used up until it resets and, if ``pace`` is set, are spread
+    evenly over the remaining window. A ``Retry-After`` header pauses all
+    requests for the given time.
+    """
+
+    def __init__(self, rate=None, burst=None, scope='host', pace=True):
+        self.rate = rate
+        self.burst = burst if burst is not None else (rate or 1)
+        self.scope = scope
+        self.pace = pace
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, model, url):
+        if self.scope == 'model':
+            return model._meta['resource_name']
+
+        split_url = urlsplit(url)
+        return "%s://%s" % (split_url.scheme, split_url.netloc)
+
+    def call(self, key, send):
+        """Call ``send`` once the limit for ``key`` allows it, updating the
+        limit from the response's headers
+
+        :param key: limit to use, from get_key
+        :param send: callable sending a request and returning its response
+        """
+        self.acquire(key)
+        response = send()
+        self.update(key, response)
+        return response
+
+    def acquire(self, key):
+        "Block until a request for ``key`` is allowed"
+        while True:
+            delay = self.try_acquire(key)
+            if not delay:
+                return
+
+            self.sleep(delay)
+
+    def try_acquire(self, key):
+        """Take the limit for a request for ``key`` if it's allowed now.
+        Otherwise, return the number of seconds to wait before trying again
+        """
+        with self.locked_state(key) as state:
+            now = time.time()
+            ready_at = self.get_ready_at(state, now)
+            if ready_at <= now:
+                self.consume(state, now)
+                return 0
+
+        return ready_at - now
+
+    def get_ready_at(self, state, now):
+        ready_at = state.get('paused_until') or now
+
+        if self.rate:
+            tokens = self.get_tokens(state, now)
+            if tokens < 1:
+                ready_at = max(ready_at, now + (1 - tokens) / float(self.rate))
+
+        remaining = state.get('remaining')
+        reset_at = state.get('reset_at')
+        if remaining is not None and reset_at is not None and reset_at > now:
+            if remaining <= 0:
+                ready_at = max(ready_at, reset_at)
+            elif self.pace and state.get('last_at'):
+                interval = (reset_at - state['last_at']) / float(remaining + 1)
+                ready_at = max(ready_at, state['last_at'] + interval)
+
+        return ready_at
+
+    def get_tokens(self, state, now):
+        tokens = state.get('tokens', self.burst)
+        updated_at = state.get('updated_at', now)
+        return min(self.burst, tokens + (now - updated_at) * self.rate)
+
+    def consume(self, state, now):
+        if self.rate:
+            state['tokens'] = self.get_tokens(state, now) - 1
+            state['updated_at'] = now
+
+        if state.get('remaining') is not None:
+            state['remaining'] -= 1
+        state['last_at'] = now
+
+    def update(self, key, response):
+        "Update the limit for ``key`` from ``response``'s rate limit headers"
+        headers = getattr(response, 'headers', None) or {}
+        remaining = headers.get('x-ratelimit-remaining')
+        reset = headers.get('x-ratelimit-reset')
+        retry_after = parse_retry_after(headers.get('retry-after'))
+
+        if remaining is None and reset is None and retry_after is None:
+            return
+
+        with self.locked_state(key) as state:
+            now = time.time()
+            try:
+                if remaining is not None:
+                    state['remaining'] = int(remaining)
+                if reset is not None:
+                    reset = float(reset)
+                    state['reset_at'] = reset if reset > EPOCH_THRESHOLD else now + reset
+            except ValueError:
+                pass
+
+            if retry_after is not None:
+                state['paused_until'] = now + retry_after
+
+    @contextlib.contextmanager
+    def locked_state(self, key):
+        "Exclusive access to the mutable state dictionary for ``key``"
+        with self._lock:
+            yield self._states.setdefault(key, {})
+
+    def sleep(self, delay):
+        time.sleep(delay)
+
+
+class FileRateLimiter(RateLimiter):
+
+    """
+    RateLimiter whose state is kept in a JSON file guarded by an exclusive
+    file lock, so worker processes on the same host share one limit.
+    Requires ``fcntl`` (unix only).
+    """
+
+    def __init__(self, path, *args, **kwargs):
+        import fcntl
+        self._fcntl = fcntl
+        self.path = path
+        super(FileRateLimiter, self).__init__(*args, **kwargs)
+
+    @contextlib.contextmanager
+    def locked_state(self, key):
+        with self._lock:
+            with open(self.path, 'a+') as state_file:
+                self._fcntl.flock(state_file, self._fcntl.LOCK_EX)
+                try:
+                    state_file.seek(0)
+                    contents = state_file.read()
+                    try:
+                        states = json.loads(contents) if contents else {}
+                    except ValueError:
+                        states = {}
+
+                    state = states.setdefault(key, {})
+                    yield state
+
+                    state_file.seek(0)
+                    state_file.truncate()
+                    state_file.write(json.dumps(states))
+                    state_file.flush()
+                finally:
+                    self._fcntl.flock(state_file, self._fcntl.LOCK_UN)
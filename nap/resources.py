@@ -53,6 +53,8 @@ class DataModelMetaClass(type):
         setattr(model_cls, '_meta', _meta)
 
         setattr(model_cls, 'objects', _meta['engine_class'](model_cls))
+        if _meta['async_engine_class']:
+            setattr(model_cls, 'aobjects', _meta['async_engine_class'](model_cls))
         return model_cls
 
 @six.add_metaclass(DataModelMetaClass)
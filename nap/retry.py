@@ -0,0 +1,128 @@
+"""
+Retrying of failed requests
+"""
+from __future__ import unicode_literals
+import random
+import threading
+import time
+
+import requests
+
+from .utils import parse_retry_after
+
+
+class RetryBudget(object):
+
+    """
+    Token bucket capping retries to a fraction of requests made. Every
+    request deposits ``ratio`` tokens and every retry withdraws one, so during
+    an outage retries can add at most ``ratio`` extra load (plus a small
+    ``reserve`` of retries available up front).
+    """
+
+    def __init__(self, ratio=0.1, reserve=10, max_tokens=100):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = float(reserve)
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self):
+        "Take a token for a retry. Returns False if the budget is exhausted"
+        with self._lock:
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class RetryPolicy(object):
+
+    """
+    Retries transient failures with decorrelated jitter backoff.
+
+    Responses with a status in ``statuses`` and ``exceptions`` raised while
+    sending are retried for idempotent methods. Non-idempotent methods are
+    only retried when the connection could not be established, as the API
+    can't have acted on them. A ``Retry-After`` header overrides the backoff
+    delay.
+    """
+
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+
+    def __init__(self, max_retries=3, base_delay=0.1, max_delay=10,
+            statuses=(429, 502, 503, 504),
+            exceptions=(requests.ConnectionError, requests.Timeout),
+            idempotent_methods=IDEMPOTENT_METHODS, respect_retry_after=True,
+            budget=None):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.statuses = statuses
+        self.exceptions = exceptions
+        self.idempotent_methods = idempotent_methods
+        self.respect_retry_after = respect_retry_after
+        self.budget = budget if budget is not None else RetryBudget()
+
+    def call(self, method, send):
+        """Call ``send`` until it succeeds, isn't retryable, or retries (or
+        the retry budget) run out.
+
+        :param method: HTTP method of the request being sent
+        :param send: callable sending the request and returning its response
+        """
+        self.budget.deposit()
+
+        attempt = 0
+        delay = self.base_delay
+        while True:
+            try:
+                response = send()
+            except self.exceptions as e:
+                if not self.should_retry(attempt, self.is_retryable_exception(method, e)):
+                    raise
+                response = None
+            else:
+                if not self.should_retry(attempt, self.is_retryable_response(method, response)):
+                    return response
+
+            attempt += 1
+            delay = self.get_delay(delay, response)
+            self.sleep(delay)
+
+    def should_retry(self, attempt, retryable):
+        return retryable and attempt < self.max_retries and self.budget.withdraw()
+
+    def is_retryable_response(self, method, response):
+        return method.upper() in self.idempotent_methods \
+            and response.status_code in self.statuses
+
+    def is_retryable_exception(self, method, exc):
+        if method.upper() in self.idempotent_methods:
+            return True
+
+        return isinstance(exc, requests.ConnectTimeout)
+
+    def get_delay(self, previous_delay, response=None):
+        """Decorrelated jitter: a random delay between base_delay and three
+        times the previous delay, capped at max_delay. Retry-After wins when
+        present.
+        """
+        if response is not None and self.respect_retry_after:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None:
+                return min(self.max_delay, retry_after)
+
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+    def get_retry_after(self, response):
+        "Seconds to wait according to a Retry-After header, or None"
+        headers = getattr(response, 'headers', None) or {}
+        return parse_retry_after(headers.get('retry-after'))
+
+    def sleep(self, delay):
+        time.sleep(delay)
@@ -1,9 +1,24 @@
 from __future__ import unicode_literals
 import json
+import sys
+
+import six
+
+from .utils import to_unicode
+
+# json.loads detects the encoding of bytes itself from python 3.6
+JSON_LOADS_BYTES = six.PY2 or sys.version_info >= (3, 6)
 
 
 class BaseSerializer(object):
 
+    """
+    Serializers turn dictionaries into request bodies and response content
+    back into dictionaries. ``deserialize`` is given the raw response
+    content, as bytes, and ``serialize`` may return bytes or text, so fast
+    serializers can skip decoding and encoding copies.
+    """
+
     def serialize(self, val_dict):
         raise NotImplementedError
 
@@ -11,7 +26,7 @@ class BaseSerializer(object):
         raise NotImplementedError
 
 
-class JSONSerializer(object):
+class JSONSerializer(BaseSerializer):
 
     def serialize(self, val_dict):
 
@@ -19,4 +34,72 @@ class JSONSerializer(object):
 
     def deserialize(self, val_str):
 
+        if isinstance(val_str, bytes) and not JSON_LOADS_BYTES:
+            val_str = to_unicode(val_str)
         return json.loads(val_str)
+
+
+class OrjsonSerializer(BaseSerializer):
+
+    "JSON serializer using orjson, working on bytes directly"
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+
+    def serialize(self, val_dict):
+        return self._orjson.dumps(val_dict)
+
+    def deserialize(self, val_str):
+        return self._orjson.loads(val_str)
+
+
+class UjsonSerializer(BaseSerializer):
+
+    "JSON serializer using ujson"
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def serialize(self, val_dict):
+        return self._ujson.dumps(val_dict)
+
+    def deserialize(self, val_str):
+        return self._ujson.loads(val_str)
+
+
+class MsgspecSerializer(BaseSerializer):
+
+    "JSON serializer using msgspec, working on bytes directly"
+
+    def __init__(self):
+        import msgspec
+        self._decode_error = msgspec.DecodeError
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def serialize(self, val_dict):
+        return self._encoder.encode(val_dict)
+
+    def deserialize(self, val_str):
+        # invalid content raises ValueError, as with the other serializers,
+        # whichever exception msgspec raises
+        try:
+            return self._decoder.decode(val_str)
+        except self._decode_error as e:
+            raise ValueError(str(e))
+
+
+def get_fastest_json_serializer_class():
+    """Return the fastest JSON serializer class whose library is installed,
+    falling back to the standard library's JSONSerializer
+    """
+    for serializer_class in (OrjsonSerializer, MsgspecSerializer, UjsonSerializer):
+        try:
+            serializer_class()
+        except ImportError:
+            continue
+        return serializer_class
+
+    return JSONSerializer
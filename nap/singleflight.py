@@ -0,0 +1,71 @@
+"""
+Collapsing of concurrent, identical calls into a single call
+"""
+from __future__ import unicode_literals
+import sys
+import threading
+
+import six
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.exc_info = None
+
+
+class SingleFlight(object):
+
+    """
+    Runs at most one call per key at a time. Callers arriving while a call
+    for their key is in flight wait for it and share its result (or
+    exception) instead of making their own call.
+
+    ``calls`` counts calls actually made and ``collapsed`` counts calls that
+    were served by another caller's in-flight call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.calls = 0
+        self.collapsed = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is None:
+                call = _Call()
+                self._in_flight[key] = call
+                self.calls += 1
+                is_leader = True
+            else:
+                self.collapsed += 1
+                is_leader = False
+
+        if not is_leader:
+            call.event.wait()
+            if call.exc_info:
+                six.reraise(*call.exc_info)
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+        except Exception:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.event.set()
+
+        return call.result
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'collapsed': self.collapsed,
+            'in_flight': len(self._in_flight),
+        }
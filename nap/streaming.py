@@ -0,0 +1,153 @@
+"""
+Incremental decoding of large JSON collection responses
+"""
+from __future__ import unicode_literals
+import codecs
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+DELIMITERS = WHITESPACE + ',]}'
+
+
+class JSONArrayStream(object):
+
+    """
+    Iterates over the items of a JSON array while its document is still
+    being read, so only one item (plus one chunk of text) is held in memory
+    at a time.
+
+    The array is either the whole document or, given ``collection_field``,
+    the value of that key in a top level object. The object's other keys are
+    decoded into ``extra_data``, which is complete once iteration finishes.
+    Malformed documents raise ValueError.
+
+    :param chunks: iterable of byte (or text) chunks of the document
+    :param collection_field: key of the array in a top level object
+    :param encoding: encoding of byte chunks
+    """
+
+    def __init__(self, chunks, collection_field=None, encoding='utf-8'):
+        self.chunks = iter(chunks)
+        self.collection_field = collection_field
+        self.extra_data = {}
+
+        self._text_decoder = codecs.getincrementaldecoder(encoding)()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._exhausted = False
+
+    def __iter__(self):
+        if self.expect('[{') == '[':
+            for item in self.iter_array():
+                yield item
+        else:
+            for item in self.iter_object():
+                yield item
+
+        if self.next_char():
+            raise ValueError("Extra data after the end of the JSON document")
+
+    def iter_array(self):
+        "Yield the items of an array whose opening bracket was consumed"
+        if self.next_char() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self.decode_value()
+            if self.expect(',]') == ']':
+                return
+
+    def iter_object(self):
+        """Yield the items of the array under ``collection_field`` in an
+        object whose opening brace was consumed, decoding its other keys into
+        ``extra_data``
+        """
+        found = False
+        if self.next_char() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self.decode_value()
+                self.expect(':')
+
+                if key == self.collection_field and not found:
+                    found = True
+                    self.expect('[')
+                    for item in self.iter_array():
+                        yield item
+                else:
+                    self.extra_data[key] = self.decode_value()
+
+                if self.expect(',}') == '}':
+                    break
+
+        if not found:
+            raise ValueError("No %r array found in JSON object" % self.collection_field)
+
+    def read(self):
+        "Append the next chunk to the buffer. Returns False once exhausted"
+        if self._exhausted:
+            return False
+
+        # drop already parsed text
+        self._buffer = self._buffer[self._pos:]
+        self._pos = 0
+
+        try:
+            chunk = next(self.chunks)
+        except StopIteration:
+            self._exhausted = True
+            self._buffer += self._text_decoder.decode(b'', final=True)
+            return False
+
+        if isinstance(chunk, bytes):
+            chunk = self._text_decoder.decode(chunk)
+        self._buffer += chunk
+        return True
+
+    def next_char(self):
+        "Skip whitespace and return the next character, or '' at the end"
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in WHITESPACE:
+                self._pos += 1
+
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self.read():
+                return ''
+
+    def expect(self, chars):
+        "Consume and return the next character, which must be one of ``chars``"
+        char = self.next_char()
+        if not char or char not in chars:
+            raise ValueError("Expected one of %r in JSON document, got %r" % (
+                chars, char or 'end of document'))
+
+        self._pos += 1
+        return char
+
+    def decode_value(self):
+        "Decode the complete JSON value starting at the next character"
+        self.next_char()
+        while True:
+            try:
+                value, end = self._json_decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self.read():
+                    raise
+                continue
+
+            # a number is only complete once followed by a delimiter, as it
+            # may go on in the next chunk
+            if end == len(self._buffer) or (
+                    self._buffer[self._pos] not in '{["'
+                    and self._buffer[end] not in DELIMITERS):
+                if self.read():
+                    continue
+
+            self._pos = end
+            return value
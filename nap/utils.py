@@ -1,8 +1,10 @@
 from __future__ import unicode_literals
 import itertools
+import time
+from email.utils import parsedate_tz, mktime_tz
 from operator import itemgetter
 import six
-from six.moves.urllib.parse import urlencode
+from six.moves.urllib.parse import urlencode, urlsplit, parse_qsl
 
 
 def handle_slash(url, add_slash=None):
@@ -59,6 +61,26 @@ def make_url(base_url, params=None, add_slash=None):
     return base_url
 
 
+def get_url_params(url):
+    """Query parameters of ``url`` as a dictionary. Parameters given more
+    than once map to a list of their values
+    """
+    params = {}
+    for key, value in parse_qsl(urlsplit(url).query, keep_blank_values=True):
+        params.setdefault(key, []).append(value)
+
+    return dict([
+        (key, values[0] if len(values) == 1 else values)
+        for (key, values) in params.items()
+    ])
+
+
+def set_url_params(url, params):
+    "Replace the query string of ``url`` with ``params``"
+    base_url = url.split('?')[0]
+    return make_url(base_url, params=params)
+
+
 __text_fn = str if six.PY3 else unicode
 
 
@@ -77,3 +99,19 @@ def to_unicode(s):
     # non-string types
     else:
         return __text_fn(s)
+
+
+def parse_retry_after(value):
+    "Seconds to wait according to a Retry-After header value, or None"
+    if not value:
+        return None
+
+    try:
+        return max(0, int(value))
+    except ValueError:
+        pass
+
+    retry_date = parsedate_tz(value)
+    if retry_date is None:
+        return None
+    return max(0, mktime_tz(retry_date) - time.time())
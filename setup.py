@@ -22,10 +22,12 @@ setup(
         'mock',
         'Django>=1.8.18',
         'Flask>=0.11.1',
-        'Flask-Caching>=1.2.0'
+        'Flask-Caching>=1.2.0',
+        'httpx',
     ],
     install_requires=[
-        'requests>=1.2.3', 'six'
+        'requests>=1.2.3', 'six',
+        'futures; python_version < "3"',
     ],
     classifiers=[
         'Environment :: Web Environment',
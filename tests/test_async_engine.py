@@ -0,0 +1,329 @@
+from __future__ import unicode_literals
+from __future__ import absolute_import
+import asyncio
+import json
+
+import httpx
+import mock
+import pytest
+
+import nap
+from nap.cache.memory import LocalMemoryCacheBackend
+from nap.async_engine import AsyncResourceEngine, AsyncClientRegistry
+from nap.circuitbreaker import CircuitBreaker
+from nap.exceptions import CircuitOpenError, InvalidStatusError
+from nap.http import NapResponse
+from nap.middleware import BaseMiddleware
+from nap.ratelimit import RateLimiter
+from nap.retry import RetryPolicy
+
+from . import InMemoryCache
+
+
+class AsyncNote(nap.ResourceModel):
+    title = nap.Field()
+    content = nap.Field()
+    slug = nap.Field(resource_id=True)
+
+    class Meta:
+        root_url = "http://foo.com/v1/"
+        resource_name = 'note'
+        async_engine_class = AsyncResourceEngine
+
+
+class AsyncHeaderMiddleware(BaseMiddleware):
+
+    async def ahandle_request(self, request):
+        request.headers['x-async'] = 'yes'
+        return request
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class BaseAsyncEngineTest(object):
+
+    def get_engine(self, handler):
+        engine = AsyncNote.aobjects
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        patcher = mock.patch.object(AsyncResourceEngine, 'get_client',
+            return_value=client)
+        patcher.start()
+        self.patchers = [patcher]
+        return engine
+
+    def teardown_method(self, method):
+        for patcher in getattr(self, 'patchers', []):
+            patcher.stop()
+
+
+class TestAsyncResourceEngine(BaseAsyncEngineTest):
+
+    def test_aobjects(self):
+        assert isinstance(AsyncNote.aobjects, AsyncResourceEngine)
+        assert not hasattr(nap.ResourceModel, 'aobjects')
+
+    def test_get(self):
+        def handler(request):
+            assert str(request.url) == 'http://foo.com/v1/note/slug/'
+            return httpx.Response(200, json={'title': 'hello', 'slug': 'slug'})
+
+        engine = self.get_engine(handler)
+        obj = run(engine.get(slug='slug'))
+
+        assert obj.title == 'hello'
+        assert obj.full_url == 'note/slug/'
+
+    def test_get_invalid_status(self):
+        engine = self.get_engine(lambda request: httpx.Response(404))
+
+        with pytest.raises(InvalidStatusError):
+            run(engine.get_from_uri('note/missing'))
+
+    def test_redirects_followed(self):
+        def handler(request):
+            if request.url.path == '/v1/note/old/':
+                return httpx.Response(301, headers={'location': 'http://foo.com/v1/note/new/'})
+            return httpx.Response(200, json={'title': 'moved', 'slug': 'new'})
+
+        engine = self.get_engine(handler)
+        assert run(engine.get_from_uri('note/old')).title == 'moved'
+
+        with pytest.raises(InvalidStatusError):
+            run(engine.get_from_uri('note/old', allow_redirects=False))
+
+    def test_requests_only_arguments_rejected(self):
+        engine = self.get_engine(lambda request: httpx.Response(200, json={}))
+
+        with pytest.raises(ValueError) as excinfo:
+            run(engine.get_from_uri('note/a', verify=False, timeout=5))
+        assert 'verify' in str(excinfo.value)
+
+    def test_retry_policy(self):
+        responses = [
+            httpx.ConnectError("refused"),
+            httpx.Response(503),
+            httpx.Response(200, json={'title': 'hello'}),
+        ]
+
+        def handler(request):
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        engine = self.get_engine(handler)
+        policy = RetryPolicy(max_retries=2)
+        with mock.patch.dict(AsyncNote._meta, {'retry_policy': policy}), \
+                mock.patch('asyncio.sleep', mock.AsyncMock()) as sleep:
+            obj = run(engine.get_from_uri('note/slug', skip_cache=True))
+
+        assert obj.title == 'hello'
+        assert sleep.call_count == 2
+        assert not responses
+
+    def test_retry_policy_non_idempotent(self):
+        handler = mock.Mock(side_effect=httpx.ReadTimeout("timed out"))
+        engine = self.get_engine(handler)
+
+        policy = RetryPolicy(max_retries=2)
+        with mock.patch.dict(AsyncNote._meta, {'retry_policy': policy}), \
+                mock.patch('asyncio.sleep', mock.AsyncMock()):
+            with pytest.raises(httpx.ReadTimeout):
+                run(engine.create(AsyncNote(title='hello')))
+
+        assert handler.call_count == 1
+
+    def test_circuit_breaker(self):
+        handler = mock.Mock(return_value=httpx.Response(503))
+        engine = self.get_engine(handler)
+
+        breaker = CircuitBreaker(minimum_calls=2)
+        with mock.patch.dict(AsyncNote._meta, {'circuit_breaker': breaker}):
+            for i in range(2):
+                with pytest.raises(InvalidStatusError):
+                    run(engine.get_from_uri('note/slug', skip_cache=True))
+
+            with pytest.raises(CircuitOpenError):
+                run(engine.get_from_uri('note/slug', skip_cache=True))
+
+        assert handler.call_count == 2
+        assert breaker.get_state('http://foo.com/v1/')['state'] == 'open'
+
+    def test_cancelled_probe_released(self):
+        calls = []
+
+        async def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                await asyncio.sleep(1)
+            return httpx.Response(200, json={'title': 'hello'})
+
+        engine = self.get_engine(handler)
+        breaker = CircuitBreaker(minimum_calls=1, reset_timeout=0)
+        breaker.record('http://foo.com/v1/', failed=True)
+        assert breaker.get_state('http://foo.com/v1/')['state'] == 'open'
+
+        async def cancelled_probe():
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(
+                    engine.get_from_uri('note/slug', skip_cache=True), 0.01)
+
+        with mock.patch.dict(AsyncNote._meta, {'circuit_breaker': breaker}):
+            run(cancelled_probe())
+            state = breaker.get_state('http://foo.com/v1/')
+            assert (state['state'], breaker._circuits['http://foo.com/v1/'].probes) == ('half_open', 0)
+
+            # the next call probes the circuit again
+            assert run(engine.get_from_uri('note/slug', skip_cache=True)).title == 'hello'
+
+        assert breaker.get_state('http://foo.com/v1/')['state'] == 'closed'
+
+    def test_rate_limiter(self):
+        handler = mock.Mock(return_value=httpx.Response(200,
+            headers={'x-ratelimit-remaining': '0', 'x-ratelimit-reset': '30'},
+            json={'title': 'hello'}))
+        engine = self.get_engine(handler)
+
+        limiter = RateLimiter()
+        limiter.sleep = mock.Mock(side_effect=Exception("blocked the loop"))
+        with mock.patch.dict(AsyncNote._meta, {'rate_limiter': limiter}), \
+                mock.patch('asyncio.sleep', mock.AsyncMock()) as sleep:
+            run(engine.get_from_uri('note/slug', skip_cache=True))
+            assert not sleep.called
+
+            # the quota is used up until it resets
+            with mock.patch.object(limiter, 'try_acquire', side_effect=[29.5, 0]):
+                run(engine.get_from_uri('note/slug', skip_cache=True))
+
+        sleep.assert_called_once_with(29.5)
+        assert limiter.try_acquire('http://foo.com') > 29
+        assert handler.call_count == 2
+
+    def test_sync_only_methods(self):
+        engine = self.get_engine(mock.Mock(side_effect=Exception("no requests")))
+
+        with pytest.raises(TypeError):
+            list(engine.iter_filter())
+        with pytest.raises(TypeError):
+            engine.fetch_collection()
+
+    def test_filter(self):
+        def handler(request):
+            return httpx.Response(200, json=[{'title': 'a'}, {'title': 'b'}])
+
+        engine = self.get_engine(handler)
+        objs = run(engine.all())
+
+        assert [obj.title for obj in objs] == ['a', 'b']
+
+    def test_create(self):
+        def handler(request):
+            assert request.method == 'POST'
+            assert json.loads(request.content)['title'] == 'new'
+            return httpx.Response(201, json={'title': 'new', 'slug': 'new'})
+
+        engine = self.get_engine(handler)
+        obj = run(engine.create(AsyncNote(title='new')))
+
+        assert obj.slug == 'new'
+
+    def test_update_and_delete(self):
+        methods = []
+
+        def handler(request):
+            methods.append(request.method)
+            return httpx.Response(204)
+
+        engine = self.get_engine(handler)
+        obj = AsyncNote(title='a', slug='a')
+        run(engine.update(obj))
+        run(engine.delete(obj))
+
+        assert methods == ['PUT', 'DELETE']
+
+    def test_get_many(self):
+        def handler(request):
+            slug = request.url.path.split('/')[-2]
+            if slug == 'missing':
+                return httpx.Response(404)
+            return httpx.Response(200, json={'slug': slug})
+
+        engine = self.get_engine(handler)
+        results = run(engine.get_many(['a', 'missing', 'b'], max_workers=2))
+
+        assert results[0].slug == 'a'
+        assert isinstance(results[1], InvalidStatusError)
+        assert results[2].slug == 'b'
+
+    def test_async_middleware(self):
+        def handler(request):
+            assert request.headers['x-async'] == 'yes'
+            return httpx.Response(200, json={'title': 'hello'})
+
+        engine = self.get_engine(handler)
+        old_middleware = AsyncNote._meta['middleware']
+        AsyncNote._meta['middleware'] = (AsyncHeaderMiddleware(),)
+        try:
+            obj = run(engine.get_from_uri('note/slug'))
+        finally:
+            AsyncNote._meta['middleware'] = old_middleware
+
+        assert obj.title == 'hello'
+
+    def test_variants_keyed_on_middleware_headers(self):
+        def handler(request):
+            return httpx.Response(200,
+                headers={'cache-control': 'max-age=60', 'vary': 'X-Async'},
+                json={'title': request.headers.get('x-async', 'no')})
+
+        handler = mock.Mock(side_effect=handler)
+        engine = self.get_engine(handler)
+
+        cache = LocalMemoryCacheBackend()
+        with mock.patch.dict(AsyncNote._meta, {'cache_backend': cache}):
+            assert run(engine.get_from_uri('note/slug')).title == 'no'
+
+            with mock.patch.dict(AsyncNote._meta, {'middleware': [AsyncHeaderMiddleware()]}):
+                assert run(engine.get_from_uri('note/slug')).title == 'yes'
+                assert run(engine.get_from_uri('note/slug')).title == 'yes'
+
+        assert handler.call_count == 2
+
+    def test_cached_result(self):
+        engine = self.get_engine(mock.Mock(side_effect=Exception("no requests")))
+        cached_response = NapResponse(
+            content=json.dumps({'title': 'cached'}),
+            url='http://foo.com/v1/note/slug/',
+            status_code=200,
+            request_method='GET',
+        )
+
+        cache = InMemoryCache()
+        cache.aget = mock.AsyncMock(return_value=cached_response)
+        with mock.patch.dict(AsyncNote._meta, {'cache_backend': cache}):
+            obj = run(engine.get_from_uri('note/slug'))
+
+        assert obj.title == 'cached'
+        assert cache.aget.called
+
+
+class TestAsyncClientRegistry(object):
+
+    def test_clients_shared_per_loop_and_host(self):
+        registry = AsyncClientRegistry()
+
+        async def get_clients():
+            client = registry.get_client('http://foo.com/v1/', pool_maxsize=5)
+            same = registry.get_client('http://foo.com/v2/', pool_maxsize=5)
+            other = registry.get_client('http://bar.com/v1/', pool_maxsize=5)
+            await registry.aclose()
+            return client, same, other
+
+        client, same, other = run(get_clients())
+        assert client is same
+        assert client is not other
+        # like requests, requests never time out unless asked to
+        assert client.timeout == httpx.Timeout(None)
+        assert client.is_closed
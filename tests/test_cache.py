@@ -1,14 +1,23 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
 import mock
+import pickle
 import pytest
 import json
+import sqlite3
+import threading
 from flask import Flask
 import unittest
 
 from . import SampleResourceModel, SampleCacheableResource
 from nap.cache import django_cache, flask_cache
+from nap.cache.compression import get_codec
+from nap.cache.headers import parse_cache_control, parse_header_list, parse_http_date, parse_seconds
 from nap.cache.base import BaseCacheBackend, DEFAULT_TIMEOUT, MAX_CACHE_KEY_LENGTH
+from nap.cache.memory import LocalMemoryCacheBackend
+from nap.cache.sqlite import SQLiteCacheBackend
+from nap.cache.tiered import TieredCacheBackend
+from nap.http import NapResponse
 
 
 class TestBaseCacheBackend(object):
@@ -135,6 +144,218 @@ class TestBaseCacheBackend(object):
         timeout = cache_backend.get_timeout(mock_response)
         assert timeout == 42
 
+    def test_get_storage_timeout(self):
+        cache_backend = self.get_backend(default_timeout=42, revalidate_timeout=100)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200)
+        assert cache_backend.get_storage_timeout(response) == 42
+
+        response.headers['etag'] = '"abc"'
+        assert cache_backend.get_storage_timeout(response) == 142
+
+        response.headers['cache-control'] = 'max-age=10, stale-if-error=500'
+        assert cache_backend.get_storage_timeout(response) == 510
+
+    def test_get_timeout_from_cache_control(self):
+        cache_backend = self.get_backend(default_timeout=42)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200)
+
+        response.headers['cache-control'] = 'max-age=0'
+        assert cache_backend.get_timeout(response) == 0
+
+        response.headers['cache-control'] = 'public, s-maxage=100, max-age=10'
+        assert cache_backend.get_timeout(response) == 10
+        assert self.get_backend(shared=True).get_timeout(response) == 100
+
+        response.headers['cache-control'] = 'max-age=10, no-cache'
+        assert cache_backend.get_timeout(response) == 0
+
+        response.headers['cache-control'] = 'max-age=10'
+        response.headers['age'] = '4'
+        assert cache_backend.get_timeout(response) == 6
+
+        response.headers['age'] = '40'
+        assert cache_backend.get_timeout(response) == 0
+
+    def test_get_timeout_from_expires(self):
+        cache_backend = self.get_backend(default_timeout=42)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200, headers={
+            'date': 'Mon, 01 Jan 2018 00:00:00 GMT',
+            'expires': 'Mon, 01 Jan 2018 00:01:00 GMT',
+        })
+        response.cached_at = 1514764800
+        assert cache_backend.get_timeout(response) == 60
+
+        # received 20 seconds after it was sent
+        response.cached_at = 1514764820
+        assert cache_backend.get_timeout(response) == 40
+
+        response.headers['cache-control'] = 'max-age=300'
+        assert cache_backend.get_timeout(response) == 280
+
+        del response.headers['cache-control']
+        response.headers['expires'] = '0'
+        assert cache_backend.get_timeout(response) == 0
+
+    def test_is_cacheable(self):
+        cache_backend = self.get_backend()
+        shared_backend = self.get_backend(shared=True)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200)
+        assert cache_backend.is_cacheable(response)
+
+        response.headers['cache-control'] = 'private, max-age=60'
+        assert cache_backend.is_cacheable(response)
+        assert not shared_backend.is_cacheable(response)
+
+        response.headers['cache-control'] = 'max-age=60'
+        response.request_headers = {'Authorization': 'Token abc'}
+        assert cache_backend.is_cacheable(response)
+        assert not shared_backend.is_cacheable(response)
+        response.headers['cache-control'] = 'public, max-age=60'
+        assert shared_backend.is_cacheable(response)
+
+        # credentials given through the auth argument
+        response.request_headers = {}
+        response.request_authorized = True
+        assert shared_backend.is_cacheable(response)
+        response.headers['cache-control'] = 'max-age=60'
+        assert cache_backend.is_cacheable(response)
+        assert not shared_backend.is_cacheable(response)
+
+        response.headers['cache-control'] = 'no-store'
+        assert not cache_backend.is_cacheable(response)
+        assert self.get_backend(obey_cache_headers=False).is_cacheable(response)
+
+        response.headers['cache-control'] = 'max-age=60'
+        response.headers['vary'] = '*'
+        assert not cache_backend.is_cacheable(response)
+
+    def test_expired_values_not_stored(self):
+        backend = self.get_backend()
+        expired = NapResponse('', 'http://www.foo.com/bar/', 200,
+            headers={'cache-control': 'max-age=0'})
+
+        backend.set('key', expired, response=expired)
+        assert not backend.add('key', expired)
+        assert not backend.add('key', 'value', timeout=0)
+        backend.set_many({'key': expired})
+        assert backend.get('key') is None
+
+    def test_must_revalidate_disables_stale_windows(self):
+        cache_backend = self.get_backend(stale_while_revalidate=5, stale_if_error=6)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200, headers={
+            'cache-control': 'max-age=60, must-revalidate, stale-if-error=30',
+        })
+        assert cache_backend.get_stale_while_revalidate(response) == 0
+        assert cache_backend.get_stale_if_error(response) == 0
+
+        response.headers['cache-control'] = 'proxy-revalidate'
+        assert cache_backend.get_stale_if_error(response) == 6
+        assert self.get_backend(shared=True).get_stale_if_error(response) == 0
+
+    def test_get_variant_cache_key(self):
+        cache_backend = self.get_backend()
+        response = NapResponse('', 'http://www.foo.com/bar/', 200, headers={
+            'vary': 'Accept-Language, accept',
+        })
+        vary = cache_backend.get_vary_headers(response)
+        assert vary == ['accept-language', 'accept']
+
+        english = cache_backend.get_variant_cache_key('key', vary, {'Accept-Language': 'en'})
+        assert english.startswith('key::')
+        assert english == cache_backend.get_variant_cache_key(
+            'key', vary, {'accept-language': 'en', 'x-other': '1'})
+        assert english != cache_backend.get_variant_cache_key(
+            'key', vary, {'Accept-Language': 'fr'})
+
+        long_key = 'x' * MAX_CACHE_KEY_LENGTH
+        assert len(cache_backend.get_variant_cache_key(long_key, vary, {})) == 32
+
+    def test_should_refresh_early(self):
+        response = NapResponse('', 'http://www.foo.com/bar/', 200)
+        response.cached_at = 1000
+        response.cache_timeout = 60
+        response.fetch_duration = 2
+
+        cache_backend = self.get_backend()
+        assert not cache_backend.should_refresh_early(response, now=1059)
+
+        cache_backend = self.get_backend(early_refresh_beta=1)
+        with mock.patch('random.random') as random:
+            # -log(1 - 0.5) * 2 is about 1.4 seconds early
+            random.return_value = 0.5
+            assert not cache_backend.should_refresh_early(response, now=1058)
+            assert cache_backend.should_refresh_early(response, now=1059)
+
+            random.return_value = 0.999
+            assert cache_backend.should_refresh_early(response, now=1050)
+
+            response.fetch_duration = None
+            assert not cache_backend.should_refresh_early(response, now=1059)
+
+    def test_negative_timeouts(self):
+        cache_backend = self.get_backend(default_timeout=42, stale_if_error=100)
+        response = NapResponse('', 'http://www.foo.com/bar/', 404)
+        assert not cache_backend.is_negative_response(response)
+
+        cache_backend = self.get_backend(
+            default_timeout=42, stale_if_error=100, negative_timeout=5)
+        assert cache_backend.is_negative_response(response)
+        assert cache_backend.get_timeout(response) == 5
+        assert cache_backend.get_storage_timeout(response) == 5
+
+        response.headers['cache-control'] = 'max-age=10'
+        assert cache_backend.get_storage_timeout(response) == 10
+
+        response.status_code = 500
+        assert not cache_backend.is_negative_response(response)
+        assert cache_backend.get_timeout(response) == 10
+
+    def test_get_stale_timeouts(self):
+        cache_backend = self.get_backend(stale_while_revalidate=5, stale_if_error=6)
+        response = NapResponse('', 'http://www.foo.com/bar/', 200)
+        assert cache_backend.get_stale_while_revalidate(response) == 5
+        assert cache_backend.get_stale_if_error(response) == 6
+
+        response.headers['cache-control'] = \
+            'max-age=60, stale-while-revalidate=30, stale-if-error=86400'
+        assert cache_backend.get_stale_while_revalidate(response) == 30
+        assert cache_backend.get_stale_if_error(response) == 86400
+
+        cache_backend.obey_cache_headers = False
+        assert cache_backend.get_stale_while_revalidate(response) == 5
+
+
+    def test_compression(self):
+        backend = self.get_backend(compress_threshold=100)
+        content = json.dumps([{'title': 'title'}] * 50).encode('utf-8')
+        response = NapResponse(content, 'naprulez.org', 200)
+
+        stored = backend.encode_value(response)
+        assert stored.content_codec == 'zlib'
+        assert len(stored.content) < len(content)
+        assert response.content == content
+
+        decoded = backend.decode_value(stored)
+        assert decoded.content == content
+        assert not decoded.content_codec
+
+    def test_compression_skipped(self):
+        backend = self.get_backend(compress_threshold=100)
+        small = NapResponse(b'{}', 'naprulez.org', 200)
+        assert backend.encode_value(small) is small
+        assert backend.encode_value('value') == 'value'
+
+        uncompressed = self.get_backend()
+        response = NapResponse(b'x' * 1000, 'naprulez.org', 200)
+        assert uncompressed.encode_value(response) is response
+
+        # entries stored before compression was enabled stay readable
+        assert backend.decode_value(response) is response
+
+    def test_unknown_compression(self):
+        with pytest.raises(ValueError):
+            self.get_backend(compress_threshold=100, compression='rar')
+
 
 class TestDjangoCacheBackend(TestBaseCacheBackend):
 
@@ -166,6 +387,54 @@ class TestDjangoCacheBackend(TestBaseCacheBackend):
             backend.set(res, res.value)
             assert dj_cache_set.called
 
+            backend.set('key', 'value', timeout=5)
+            dj_cache_set.assert_called_with('key', 'value', 5)
+
+    def test_delete(self):
+        backend = self.get_backend()
+
+        with mock.patch('django.core.cache.cache.delete') as dj_cache_delete:
+            backend.delete('key')
+            dj_cache_delete.assert_called_with('key')
+
+    def test_add(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('django.core.cache.cache.add') as dj_cache_add:
+            dj_cache_add.return_value = False
+            assert backend.add('key', 'value') is False
+            dj_cache_add.assert_called_with('key', 'value', 10)
+
+            backend.add('key', 'value', timeout=5)
+            dj_cache_add.assert_called_with('key', 'value', 5)
+
+    def test_bulk_operations(self):
+        backend = self.get_backend(default_timeout=10)
+        cached = self.get_fake_response(
+            headers={'cache-control': 'max-age=20'}, has_validators=False)
+
+        with mock.patch('django.core.cache.cache.get_many') as dj_get_many:
+            dj_get_many.return_value = {'a': 1}
+            assert backend.get_many(['a', 'b']) == {'a': 1}
+            dj_get_many.assert_called_once_with(['a', 'b'])
+
+        with mock.patch('django.core.cache.cache.set_many') as dj_set_many:
+            backend.set_many({'a': 1, 'b': 2, 'c': cached})
+            dj_set_many.assert_any_call({'a': 1, 'b': 2}, 10)
+            dj_set_many.assert_any_call({'c': cached}, 20)
+            assert dj_set_many.call_count == 2
+
+        with mock.patch('django.core.cache.cache.set_many') as dj_set_many, \
+                mock.patch('django.core.cache.cache.set') as dj_set:
+            backend.set_many({'a': 1}, timeout=0)
+            backend.set('a', 1, timeout=0)
+            assert not dj_set_many.called
+            assert not dj_set.called
+
+        with mock.patch('django.core.cache.cache.delete_many') as dj_delete_many:
+            backend.delete_many(['a', 'b'])
+            dj_delete_many.assert_called_once_with(['a', 'b'])
+
 
 class TestFlaskCacheBackend(TestBaseCacheBackend):
 
@@ -202,6 +471,505 @@ class TestFlaskCacheBackend(TestBaseCacheBackend):
             backend.set(res, res.value)
             assert fl_cache_set.called
 
+    def test_delete(self):
+        backend = self.get_backend()
+
+        with mock.patch('flask_caching.Cache.delete') as fl_cache_delete:
+            backend.delete('key')
+            fl_cache_delete.assert_called_with('key')
+
+    def test_add(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('flask_caching.Cache.add') as fl_cache_add:
+            backend.add('key', 'value')
+            fl_cache_add.assert_called_with('key', 'value', 10)
+
+    def test_bulk_operations(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('flask_caching.Cache.get_many') as fl_get_many:
+            fl_get_many.return_value = [1, None]
+            assert backend.get_many(['a', 'b']) == {'a': 1}
+            fl_get_many.assert_called_once_with('a', 'b')
+
+        with mock.patch('flask_caching.Cache.set_many') as fl_set_many:
+            backend.set_many({'a': 1, 'b': 2})
+            fl_set_many.assert_called_once_with({'a': 1, 'b': 2}, 10)
+
+        # flask caches keep values with a timeout of 0 forever
+        with mock.patch('flask_caching.Cache.set_many') as fl_set_many, \
+                mock.patch('flask_caching.Cache.set') as fl_set:
+            backend.set_many({'a': 1}, timeout=0)
+            backend.set('a', 1, timeout=0)
+            assert not fl_set_many.called
+            assert not fl_set.called
+
+        with mock.patch('flask_caching.Cache.delete_many') as fl_delete_many:
+            backend.delete_many(['a', 'b'])
+            fl_delete_many.assert_called_once_with('a', 'b')
+
+
+class TestLocalMemoryCacheBackend(TestBaseCacheBackend):
+
+    def get_backend(self, **kwargs):
+        defaults = {
+            'default_timeout': DEFAULT_TIMEOUT,
+            'obey_cache_headers': True,
+        }
+        defaults.update(kwargs)
+        return LocalMemoryCacheBackend(**defaults)
+
+    def test_get_and_set(self):
+        backend = self.get_backend()
+        response = NapResponse('content', 'naprulez.org', 200)
+
+        assert backend.get('key') is None
+        backend.set('key', response, response=response)
+
+        cached = backend.get('key')
+        assert cached.content == 'content'
+        # every hit gets its own copy
+        assert cached is not response
+        assert backend.get('key') is not cached
+
+    def test_expiry(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set('key', 'value')
+
+            time.return_value = 1009
+            assert backend.get('key') == 'value'
+
+            time.return_value = 1010
+            assert backend.get('key') is None
+
+        assert backend.stats()['expirations'] == 1
+        assert backend.stats()['entries'] == 0
+
+    def test_storage_timeout(self):
+        backend = self.get_backend(default_timeout=10, stale_if_error=20)
+        response = self.get_fake_response()
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set('key', 'value', response=response)
+
+            time.return_value = 1025
+            assert backend.get('key') == 'value'
+
+    def test_lru_eviction_by_size(self):
+        value = 'x' * 100
+        entry_size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) + len('key1')
+        backend = self.get_backend(max_size=entry_size * 3)
+
+        for key in ('key1', 'key2', 'key3'):
+            backend.set(key, value)
+
+        backend.get('key1')
+        backend.set('key4', value)
+
+        assert backend.get('key2') is None
+        assert backend.get('key1') == value
+        assert backend.get('key3') == value
+        assert backend.get('key4') == value
+
+        stats = backend.stats()
+        assert stats['evictions'] == 1
+        assert stats['entries'] == 3
+        assert stats['size'] == entry_size * 3
+
+    def test_entry_larger_than_cache(self):
+        backend = self.get_backend(max_size=100)
+        backend.set('key', 'small')
+        backend.set('key', 'x' * 1000)
+
+        assert backend.get('key') is None
+        assert backend.stats()['size'] == 0
+
+    def test_compressed_storage(self):
+        backend = self.get_backend(compress_threshold=100)
+        content = json.dumps([{'title': 'title'}] * 500).encode('utf-8')
+        response = NapResponse(content, 'naprulez.org', 200)
+
+        backend.set('key', response, response=response)
+        assert backend.stats()['size'] < len(content)
+        assert backend.get('key').content == content
+
+    def test_add(self):
+        backend = self.get_backend()
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            assert backend.add('key', 'first', timeout=10)
+            assert not backend.add('key', 'second', timeout=10)
+            assert backend.get('key') == 'first'
+
+            time.return_value = 1010
+            assert backend.add('key', 'third', timeout=10)
+            assert backend.get('key') == 'third'
+
+    def test_delete_and_clear(self):
+        backend = self.get_backend()
+        backend.set('key1', 'value')
+        backend.set('key2', 'value')
+
+        backend.delete('key1')
+        backend.delete('missing')
+        assert backend.get('key1') is None
+        assert backend.get('key2') == 'value'
+
+        backend.clear()
+        assert backend.get('key2') is None
+        assert backend.stats()['size'] == 0
+
+    def test_bulk_operations(self):
+        backend = self.get_backend(default_timeout=10)
+        response = NapResponse('content', 'naprulez.org', 200,
+            headers={'cache-control': 'max-age=20'})
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set_many({'a': 1, 'b': 2, 'c': response})
+            assert backend.get_many(['a', 'b', 'd']) == {'a': 1, 'b': 2}
+
+            time.return_value = 1015
+            assert list(backend.get_many(['a', 'b', 'c'])) == ['c']
+
+        backend.delete_many(['c'])
+        assert backend.get_many(['c']) == {}
+
+    def test_stats(self):
+        backend = self.get_backend()
+        backend.set('key', 'value')
+        backend.get('key')
+        backend.get('missing')
+
+        stats = backend.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+
+    def test_thread_safety(self):
+        backend = self.get_backend(max_size=5000)
+
+        def worker(n):
+            for i in range(200):
+                backend.set('key%s' % (i % 50), 'value%s' % n)
+                backend.get('key%s' % ((i + n) % 50))
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = backend.stats()
+        assert stats['size'] <= 5000
+        assert stats['hits'] + stats['misses'] == 8 * 200
+
+
+class TestSQLiteCacheBackend(TestBaseCacheBackend):
+
+    @pytest.fixture(autouse=True)
+    def set_path(self, tmpdir):
+        self.path = str(tmpdir.join('cache.db'))
+
+    def get_backend(self, **kwargs):
+        defaults = {
+            'default_timeout': DEFAULT_TIMEOUT,
+            'obey_cache_headers': True,
+            'vacuum_interval': None,
+        }
+        defaults.update(kwargs)
+        return SQLiteCacheBackend(self.path, **defaults)
+
+    def test_get_and_set(self):
+        backend = self.get_backend()
+        response = NapResponse('content', 'naprulez.org', 200)
+
+        assert backend.get('key') is None
+        backend.set('key', response, response=response)
+        assert backend.get('key').content == 'content'
+
+        backend.set('key', 'replaced')
+        assert backend.get('key') == 'replaced'
+        assert backend.stats()['entries'] == 1
+
+    def test_add(self):
+        backend = self.get_backend()
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            assert backend.add('key', 'first', timeout=10)
+            assert not self.get_backend().add('key', 'second', timeout=10)
+            assert backend.get('key') == 'first'
+
+            time.return_value = 1010
+            assert backend.add('key', 'third', timeout=10)
+            assert backend.get('key') == 'third'
+            assert backend.stats()['entries'] == 1
+
+    def test_persistent_and_shared(self):
+        self.get_backend().set('key', 'value')
+
+        connection = sqlite3.connect(self.path)
+        assert connection.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+
+        # eg another worker, or the same one after a restart
+        assert self.get_backend().get('key') == 'value'
+
+    def test_expiry(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set('key', 'value')
+
+            time.return_value = 1009
+            assert backend.get('key') == 'value'
+
+            time.return_value = 1010
+            assert backend.get('key') is None
+
+    def test_lru_eviction_by_size(self):
+        value = 'x' * 100
+        entry_size = len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        backend = self.get_backend(max_size=entry_size * 3, default_timeout=3600)
+
+        with mock.patch('time.time') as time:
+            for now, key in enumerate(('key1', 'key2', 'key3')):
+                time.return_value = 1000 + now * 100
+                backend.set(key, value)
+
+            time.return_value = 1300
+            backend.get('key1')
+            backend.set('key4', value)
+
+            # evicted down to CULL_RATIO of max_size
+            assert backend.get_many(['key1', 'key2', 'key3', 'key4']) == {
+                'key1': value, 'key4': value}
+            assert backend.stats()['size'] == entry_size * 2
+
+    def test_bulk_operations(self):
+        backend = self.get_backend()
+        backend.set_many({'a': 1, 'b': 2, 'c': 3})
+
+        assert backend.get_many(['a', 'b', 'd']) == {'a': 1, 'b': 2}
+        backend.delete_many(['a', 'b'])
+        backend.delete('c')
+        assert backend.get_many(['a', 'b', 'c']) == {}
+
+        backend.set('a', 1)
+        backend.clear()
+        assert backend.stats()['size'] == 0
+
+    def test_vacuum(self):
+        backend = self.get_backend(default_timeout=10)
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set('old', 'value')
+            backend.set_many(dict(('big%s' % i, 'x' * 10000) for i in range(20)))
+            time.return_value = 1005
+            backend.set('new', 'value')
+
+            connection = backend.get_connection()
+            pages, = connection.execute("PRAGMA page_count").fetchone()
+
+            time.return_value = 1012
+            backend.vacuum()
+
+        assert backend.stats()['entries'] == 1
+        # every freed page is given back, not just one
+        assert connection.execute("PRAGMA freelist_count").fetchone() == (0,)
+        assert connection.execute("PRAGMA page_count").fetchone()[0] < pages / 2
+
+    def test_vacuum_thread(self):
+        with mock.patch('threading.Thread') as thread:
+            backend = self.get_backend(vacuum_interval=60)
+            backend.get('key')
+            assert thread.call_count == 1
+
+    def test_concurrent_access(self):
+        backends = [self.get_backend() for i in range(2)]
+        errors = []
+
+        def worker(n):
+            backend = backends[n % 2]
+            try:
+                for i in range(50):
+                    backend.set('key%s' % (i % 10), n)
+                    backend.get_many(['key%s' % i for i in range(10)])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        assert backends[0].stats()['entries'] == 10
+
+
+class TestCacheHeaders(object):
+
+    def test_parse_cache_control(self):
+        assert parse_cache_control(None) == {}
+        assert parse_cache_control(
+            'Public, max-age=60, no-cache="Set-Cookie", s-maxage = 10, max-age=5'
+        ) == {
+            'public': None,
+            'max-age': '60',
+            'no-cache': 'Set-Cookie',
+            's-maxage': '10',
+        }
+
+    def test_parse_seconds(self):
+        assert parse_seconds('10') == 10
+        assert parse_seconds('-1') is None
+        assert parse_seconds('soon') is None
+        assert parse_seconds(None) is None
+
+    def test_parse_http_date(self):
+        assert parse_http_date('Mon, 01 Jan 2018 00:00:00 GMT') == 1514764800
+        assert parse_http_date('0') is None
+        assert parse_http_date('') is None
+
+    def test_parse_header_list(self):
+        assert parse_header_list('Accept,  Accept-Language ,') == ['accept', 'accept-language']
+        assert parse_header_list(None) == []
+
+
+class TestCompressionCodecs(object):
+
+    @pytest.mark.parametrize('name, module', [
+        ('zlib', 'zlib'),
+        ('lz4', 'lz4.frame'),
+        ('zstd', 'zstandard'),
+    ])
+    def test_round_trip(self, name, module):
+        pytest.importorskip(module)
+        codec = get_codec(name)
+        data = b'nap' * 1000
+
+        assert codec.name == name
+        assert len(codec.compress(data)) < len(data)
+        assert codec.decompress(codec.compress(data)) == data
+        assert get_codec(name) is codec
+
+
+class TestTieredCacheBackend(object):
+
+    def get_backend(self, **kwargs):
+        self.l1 = LocalMemoryCacheBackend()
+        self.l2 = LocalMemoryCacheBackend(default_timeout=100, **kwargs)
+        return TieredCacheBackend(self.l1, self.l2, l1_timeout=10)
+
+    def get_response(self, cached_at=None):
+        response = NapResponse('content', 'naprulez.org', 200)
+        response.cached_at = cached_at
+        return response
+
+    def test_set_writes_both_tiers(self):
+        backend = self.get_backend()
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            backend.set('key', 'value', response=self.get_response(1000))
+
+            assert self.l1.get('key') == 'value'
+            assert self.l2.get('key') == 'value'
+
+            # l1 entries expire after l1_timeout, l2 ones after their timeout
+            time.return_value = 1010
+            assert self.l1.get('key') is None
+            assert backend.get('key') == 'value'
+
+    def test_l2_hits_populate_l1(self):
+        backend = self.get_backend()
+
+        with mock.patch('time.time') as time:
+            time.return_value = 1000
+            self.l2.set('key', self.get_response(1000), response=self.get_response())
+
+            assert backend.get('key').content == 'content'
+            assert backend.get('key').content == 'content'
+            assert backend.stats() == {'l1_hits': 1, 'l2_hits': 1, 'misses': 0}
+
+            # l1 keeps entries no longer than l2 does
+            time.return_value = 1095
+            self.l1.clear()
+            backend.get('key')
+            time.return_value = 1100
+            assert self.l1.get('key') is None
+
+    def test_bulk_operations(self):
+        backend = self.get_backend()
+        backend.set_many({'a': 1, 'b': 2})
+        self.l1.delete('b')
+        self.l2.set('c', 3)
+
+        assert backend.get_many(['a', 'b', 'c', 'd']) == {'a': 1, 'b': 2, 'c': 3}
+        assert backend.stats() == {'l1_hits': 1, 'l2_hits': 2, 'misses': 1}
+        assert self.l1.get('c') == 3
+
+        backend.delete_many(['a', 'c'])
+        assert backend.get_many(['a', 'c']) == {}
+        assert self.l2.get_many(['a', 'b', 'c']) == {'b': 2}
+
+    def test_miss(self):
+        backend = self.get_backend()
+        assert backend.get('key') is None
+        assert backend.stats()['misses'] == 1
+
+    def test_delete(self):
+        backend = self.get_backend()
+        backend.set('key', 'value')
+
+        backend.delete('key')
+        assert self.l1.get('key') is None
+        assert self.l2.get('key') is None
+
+    def test_settings_from_l2(self):
+        backend = self.get_backend(
+            stale_if_error=30, negative_timeout=5, early_refresh_beta=1,
+            rebuild_lock_timeout=10)
+        response = self.get_response()
+
+        assert backend.get_timeout(response) == 100
+        assert backend.get_stale_if_error(response) == 30
+        assert backend.get_storage_timeout(response) == 130
+        assert backend.get_cache_key(SampleResourceModel, 'url') == 'note::url'
+        assert backend.negative_timeout == 5
+        assert backend.early_refresh_beta == 1
+        assert backend.rebuild_lock_timeout == 10
+
+        # changes to l2 apply too
+        self.l2.negative_timeout = 7
+        assert backend.negative_timeout == 7
+
+    def test_cache_headers_from_l2(self):
+        backend = self.get_backend(shared=True)
+        response = self.get_response()
+        response.headers['cache-control'] = 'max-age=60, proxy-revalidate'
+
+        assert backend.shared
+        assert backend.must_revalidate(response)
+        assert backend.get_cache_control(response) == {'max-age': '60', 'proxy-revalidate': None}
+        assert not TieredCacheBackend(self.l1, LocalMemoryCacheBackend()).must_revalidate(response)
+
+    def test_add_only_uses_l2(self):
+        backend = self.get_backend()
+
+        assert backend.add('lock', 1, timeout=10)
+        assert not backend.add('lock', 1, timeout=10)
+        assert self.l2.get('lock') == 1
+        assert self.l1.get('lock') is None
+
 
 class TestCaching(unittest.TestCase):
     def setUp(self):
@@ -209,7 +977,7 @@ class TestCaching(unittest.TestCase):
         # NOTE: there is a single instance of the in memory (fake) cache for all instances of our model
         self.the_cache.clear()
 
-    @mock.patch('requests.request')
+    @mock.patch('requests.Session.request')
     def test_get_response_from_filter_is_cached(self, mock_request):
         """Test that filter() responses can be cached.
         NOTE: nap only supports GETs on filter() calls. Weird"""
@@ -217,6 +985,7 @@ class TestCaching(unittest.TestCase):
         # create mock request nap is going to issue and a mock response that nap will get back
         r = mock.Mock()
         r.status_code = 200
+        r.headers = {}
         r.content = json.dumps([
             {'title': 'hello1', 'content': 'content1'},
             {'title': 'hello2', 'content': 'content2'}
@@ -237,14 +1006,16 @@ class TestCaching(unittest.TestCase):
         mock_request.return_value = None
         mock_request.side_effect = Exception("We're making a network request when we should be using the cached data")
         obj = SampleCacheableResource.objects.filter(skip_cache=False)
+        assert len(obj) == 2
 
-    @mock.patch('requests.request')
+    @mock.patch('requests.Session.request')
     def test_get_response_from_lookup_is_cached(self, mock_request):
         """Test that lookup() responses can be cached."""
 
         # create mock request nap is going to issue and a mock response that nap will get back
         r = mock.Mock()
         r.status_code = 200
+        r.headers = {}
         r.content = json.dumps({'title': 'hello1', 'content': 'content1'})
         mock_request.return_value = r
 
@@ -0,0 +1,170 @@
+from __future__ import unicode_literals
+import json
+import time
+
+import mock
+import pytest
+import requests
+
+from nap.circuitbreaker import CircuitBreaker, CLOSED, OPEN, HALF_OPEN
+from nap.exceptions import CircuitOpenError
+from nap.http import NapResponse
+
+from . import SampleResourceModel
+
+KEY = 'http://foo.com/v1/'
+
+
+def fake_response(status_code=200, content=''):
+    r = mock.Mock()
+    r.status_code = status_code
+    r.headers = {}
+    r.content = content
+    return r
+
+
+def failing_send():
+    raise requests.ConnectionError()
+
+
+class TestCircuitBreaker(object):
+
+    def get_breaker(self, **kwargs):
+        defaults = {
+            'minimum_calls': 4,
+            'failure_threshold': 0.5,
+            'reset_timeout': 30,
+        }
+        defaults.update(kwargs)
+        return CircuitBreaker(**defaults)
+
+    def test_opens_on_failure_rate(self):
+        breaker = self.get_breaker()
+
+        breaker.call(KEY, fake_response)
+        breaker.call(KEY, fake_response)
+        breaker.call(KEY, lambda: fake_response(503))
+        assert breaker.get_state(KEY)['state'] == CLOSED
+
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(KEY, failing_send)
+        assert breaker.get_state(KEY)['state'] == OPEN
+
+        send = mock.Mock()
+        with pytest.raises(CircuitOpenError):
+            breaker.call(KEY, send)
+        assert not send.called
+
+        # other roots are unaffected
+        assert breaker.call('http://bar.com/', fake_response).status_code == 200
+
+    def test_slow_calls_count_as_failures(self):
+        breaker = self.get_breaker(minimum_calls=1, slow_call_duration=0.01)
+
+        def slow_send():
+            time.sleep(0.02)
+            return fake_response()
+
+        breaker.call(KEY, slow_send)
+        assert breaker.get_state(KEY)['state'] == OPEN
+
+    def test_sliding_window(self):
+        breaker = self.get_breaker(minimum_calls=2, window=10)
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=100):
+            breaker.call(KEY, lambda: fake_response(500))
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=200):
+            breaker.call(KEY, lambda: fake_response(500))
+            state = breaker.get_state(KEY)
+
+        assert state['state'] == CLOSED
+        assert state['calls'] == 1
+
+    def test_half_open(self):
+        breaker = self.get_breaker(minimum_calls=1, reset_timeout=10)
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=100):
+            breaker.call(KEY, lambda: fake_response(500))
+            assert breaker.get_state(KEY)['state'] == OPEN
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=111):
+            # failed probe re-opens the circuit
+            breaker.call(KEY, lambda: fake_response(500))
+            assert breaker.get_state(KEY)['state'] == OPEN
+            with pytest.raises(CircuitOpenError):
+                breaker.call(KEY, fake_response)
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=122):
+            breaker.before_call(KEY)
+            assert breaker.get_state(KEY)['state'] == HALF_OPEN
+            # only one probe at a time
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call(KEY)
+            breaker.record(KEY, failed=False)
+
+        assert breaker.get_state(KEY)['state'] == CLOSED
+
+    def test_interrupted_probe_released(self):
+        breaker = self.get_breaker(minimum_calls=1, reset_timeout=10)
+
+        def interrupted_send():
+            raise KeyboardInterrupt()
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=100):
+            breaker.call(KEY, lambda: fake_response(500))
+
+        with mock.patch('nap.circuitbreaker.time.time', return_value=111):
+            with pytest.raises(KeyboardInterrupt):
+                breaker.call(KEY, interrupted_send)
+            assert breaker.get_state(KEY)['state'] == HALF_OPEN
+
+            # the next call probes the circuit again
+            breaker.call(KEY, fake_response)
+
+        assert breaker.get_state(KEY)['state'] == CLOSED
+
+    def test_states_and_reset(self):
+        breaker = self.get_breaker(minimum_calls=1)
+        breaker.call(KEY, lambda: fake_response(500))
+
+        assert breaker.states()[KEY]['state'] == OPEN
+        breaker.reset(KEY)
+        assert breaker.states() == {}
+
+
+class TestEngineCircuitBreaker(object):
+
+    def test_open_circuit_fails_fast(self):
+        breaker = CircuitBreaker(minimum_calls=1)
+        with mock.patch.dict(SampleResourceModel._meta, {'circuit_breaker': breaker}):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = requests.ConnectionError()
+                with pytest.raises(requests.ConnectionError):
+                    SampleResourceModel.objects.get_from_uri('xyz', skip_cache=True)
+                with pytest.raises(CircuitOpenError):
+                    SampleResourceModel.objects.get_from_uri('xyz', skip_cache=True)
+
+            assert request.call_count == 1
+
+        assert breaker.get_state('http://foo.com/v1/')['state'] == OPEN
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_open_circuit_serves_stale(self, cache_get):
+        cached_response = NapResponse(
+            content=json.dumps({'title': 'cached'}),
+            url='http://foo.com/v1/xyz/',
+            status_code=200,
+            headers={'cache-control': 'max-age=60, stale-if-error=600'},
+            request_method='GET',
+        )
+        cached_response.cached_at = time.time() - 120
+        cached_response.cache_timeout = 60
+        cache_get.return_value = cached_response
+
+        breaker = CircuitBreaker(minimum_calls=1)
+        breaker.record('http://foo.com/v1/', failed=True)
+        with mock.patch.dict(SampleResourceModel._meta, {'circuit_breaker': breaker}):
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+        assert obj.title == 'cached'
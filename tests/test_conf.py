@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 from nap.conf import NapConfig, DEFAULT_CONFIG
 from nap.auth import BaseAuthorization
+from nap.serializers import JSONSerializer, OrjsonSerializer
 
 
 def test_config_defaults():
@@ -36,3 +37,10 @@ def test_auth_added_to_middleware():
     config = NapConfig(conf_dict)
 
     assert config['middleware'] == conf_dict['auth']
+
+
+def test_serializer_instance():
+    config = NapConfig(serializer_class=OrjsonSerializer)
+
+    assert isinstance(config['serializer'], OrjsonSerializer)
+    assert isinstance(NapConfig()['serializer'], JSONSerializer)
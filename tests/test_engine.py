@@ -1,18 +1,26 @@
 from __future__ import unicode_literals
 from __future__ import absolute_import
 import json
+import threading
+import time
 import unittest
 from collections import OrderedDict
 
 import pytest
 import mock
+import requests
 
 import nap
-from nap.http import NapResponse
+from nap.auth import HttpAuthorization
+from nap.cache.memory import LocalMemoryCacheBackend
+from nap.http import NapRequest, NapResponse, executor_registry
+from nap.singleflight import SingleFlight
 from nap.engine import ResourceEngine
 from nap.exceptions import InvalidStatusError, BadRequestError
+from nap.middleware import BaseMiddleware
 
-from . import SampleResourceModel
+from . import SampleResourceModel, AuthorModel
+from .utils import get_mock_response, fake_transport, request_count, patch_meta
 
 
 class BaseResourceModelTest(object):
@@ -21,17 +29,6 @@ class BaseResourceModelTest(object):
         engine = ResourceEngine(SampleResourceModel)
         return engine
 
-    def get_mock_response(self, **kwargs):
-
-        default_kwargs = {
-            'status_code': 200,
-            'content': '',
-        }
-        default_kwargs.update(kwargs)
-        r = mock.Mock(**default_kwargs)
-
-        return r
-
 
 class TestResourceModelURLMethods(BaseResourceModelTest):
 
@@ -108,7 +105,7 @@ class TestResourceEngineAccessMethods(BaseResourceModelTest):
             'title': "A fake title",
             'content': "isnt this neat",
         }
-        with mock.patch('requests.request') as get:
+        with mock.patch('requests.Session.request') as get:
             stubbed_response = mock.Mock()
             stubbed_response.content = json.dumps(fake_dict)
 
@@ -116,6 +113,7 @@ class TestResourceEngineAccessMethods(BaseResourceModelTest):
             expected_url = "xyz/"
             stubbed_response.url = expected_url
             stubbed_response.status_code = 200
+            stubbed_response.headers = {}
 
             get.return_value = stubbed_response
             obj = engine.get_from_uri('xyz', skip_cache=skip_cache)
@@ -147,6 +145,16 @@ class TestResourceEngineAccessMethods(BaseResourceModelTest):
 
         engine.model._meta['root_url'] = root_url
 
+    def test_get_session(self):
+        engine = self.get_engine()
+        session = engine.get_session()
+        assert session is not None
+        assert ResourceEngine(AuthorModel).get_session() is session
+
+        engine.model._meta['keep_alive'] = False
+        assert engine.get_session() is None
+        engine.model._meta['keep_alive'] = True
+
     def test_get(self):
 
         engine = self.get_engine()
@@ -209,13 +217,178 @@ class TestResourceEngineAccessMethods(BaseResourceModelTest):
         assert obj.title == res_dict['title']
         assert obj.content == res_dict['content']
 
+    def test_get_deserializes_once(self):
+        serializer = mock.Mock(wraps=SampleResourceModel._meta['serializer'])
+        with mock.patch.dict(SampleResourceModel._meta, {'serializer': serializer}):
+            with mock.patch('requests.Session.request') as request:
+                request.return_value = get_mock_response(
+                    content=json.dumps({'title': 'a title'}), headers={})
+                obj = SampleResourceModel.objects.get('xyz', skip_cache=True)
+
+        assert obj.title == 'a title'
+        assert serializer.deserialize.call_count == 1
+
+
+class TestGetMany(BaseResourceModelTest):
+
+    def respond(self, method, url, **kwargs):
+        slug = url.rstrip('/').split('/')[-1]
+        if slug == 'missing':
+            return 404, ''
+        return 200, json.dumps({'slug': slug})
+
+    def test_get_many(self):
+        engine = self.get_engine()
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            results = engine.get_many(
+                ['a', 'missing', {'hello': 'c', 'what': 'd'}], max_workers=2)
+
+        assert request.call_count == 3
+        assert results[0].slug == 'a'
+        assert results[0].full_url == 'note/a/'
+        assert isinstance(results[1], InvalidStatusError)
+        assert results[2].slug == 'd'
+        assert results[2].full_url == 'c/d/'
+
+    def test_get_many_shares_executor(self):
+        engine = self.get_engine()
+        executors = []
+
+        def get_executor(*args):
+            executors.append(executor_registry.get_executor(*args))
+            return executors[-1]
+
+        with mock.patch('requests.Session.request') as request, \
+                mock.patch('nap.engine.executor_registry') as registry:
+            request.side_effect = fake_transport(self.respond)
+            registry.get_executor.side_effect = get_executor
+            engine.get_many(['a', 'b'], skip_cache=True)
+            engine.get_many(['c'], skip_cache=True)
+
+        registry.get_executor.assert_called_with('http://foo.com/v1/', 10)
+        assert executors[0] is executors[1]
+
+    def test_get_many_invalid_lookup(self):
+        engine = self.get_engine()
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            results = engine.get_many([{'bad': 'lookup'}, 'a'])
+
+        assert isinstance(results[0], ValueError)
+        assert results[1].slug == 'a'
+
+    @mock.patch('nap.engine.ResourceEngine.get_many_from_cache')
+    def test_get_many_uses_cache(self, get_many_from_cache):
+        engine = self.get_engine()
+        get_many_from_cache.side_effect = lambda method, urls: [NapResponse(
+            content=json.dumps({'slug': 'cached'}),
+            url=url,
+            status_code=200,
+            use_cache=False,
+            request_method='GET',
+        ) if url == 'note/a/' else None for url in urls]
+
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            results = engine.get_many(['a', 'b'])
+
+        assert request.call_count == 1
+        assert results[0].slug == 'cached'
+        assert results[1].slug == 'b'
+
+        get_many_from_cache.reset_mock()
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get_many(['a', 'b'], skip_cache=True)
+
+        assert request.call_count == 2
+        assert not get_many_from_cache.called
+
+    def test_get_many_bulk_cache_calls(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend()
+        get_many = mock.patch.object(backend, 'get_many', wraps=backend.get_many)
+        set_many = mock.patch.object(backend, 'set_many', wraps=backend.set_many)
+
+        with mock.patch.dict(engine.model._meta, {'cache_backend': backend}), \
+                get_many as get_many, set_many as set_many, \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            results = engine.get_many(['a', 'b', 'missing'])
+
+            assert get_many.call_count == 1
+            assert set_many.call_count == 1
+            assert sorted(set_many.call_args[0][0]) == [
+                'note::http://foo.com/v1/note/a/', 'note::http://foo.com/v1/note/b/']
+
+            results = engine.get_many(['a', 'b'])
+
+        assert request.call_count == 3
+        assert [obj.slug for obj in results] == ['a', 'b']
+
+
+class TestSingleFlightRequests(BaseResourceModelTest):
+
+    def test_concurrent_gets_collapsed(self):
+        engine = self.get_engine()
+        group = SingleFlight()
+        release = threading.Event()
+
+        def slow_request(*args, **kwargs):
+            release.wait(1)
+            r = mock.Mock()
+            r.status_code = 200
+            r.headers = {}
+            r.content = json.dumps({'title': 'hello'})
+            return r
+
+        def get():
+            return engine.modify_request().get_from_uri('xyz', skip_cache=True)
+
+        with mock.patch.dict(engine.model._meta, {'single_flight': group}):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = slow_request
+                threads = [threading.Thread(target=get) for i in range(4)]
+                for thread in threads:
+                    thread.start()
+                time.sleep(0.1)
+                release.set()
+                for thread in threads:
+                    thread.join()
+
+        assert request.call_count == 1
+        assert group.collapsed == 3
+
+    def test_single_flight_key(self):
+        engine = self.get_engine()
+        request = NapRequest('GET', 'http://foo.com/v1/', headers={'a': '1'})
+        other_auth = NapRequest('GET', 'http://foo.com/v1/', headers={'a': '1'},
+            auth=('user', 'pass'))
+
+        assert engine.get_single_flight_key(request) == \
+            engine.get_single_flight_key(
+                NapRequest('GET', 'http://foo.com/v1/', headers={'a': '1'}))
+        assert engine.get_single_flight_key(request) != \
+            engine.get_single_flight_key(other_auth)
+
+    def test_writes_not_collapsed(self):
+        engine = self.get_engine()
+        group = SingleFlight()
+        with mock.patch.dict(engine.model._meta, {'single_flight': group}):
+            with mock.patch('requests.Session.request') as request:
+                request.return_value = get_mock_response(status_code=204)
+                engine._request('DELETE', 'xyz')
+
+        assert group.calls == 0
+
 
 class TestResourceCollectionMethods(BaseResourceModelTest):
 
     def test_collection_field(self):
 
         SampleResourceModel._meta['collection_field'] = 'objects'
-        with mock.patch('requests.request') as request:
+        with mock.patch('requests.Session.request') as request:
             r = mock.Mock()
             collection_dict = {
                 'meta': {'something': True},
@@ -229,12 +402,15 @@ class TestResourceCollectionMethods(BaseResourceModelTest):
             r.status_code = 200
             request.return_value = r
             objects = SampleResourceModel.objects.all()
+            assert not request.called
+            assert len(objects) == 3
             assert request.called
         assert len(objects) == 3
+        assert objects.extra_data == {'meta': {'something': True}}
         SampleResourceModel._meta['collection_field'] = None
 
     def test_filter(self):
-        with mock.patch('requests.request') as request:
+        with mock.patch('requests.Session.request') as request:
             r = mock.Mock()
             r.status_code = 200
             r.content = json.dumps([
@@ -248,7 +424,7 @@ class TestResourceCollectionMethods(BaseResourceModelTest):
             r.content = json.dumps({'something': 'wrong'})
             request.return_value = r
             with pytest.raises(ValueError):
-                SampleResourceModel.objects.filter(title='title')
+                list(SampleResourceModel.objects.filter(title='title'))
 
     def test_validate_collection_response(self):
         engine = self.get_engine()
@@ -260,7 +436,7 @@ class TestResourceCollectionMethods(BaseResourceModelTest):
 
 class TestCacheFunctions(object):
 
-    @mock.patch('requests.request')
+    @mock.patch('requests.Session.request')
     @mock.patch('nap.cache.base.BaseCacheBackend.get')
     def test_cached_result(self, *mocks):
 
@@ -343,7 +519,7 @@ class TestCacheFunctions(object):
 
         assert not cache_set.called
 
-    @mock.patch('requests.request')
+    @mock.patch('requests.Session.request')
     @mock.patch('nap.cache.base.BaseCacheBackend.get')
     def test_invalid_cache_result_found(self, mock_get, mock_request):
 
@@ -362,6 +538,615 @@ class TestCacheFunctions(object):
         assert mock_request.called
 
 
+class TestConditionalRevalidation(BaseResourceModelTest):
+
+    def get_cached_response(self, headers=None, cached_at=None):
+        response = NapResponse(
+            content=json.dumps({'title': 'cached'}),
+            url='http://foo.com/v1/xyz/',
+            status_code=200,
+            headers=headers or {},
+            request_method='GET',
+        )
+        response.cached_at = cached_at or time.time() - 3600
+        response.cache_timeout = 60
+        response.use_cache = False
+        return response
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.set')
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_not_modified_refreshes_cache(self, cache_get, cache_set):
+        cache_get.return_value = self.get_cached_response(headers={
+            'etag': '"abc"',
+            'last-modified': 'Mon, 01 Jan 2018 00:00:00 GMT',
+        })
+
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                status_code=304, headers={'etag': '"abc"', 'x-new': '1'})
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+            headers = request.call_args[1]['headers']
+            assert headers['If-None-Match'] == '"abc"'
+            assert headers['If-Modified-Since'] == 'Mon, 01 Jan 2018 00:00:00 GMT'
+            assert headers['content-type'] == 'application/json'
+
+        assert obj.title == 'cached'
+        refreshed = cache_set.call_args[0][1]
+        assert refreshed.status_code == 200
+        assert refreshed.headers['x-new'] == '1'
+        assert not refreshed.is_stale()
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_modified_response_used(self, cache_get):
+        cache_get.return_value = self.get_cached_response(headers={'etag': '"abc"'})
+
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={'etag': '"def"'},
+                content=json.dumps({'title': 'new'}),
+            )
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+        assert obj.title == 'new'
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_stale_without_validators_refetched(self, cache_get):
+        cache_get.return_value = self.get_cached_response()
+
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={}, content=json.dumps({'title': 'new'}))
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+            assert 'If-None-Match' not in request.call_args[1]['headers']
+
+        assert obj.title == 'new'
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_fresh_response_not_revalidated(self, cache_get):
+        cache_get.return_value = self.get_cached_response(
+            headers={'etag': '"abc"'}, cached_at=time.time())
+
+        with mock.patch('requests.Session.request') as request:
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+            assert not request.called
+
+        assert obj.title == 'cached'
+
+
+class TestStaleCachedResponses(TestConditionalRevalidation):
+
+    def get_cached_response(self, headers=None, cached_at=None):
+        # stale for 10 seconds
+        response = super(TestStaleCachedResponses, self).get_cached_response(
+            headers=headers, cached_at=cached_at or time.time() - 70)
+        return response
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.set')
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_stale_while_revalidate(self, cache_get, cache_set):
+        cache_get.return_value = self.get_cached_response(headers={
+            'cache-control': 'max-age=60, stale-while-revalidate=30',
+        })
+
+        engine = self.get_engine()
+        refresh_in_background = engine.refresh_in_background
+        threads = []
+
+        def refresh(*args, **kwargs):
+            threads.append(refresh_in_background(*args, **kwargs))
+
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={}, content=json.dumps({'title': 'new'}))
+            engine.refresh_in_background = refresh
+            obj = engine.get_from_uri('xyz')
+            threads[0].join()
+
+            assert request.called
+
+        assert obj.title == 'cached'
+        refreshed = cache_set.call_args[0][1]
+        assert refreshed.content == json.dumps({'title': 'new'})
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_background_refresh_runs_once(self, cache_get):
+        cached_response = self.get_cached_response()
+        engine = self.get_engine()
+        release = threading.Event()
+
+        with mock.patch.object(ResourceEngine, 'revalidate') as revalidate:
+            revalidate.side_effect = lambda *args, **kwargs: (
+                release.wait(1) and get_mock_response(status_code=500))
+            thread = engine.refresh_in_background('xyz/', cached_response)
+            assert engine.refresh_in_background('xyz/', cached_response) is None
+            release.set()
+            thread.join()
+
+            assert revalidate.call_count == 1
+            second = engine.refresh_in_background('xyz/', cached_response)
+            second.join()
+            assert revalidate.call_count == 2
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.should_refresh_early')
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_fresh_response_refreshed_early(self, cache_get, should_refresh_early):
+        cached_response = self.get_cached_response(cached_at=time.time())
+        cache_get.return_value = cached_response
+        engine = self.get_engine()
+
+        with mock.patch.object(engine, 'refresh_in_background') as refresh, \
+                mock.patch('requests.Session.request') as request:
+            should_refresh_early.return_value = False
+            engine.get_from_uri('xyz')
+            assert not refresh.called
+
+            should_refresh_early.return_value = True
+            obj = engine.get_from_uri('xyz')
+            refresh.assert_called_once_with('xyz/', cached_response)
+            assert not request.called
+
+        assert obj.title == 'cached'
+
+    def test_stale_response_served_while_locked(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend(rebuild_lock_timeout=10)
+
+        with mock.patch.dict(engine.model._meta, {'cache_backend': backend}), \
+                mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={}, content=json.dumps({'title': 'new'}))
+            cache_key = backend.get_cache_key(engine.model, engine.get_full_url('xyz/'))
+            backend.set(cache_key, self.get_cached_response(), timeout=3600)
+
+            # another process is refreshing the entry
+            assert engine.acquire_rebuild_lock('xyz/')
+            assert engine.get_from_uri('xyz').title == 'cached'
+            assert engine.refresh_in_background('xyz/', self.get_cached_response()) is None
+            assert not request.called
+
+            backend.clear()
+            backend.set(cache_key, self.get_cached_response(), timeout=3600)
+            assert engine.get_from_uri('xyz').title == 'new'
+            assert request.call_count == 1
+
+    def test_rebuild_lock_released(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend(rebuild_lock_timeout=10)
+
+        with mock.patch.dict(engine.model._meta, {'cache_backend': backend}), \
+                mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={'cache-control': 'max-age=0'}, content=json.dumps({'title': 'new'}))
+            cache_key = backend.get_cache_key(engine.model, engine.get_full_url('xyz/'))
+            backend.set(cache_key, self.get_cached_response(), timeout=3600)
+
+            assert engine.get_from_uri('xyz').title == 'new'
+            assert engine.acquire_rebuild_lock('xyz/')
+
+    def test_no_cache_never_served_while_locked(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend(rebuild_lock_timeout=10)
+
+        with mock.patch.dict(engine.model._meta, {'cache_backend': backend}), \
+                mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(
+                headers={'cache-control': 'no-cache', 'etag': '"abc"'},
+                content=json.dumps({'title': 'new'}))
+
+            for i in range(4):
+                assert engine.get_from_uri('xyz').title == 'new'
+
+            # even while another process holds the lock
+            assert engine.acquire_rebuild_lock('xyz/')
+            assert engine.get_from_uri('xyz').title == 'new'
+
+        assert request.call_count == 5
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_stale_if_error_on_exception(self, cache_get):
+        cache_get.return_value = self.get_cached_response(headers={
+            'cache-control': 'max-age=60, stale-if-error=30',
+        })
+
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = requests.Timeout()
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+        assert obj.title == 'cached'
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_stale_if_error_on_server_error(self, cache_get):
+        cache_get.return_value = self.get_cached_response(headers={
+            'cache-control': 'max-age=60, stale-if-error=30',
+        })
+
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(status_code=503, headers={})
+            obj = SampleResourceModel.objects.get_from_uri('xyz')
+
+        assert obj.title == 'cached'
+
+    @mock.patch('nap.cache.base.BaseCacheBackend.get')
+    def test_error_outside_stale_if_error_window(self, cache_get):
+        cache_get.return_value = self.get_cached_response(headers={
+            'cache-control': 'max-age=60, stale-if-error=5',
+        })
+
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = requests.ConnectionError()
+            with pytest.raises(requests.ConnectionError):
+                SampleResourceModel.objects.get_from_uri('xyz')
+
+            request.side_effect = None
+            request.return_value = get_mock_response(status_code=503, headers={})
+            with pytest.raises(InvalidStatusError):
+                SampleResourceModel.objects.get_from_uri('xyz')
+
+
+class TestCacheInvalidation(BaseResourceModelTest):
+
+    def respond(self, method, url, **kwargs):
+        if method != 'GET':
+            return {'POST': 201, 'PUT': 204, 'DELETE': 204}[method], ''
+        elif url.endswith('/note/'):
+            return 200, json.dumps([{'slug': 'a'}, {'slug': 'b'}])
+        return 200, json.dumps({'slug': url.rstrip('/').split('/')[-1]})
+
+    def get_meta(self, **kwargs):
+        meta = {'cache_backend': LocalMemoryCacheBackend(), 'invalidate_on_write': True}
+        meta.update(kwargs)
+        return patch_meta(SampleResourceModel, **meta)
+
+    def test_update_invalidates_object_and_collections(self):
+        engine = self.get_engine()
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+            engine.get(slug='b')
+            list(engine.filter(skip_cache=False))
+
+            engine.update(SampleResourceModel(slug='a', title='a'))
+
+            engine.get(slug='a')
+            engine.get(slug='b')
+            list(engine.filter(skip_cache=False))
+
+        assert request_count(request, 'http://foo.com/v1/note/a/') == 2
+        assert request_count(request, 'http://foo.com/v1/note/b/') == 1
+        assert request_count(request, 'http://foo.com/v1/note/') == 2
+
+    def test_create_invalidates_collections(self):
+        engine = self.get_engine()
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+            list(engine.filter(skip_cache=False))
+
+            engine.create(SampleResourceModel(title='new'))
+
+            engine.get(slug='a')
+            list(engine.filter(skip_cache=False))
+
+        assert request_count(request, 'http://foo.com/v1/note/a/') == 1
+        assert request_count(request, 'http://foo.com/v1/note/') == 2
+
+    def test_delete_invalidates_get_many(self):
+        engine = self.get_engine()
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get_many(['a', 'b'])
+
+            engine.delete(SampleResourceModel(slug='b', title='b'))
+
+            results = engine.get_many(['a', 'b'])
+
+        assert [obj.slug for obj in results] == ['a', 'b']
+        assert request_count(request, 'http://foo.com/v1/note/a/') == 1
+        assert request_count(request, 'http://foo.com/v1/note/b/') == 2
+
+    def test_invalidation_off(self):
+        engine = self.get_engine()
+        with self.get_meta(invalidate_on_write=False), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+            engine.update(SampleResourceModel(slug='a', title='a'))
+            engine.get(slug='a')
+
+        assert request_count(request, 'http://foo.com/v1/note/a/') == 1
+
+    def test_untagged_entries_are_ignored(self):
+        engine = self.get_engine()
+        with self.get_meta(invalidate_on_write=False), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+
+            with mock.patch.dict(SampleResourceModel._meta, {'invalidate_on_write': True}):
+                engine.get(slug='a')
+                engine.get(slug='a')
+
+        assert request_count(request, 'http://foo.com/v1/note/a/') == 2
+
+    def test_get_cache_tags(self):
+        engine = self.get_engine()
+
+        def get_response(content):
+            return NapResponse(content=content, url='xyz', status_code=200)
+
+        assert engine.get_cache_tags(get_response('{"slug": "a"}')) == ['object:a']
+        assert engine.get_cache_tags(get_response('{"title": "a"}')) == ['collection']
+        assert engine.get_cache_tags(get_response('[{"slug": "a"}]')) == ['collection']
+        assert engine.get_cache_tags(get_response('not json')) == ['collection']
+
+        with mock.patch.dict(engine.model._meta, {'collection_field': 'objects'}):
+            response = get_response('{"slug": "a", "objects": []}')
+            assert engine.get_cache_tags(response) == ['collection']
+
+
+class TestWriteThroughCache(BaseResourceModelTest):
+
+    def respond(self, method, url, **kwargs):
+        headers = {'cache-control': 'max-age=600', 'etag': '"abc"'}
+        if method == 'POST':
+            return 201, json.dumps({'slug': 'new', 'title': 'created'}), headers
+        elif method == 'PUT':
+            return 204, json.dumps({'slug': 'a', 'title': 'updated'}), headers
+        elif url.endswith('/note/'):
+            content = [{'slug': 'a', 'title': 'A'}, {'slug': 'b', 'title': 'B'}]
+            return 200, json.dumps(content), headers
+        slug = url.rstrip('/').split('/')[-1]
+        return 200, json.dumps({'slug': slug, 'title': 'fetched'}), headers
+
+    def get_meta(self, backend, **kwargs):
+        meta = {'cache_backend': backend, 'write_through_cache': True}
+        meta.update(kwargs)
+        return patch_meta(SampleResourceModel, **meta)
+
+    def test_create_and_update_write_through(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend()
+        with self.get_meta(backend), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.create(SampleResourceModel(title='created'))
+            engine.update(SampleResourceModel(slug='a', title='updated'))
+
+            created = engine.get(slug='new')
+            updated = engine.get(slug='a')
+
+        assert [call[0][0] for call in request.call_args_list] == ['POST', 'PUT']
+        assert created.title == 'created'
+        assert created.full_url == 'note/new/'
+        assert updated.title == 'updated'
+
+        cached = backend.get(SampleResourceModel(slug='a').cache_key)
+        assert cached.headers == {'cache-control': 'max-age=600'}
+        assert cached.cache_timeout == 600
+
+    def test_collection_items_write_through(self):
+        engine = self.get_engine()
+        with self.get_meta(LocalMemoryCacheBackend()), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            list(engine.filter())
+            obj_a = engine.get(slug='a')
+            obj_b = engine.get(slug='b')
+
+            list(engine.iter_filter())
+            engine.get(slug='c')
+
+        assert request.call_count == 3
+        assert (obj_a.title, obj_b.title) == ('A', 'B')
+
+    def test_cached_collections_are_not_written_through(self):
+        engine = self.get_engine()
+        backend = LocalMemoryCacheBackend()
+        with self.get_meta(backend), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            list(engine.filter(skip_cache=False))
+            with mock.patch.object(backend, 'set_many') as set_many:
+                list(engine.filter(skip_cache=False))
+
+        assert request.call_count == 1
+        assert not set_many.called
+
+    def test_write_through_off(self):
+        engine = self.get_engine()
+        with self.get_meta(LocalMemoryCacheBackend(), write_through_cache=False), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            list(engine.filter())
+            engine.get(slug='a')
+
+        assert request.call_count == 2
+
+
+class TestNegativeCaching(BaseResourceModelTest):
+
+    def respond(self, method, url, **kwargs):
+        if method == 'POST':
+            return 201, ''
+        elif url.endswith('/missing/') or url.endswith('/gone/'):
+            return 410 if url.endswith('/gone/') else 404, json.dumps({'detail': 'Not found'})
+        return 200, json.dumps({'slug': url.rstrip('/').split('/')[-1]})
+
+    def get_meta(self, **kwargs):
+        return patch_meta(SampleResourceModel, cache_backend=LocalMemoryCacheBackend(**kwargs))
+
+    def test_lookup_not_found_is_cached(self):
+        engine = self.get_engine()
+        with self.get_meta(negative_timeout=30), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            for slug in ('missing', 'missing', 'gone', 'gone'):
+                with pytest.raises(InvalidStatusError) as excinfo:
+                    engine.get(slug=slug)
+
+        assert request.call_count == 2
+        assert excinfo.value.response.status_code == 410
+
+    def test_negative_caching_off(self):
+        engine = self.get_engine()
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            for i in range(2):
+                with pytest.raises(InvalidStatusError):
+                    engine.get(slug='missing')
+
+        assert request.call_count == 2
+
+    def test_negative_entries_expire(self):
+        engine = self.get_engine()
+        with self.get_meta(negative_timeout=30), \
+                mock.patch('requests.Session.request') as request, \
+                mock.patch('time.time') as time_mock:
+            request.side_effect = fake_transport(self.respond)
+            time_mock.return_value = 1000
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+            time_mock.return_value = 1031
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+        assert request.call_count == 2
+
+    def test_get_many_caches_not_found(self):
+        engine = self.get_engine()
+        with self.get_meta(negative_timeout=30), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get_many(['a', 'missing'])
+            results = engine.get_many(['a', 'missing'])
+
+        assert request.call_count == 2
+        assert results[0].slug == 'a'
+        assert isinstance(results[1], InvalidStatusError)
+
+    def test_create_deletes_negative_entry(self):
+        engine = self.get_engine()
+        with self.get_meta(negative_timeout=30), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+            engine.create(SampleResourceModel(slug='missing', title='new'))
+
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+        assert [call[0][0] for call in request.call_args_list] == ['GET', 'POST', 'GET']
+
+    def test_create_deletes_negative_entry_of_assigned_id(self):
+        def respond(method, url, **kwargs):
+            if method == 'POST':
+                return 201, json.dumps({'slug': 'missing', 'title': 'new'})
+            return self.respond(method, url, **kwargs)
+
+        engine = self.get_engine()
+        with self.get_meta(negative_timeout=30), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(respond)
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+            # the API assigns the slug
+            obj = engine.create(SampleResourceModel(title='new'))
+            assert obj.slug == 'missing'
+
+            with pytest.raises(InvalidStatusError):
+                engine.get(slug='missing')
+
+        assert [call[0][0] for call in request.call_args_list] == ['GET', 'POST', 'GET']
+
+
+class TestCacheControl(BaseResourceModelTest):
+
+    def respond(self, method, url, headers, **kwargs):
+        language = headers.get('Accept-Language', 'en')
+        content = {'slug': url.rstrip('/').split('/')[-1], 'title': language}
+        headers = {'cache-control': self.cache_control, 'vary': 'Accept-Language'}
+        return 200, json.dumps(content), headers
+
+    def get_meta(self):
+        return patch_meta(SampleResourceModel, cache_backend=LocalMemoryCacheBackend())
+
+    def test_responses_cached_per_variant(self):
+        self.cache_control = 'max-age=60'
+        engine = self.get_engine()
+
+        def french():
+            # modified request arguments only apply to one request
+            return engine.modify_request(headers={'Accept-Language': 'fr'})
+
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            assert engine.get(slug='a').title == 'en'
+            assert french().get(slug='a').title == 'fr'
+            assert engine.get(slug='a').title == 'en'
+            assert french().get(slug='a').title == 'fr'
+            assert request.call_count == 2
+
+            results = french().get_many(['a', 'b'])
+            assert [obj.title for obj in results] == ['fr', 'fr']
+            assert request.call_count == 3
+
+    def test_variants_keyed_on_middleware_headers(self):
+        self.cache_control = 'max-age=60'
+        engine = self.get_engine()
+
+        class LanguageMiddleware(BaseMiddleware):
+            language = 'de'
+
+            def handle_request(self, request):
+                request.headers['Accept-Language'] = self.language
+                return request
+
+        middleware = LanguageMiddleware()
+        with self.get_meta(), \
+                mock.patch.dict(SampleResourceModel._meta, {'middleware': [middleware]}), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            assert engine.get(slug='a').title == 'de'
+            assert engine.get(slug='a').title == 'de'
+            assert request.call_count == 1
+
+            middleware.language = 'fr'
+            assert engine.get(slug='a').title == 'fr'
+            assert [obj.title for obj in engine.get_many(['a'])] == ['fr']
+            assert request.call_count == 2
+
+    def test_auth_not_cached_in_shared_cache(self):
+        self.cache_control = 'max-age=60'
+        engine = self.get_engine()
+
+        middleware = [HttpAuthorization('user', 'password')]
+        with mock.patch.dict(SampleResourceModel._meta, {
+                    'cache_backend': LocalMemoryCacheBackend(shared=True),
+                    'middleware': middleware}), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+            engine.get(slug='a')
+
+        assert request.call_count == 2
+        assert request.call_args[1]['auth'] == ('user', 'password')
+
+    def test_no_store_not_cached(self):
+        self.cache_control = 'no-store'
+        engine = self.get_engine()
+
+        with self.get_meta(), mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            engine.get(slug='a')
+            engine.get(slug='a')
+
+        assert request.call_count == 2
+
+
 class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
 
     headers = {'content-type': 'application/json'}
@@ -384,7 +1169,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
             title='expected_title',
             content='Blank Content')
 
-        with mock.patch('requests.request') as put:
+        with mock.patch('requests.Session.request') as put:
             r = mock.Mock()
             r.content = ''
             r.status_code = 204
@@ -402,7 +1187,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
             title='expected_title',
             content='Blank Content',
             slug='some_slug')
-        with mock.patch('requests.request') as post:
+        with mock.patch('requests.Session.request') as post:
             r = mock.Mock()
             r.content = ''
             r.headers = {'location': 'http://foo.com/v1/random_title/'}
@@ -423,7 +1208,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
             SampleResourceModel.objects.update(dm)
 
     def test_handle_update_response(self):
-        response = self.get_mock_response()
+        response = get_mock_response()
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -433,7 +1218,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
         assert obj is None
 
     def test_handle_update_response_invalid_content(self):
-        response = self.get_mock_response(content='some invalid content')
+        response = get_mock_response(content='some invalid content')
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -444,7 +1229,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
         assert obj is None
 
     def test_handle_update_response_with_obj(self):
-        response = self.get_mock_response(content='some content')
+        response = get_mock_response(content='some content')
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -455,7 +1240,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
         assert obj.title == 'a title'
 
     def test_handle_create_response(self):
-        response = self.get_mock_response()
+        response = get_mock_response()
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -465,7 +1250,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
         assert obj is None
 
     def test_handle_create_response_invalid_content(self):
-        response = self.get_mock_response(content='some invalid content')
+        response = get_mock_response(content='some invalid content')
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -476,7 +1261,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
         assert obj is None
 
     def test_handle_create_response_with_obj(self):
-        response = self.get_mock_response(content='some content')
+        response = get_mock_response(content='some content')
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -536,7 +1321,7 @@ class TestResourceEngineWriteMethods(BaseResourceModelTest, unittest.TestCase):
             assert vr.called
 
     def test_handle_delete_response(self):
-        response = self.get_mock_response()
+        response = get_mock_response()
         engine = self.get_engine()
 
         with mock.patch('nap.engine.ResourceEngine.obj_from_response') as ofr:
@@ -552,12 +1337,12 @@ def test_modify_request():
 
     new_headers.update(default_headers)
 
-    with mock.patch('requests.request') as post:
+    with mock.patch('requests.Session.request') as post:
         r = mock.Mock()
         r.content = '{}'
         r.status_code = 200
         post.return_value = r
-        SampleResourceModel.objects.modify_request(headers=new_headers).filter()
+        list(SampleResourceModel.objects.modify_request(headers=new_headers).filter())
         post.assert_called_with(
             'GET', "http://foo.com/v1/note/",
             data=None,
@@ -566,12 +1351,12 @@ def test_modify_request():
         )
 
     # ensure a subsequent, non-modified request is actually not modified
-    with mock.patch('requests.request') as post2:
+    with mock.patch('requests.Session.request') as post2:
         r = mock.Mock()
         r.content = '{}'
         r.status_code = 200
         post2.return_value = r
-        SampleResourceModel.objects.filter()
+        list(SampleResourceModel.objects.filter())
         post2.assert_called_with(
             'GET', "http://foo.com/v1/note/",
             data=None,
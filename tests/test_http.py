@@ -1,7 +1,13 @@
 from __future__ import unicode_literals
+import copy
+import pickle
+import threading
+
+import mock
 import pytest
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
 
-from nap.http import NapRequest, NapResponse
+from nap.http import ExecutorRegistry, NapRequest, NapResponse, SessionRegistry
 
 
 class TestRequestMethods(object):
@@ -23,3 +29,131 @@ class TestNapResponse(object):
         res = NapResponse('content', 'naprulez.org', 200)
 
         assert hasattr(res.headers, 'keys')
+
+    def test_validators(self):
+        res = NapResponse('content', 'naprulez.org', 200)
+        assert not res.has_validators
+
+        res = NapResponse('content', 'naprulez.org', 200, headers={'etag': '"1"'})
+        assert res.etag == '"1"'
+        assert res.has_validators
+
+    def test_get_data(self):
+        serializer = mock.Mock()
+        serializer.deserialize.return_value = {'title': 'a'}
+        res = NapResponse(b'{"title": "a"}', 'naprulez.org', 200)
+
+        assert res.get_data(serializer) == {'title': 'a'}
+        assert res.get_data(serializer) == {'title': 'a'}
+        assert serializer.deserialize.call_count == 1
+
+    def test_decoded_data_not_pickled(self):
+        serializer = mock.Mock()
+        res = NapResponse(b'{"title": "a"}', 'naprulez.org', 200)
+        res.get_data(serializer)
+
+        for other in (pickle.loads(pickle.dumps(res)), copy.copy(res)):
+            assert other.content == res.content
+            other.get_data(serializer)
+
+        assert serializer.deserialize.call_count == 3
+
+    def test_request_headers_not_pickled(self):
+        res = NapResponse(b'{"title": "a"}', 'naprulez.org', 200)
+        res.request_headers = {'Authorization': 'Token abc'}
+
+        assert pickle.loads(pickle.dumps(res)).request_headers is None
+
+    def test_is_stale(self):
+        res = NapResponse('content', 'naprulez.org', 200)
+        assert not res.is_stale()
+
+        res.cached_at = 100
+        res.cache_timeout = 10
+        assert not res.is_stale(now=105)
+        assert res.is_stale(now=110)
+
+
+class TestSessionRegistry(object):
+
+    def test_sessions_shared_per_host(self):
+        registry = SessionRegistry()
+
+        session = registry.get_session('http://foo.com/v1/')
+        assert registry.get_session('http://foo.com/v2/note/') is session
+        assert registry.get_session('http://bar.com/v1/') is not session
+
+    def test_pool_settings(self):
+        registry = SessionRegistry()
+
+        session = registry.get_session('https://foo.com/', pool_maxsize=3,
+            max_retries=2)
+        adapter = session.get_adapter('https://foo.com/')
+        assert adapter._pool_maxsize == 3
+        assert adapter.max_retries.total == 2
+
+        other = registry.get_session('https://foo.com/', pool_maxsize=5)
+        assert other is not session
+
+    def test_cookies_not_kept(self):
+        received = []
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                received.append(self.headers.get('Cookie'))
+                self.send_response(200)
+                self.send_header('Set-Cookie', 'sessionid=user-a; Path=/')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = HTTPServer(('127.0.0.1', 0), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        try:
+            url = 'http://127.0.0.1:%s/' % server.server_address[1]
+            session = SessionRegistry().get_session(url)
+            session.request('GET', url)
+            session.request('GET', url)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        assert received == [None, None]
+        assert len(session.cookies) == 0
+
+    def test_clear(self):
+        registry = SessionRegistry()
+        session = registry.get_session('http://foo.com/')
+
+        with mock.patch.object(session, 'close') as close:
+            registry.clear()
+            assert close.called
+
+        assert registry.get_session('http://foo.com/') is not session
+
+    def test_send_without_session(self):
+        request = NapRequest('GET', 'http://foo.com/')
+        with mock.patch('requests.request') as r:
+            request.send()
+            r.assert_called_with('GET', 'http://foo.com/',
+                data=None, headers={}, auth=None)
+
+
+class TestExecutorRegistry(object):
+
+    def test_executors_shared_per_host(self):
+        registry = ExecutorRegistry()
+
+        executor = registry.get_executor('http://foo.com/v1/', 5)
+        assert registry.get_executor('http://foo.com/v2/note/', 5) is executor
+        assert registry.get_executor('http://bar.com/v1/', 5) is not executor
+        assert registry.get_executor('http://foo.com/v1/', 2) is not executor
+        assert executor._max_workers == 5
+
+        registry.clear()
+        assert registry.get_executor('http://foo.com/v1/', 5) is not executor
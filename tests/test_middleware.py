@@ -35,7 +35,7 @@ class TestBaseMiddleware(object):
             'title': "A fake title",
             'content': "isnt this neat",
         }
-        with mock.patch('requests.request') as r:
+        with mock.patch('requests.Session.request') as r:
             stubbed_response = mock.Mock()
 
             stubbed_response.status_code = 200
@@ -53,7 +53,7 @@ class TestBaseMiddleware(object):
             'title': "A fake title",
             'content': "isnt this neat",
         }
-        with mock.patch('requests.request') as r:
+        with mock.patch('requests.Session.request') as r:
             stubbed_response = mock.Mock()
 
             stubbed_response.status_code = 200
@@ -0,0 +1,202 @@
+from __future__ import unicode_literals
+import json
+import threading
+import time
+
+import mock
+import pytest
+
+from nap.http import NapResponse
+from nap.pagination import (BasePaginator, NextURLPaginator,
+    LinkHeaderPaginator, OffsetPaginator, PageNumberPaginator,
+    CursorPaginator)
+
+from . import SampleResourceModel
+from .utils import fake_transport
+
+
+def get_response(url='http://foo.com/v1/note/', headers=None):
+    return NapResponse('', url, 200, headers=headers)
+
+
+class TestPaginators(object):
+
+    def test_base_paginator(self):
+        paginator = BasePaginator()
+        assert paginator.get_first_url('note/') == 'note/'
+        assert paginator.get_next_url('note/', get_response(), {}, 20) is None
+
+    def test_next_url_paginator(self):
+        paginator = NextURLPaginator(field='meta.next')
+        data = {'meta': {'next': '/v1/note/?offset=20'}}
+
+        next_url = paginator.get_next_url('note/', get_response(), data, 20)
+        assert next_url == 'http://foo.com/v1/note/?offset=20'
+
+        data = {'meta': {'next': None}}
+        assert paginator.get_next_url('note/', get_response(), data, 20) is None
+        assert paginator.get_next_url('note/', get_response(), [], 20) is None
+
+    def test_link_header_paginator(self):
+        paginator = LinkHeaderPaginator()
+        response = get_response(headers={'link': (
+            '<https://api.github.com/gists?page=2>; rel="next", '
+            '<https://api.github.com/gists?page=5>; rel="last"'
+        )})
+
+        next_url = paginator.get_next_url('gists', response, [], 30)
+        assert next_url == 'https://api.github.com/gists?page=2'
+        assert paginator.get_next_url('gists', get_response(), [], 30) is None
+
+    def test_offset_paginator(self):
+        paginator = OffsetPaginator(limit=2)
+        first_url = paginator.get_first_url('note/?title=a')
+        assert first_url == 'note/?limit=2&offset=0&title=a'
+
+        next_url = paginator.get_next_url(first_url, get_response(), [], 2)
+        assert next_url == 'note/?limit=2&offset=2&title=a'
+        assert paginator.get_page_url(first_url, 3) == 'note/?limit=2&offset=6&title=a'
+
+        assert paginator.get_next_url(next_url, get_response(), [], 1) is None
+
+    def test_page_number_paginator(self):
+        paginator = PageNumberPaginator()
+        first_url = paginator.get_first_url('note/')
+        assert first_url == 'note/?page=1'
+
+        next_url = paginator.get_next_url(first_url, get_response(), [], 1)
+        assert next_url == 'note/?page=2'
+        assert paginator.get_next_url(next_url, get_response(), [], 0) is None
+
+        paginator = PageNumberPaginator(page_size=10)
+        assert paginator.get_next_url(first_url, get_response(), [], 9) is None
+
+    def test_cursor_paginator(self):
+        paginator = CursorPaginator(cursor_field='meta.cursor')
+        data = {'meta': {'cursor': 'abc'}}
+
+        next_url = paginator.get_next_url('note/?cursor=xyz', get_response(), data, 10)
+        assert next_url == 'note/?cursor=abc'
+        assert paginator.get_next_url('note/', get_response(), {}, 10) is None
+
+
+class TestIterFilter(object):
+
+    def respond(self, method, url, **kwargs):
+        pages = {
+            'http://foo.com/v1/note/': {
+                'objects': [{'title': 'a'}, {'title': 'b'}],
+                'next': 'http://foo.com/v1/note/?page=2',
+            },
+            'http://foo.com/v1/note/?page=2': {
+                'objects': [{'title': 'c'}],
+                'next': None,
+            },
+        }
+        return 200, json.dumps(pages[url]).encode('utf-8')
+
+    def test_iter_filter(self):
+        meta = {'collection_field': 'objects', 'paginator': NextURLPaginator()}
+        with mock.patch.dict(SampleResourceModel._meta, meta):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = fake_transport(self.respond)
+                objs = SampleResourceModel.objects.iter_filter()
+
+                assert not request.called
+                assert next(objs).title == 'a'
+                assert request.call_count == 1
+
+                assert [obj.title for obj in objs] == ['b', 'c']
+                assert request.call_count == 2
+
+    def test_iter_filter_without_paginator(self):
+        with mock.patch.dict(SampleResourceModel._meta, {'collection_field': 'objects'}):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = fake_transport(self.respond)
+                titles = [obj.title for obj in SampleResourceModel.objects.iter_filter()]
+
+        assert titles == ['a', 'b']
+
+    def test_iter_filter_stream(self):
+        meta = {'collection_field': 'objects', 'paginator': NextURLPaginator()}
+        with mock.patch.dict(SampleResourceModel._meta, meta):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = fake_transport(self.respond)
+                objs = SampleResourceModel.objects.iter_filter(stream=True)
+                assert next(objs).title == 'a'
+
+                assert request.call_args[1]['stream'] is True
+                assert [obj.title for obj in objs] == ['b', 'c']
+                assert request.call_count == 2
+
+    def test_iter_filter_stream_closes_response(self):
+        responses = []
+        transport = fake_transport(self.respond)
+
+        def request_side_effect(*args, **kwargs):
+            responses.append(transport(*args, **kwargs))
+            return responses[-1]
+
+        with mock.patch.dict(SampleResourceModel._meta, {'collection_field': 'objects'}):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = request_side_effect
+                objs = SampleResourceModel.objects.iter_filter(stream=True)
+                next(objs)
+                objs.close()
+
+        assert responses[0].close.called
+
+    def test_stream_with_prefetch(self):
+        with pytest.raises(ValueError):
+            next(SampleResourceModel.objects.iter_filter(stream=True, prefetch=2))
+
+
+class TestPrefetch(object):
+
+    def respond(self, method, url, **kwargs):
+        offset = int(url.split('offset=')[1])
+        titles = ['a', 'b', 'c', 'd', 'e'][offset:offset + 2]
+
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # slow responses, served out of order
+        time.sleep(0.05 if offset % 4 == 0 else 0.01)
+        with self.lock:
+            self.in_flight -= 1
+
+        return 200, json.dumps([{'title': title} for title in titles])
+
+    def test_prefetch(self):
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            objs = SampleResourceModel.objects.iter_filter(
+                paginator=OffsetPaginator(limit=2), prefetch=3)
+            titles = [obj.title for obj in objs]
+
+        assert titles == ['a', 'b', 'c', 'd', 'e']
+        # the current page and the 3 pages ahead of it
+        assert 1 < self.max_in_flight <= 4
+
+    def test_prefetch_one_page(self):
+        self.lock = threading.Lock()
+        self.in_flight = self.max_in_flight = 0
+
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            objs = SampleResourceModel.objects.iter_filter(
+                paginator=OffsetPaginator(limit=2), prefetch=1)
+            titles = [obj.title for obj in objs]
+
+        assert titles == ['a', 'b', 'c', 'd', 'e']
+        # the next page is requested while the current one is
+        assert self.max_in_flight == 2
+
+    def test_prefetch_requires_page_urls(self):
+        objs = SampleResourceModel.objects.iter_filter(
+            paginator=NextURLPaginator(), prefetch=3)
+        with pytest.raises(ValueError):
+            next(objs)
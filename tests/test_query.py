@@ -0,0 +1,136 @@
+from __future__ import unicode_literals
+import json
+
+import mock
+import pytest
+
+from nap.pagination import OffsetPaginator
+from nap.query import QuerySet
+from nap.utils import get_url_params
+
+from . import SampleResourceModel
+from .utils import get_mock_response, fake_transport
+
+TITLES = ['a', 'b', 'c', 'd', 'e']
+
+
+class TestQuerySet(object):
+
+    def respond(self, method, url, **kwargs):
+        params = get_url_params(url)
+        offset = int(params.get('offset', params.get('start', 0)))
+        limit = params.get('limit', params.get('count'))
+        stop = offset + int(limit) if limit is not None else None
+        return 200, json.dumps([{'title': title} for title in TITLES[offset:stop]])
+
+    def get_titles(self, objs):
+        return [obj.title for obj in objs]
+
+    def test_lazy(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            qs = SampleResourceModel.objects.filter(title='a')
+            assert isinstance(qs, QuerySet)
+            assert not request.called
+
+            qs = qs.filter(content='b')
+            assert not request.called
+            assert qs.lookup_vars == {'title': 'a', 'content': 'b'}
+
+            assert self.get_titles(qs) == TITLES
+            assert len(qs) == 5
+            assert bool(qs)
+            assert request.call_count == 1
+
+    def test_filter_does_not_change_original(self):
+        qs = SampleResourceModel.objects.filter(title='a')
+        qs.filter(title='b')
+        assert qs.lookup_vars == {'title': 'a'}
+
+    def test_slicing(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            qs = SampleResourceModel.objects.all()[1:3]
+            assert not request.called
+            assert (qs.offset, qs.limit) == (1, 2)
+            assert self.get_titles(qs) == ['b', 'c']
+
+            url = request.call_args[0][1]
+            assert get_url_params(url) == {'offset': '1', 'limit': '2'}
+
+            qs = SampleResourceModel.objects.all()[1:4][1:]
+            assert (qs.offset, qs.limit) == (2, 2)
+            assert self.get_titles(qs) == ['c', 'd']
+
+    def test_empty_slices(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            qs = SampleResourceModel.objects.all()[:2][3:]
+            assert (qs.offset, qs.limit) == (3, 0)
+            assert list(qs) == []
+            assert list(SampleResourceModel.objects.all()[3:1]) == []
+            assert not request.called
+
+    def test_indexing(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            assert SampleResourceModel.objects.all()[2].title == 'c'
+            assert get_url_params(request.call_args[0][1]) == {'offset': '2', 'limit': '1'}
+
+            assert SampleResourceModel.objects.all()[-1].title == 'e'
+
+            with pytest.raises(IndexError):
+                SampleResourceModel.objects.all()[10]
+
+    def test_limit_truncated_client_side(self):
+        with mock.patch('requests.Session.request') as request:
+            request.return_value = get_mock_response(*self.respond('GET', 'note/'))
+            assert self.get_titles(SampleResourceModel.objects.all()[:2]) == ['a', 'b']
+
+    def test_paginator_params(self):
+        paginator = OffsetPaginator(limit_param='count', offset_param='start')
+        with mock.patch.dict(SampleResourceModel._meta, {'paginator': paginator}):
+            with mock.patch('requests.Session.request') as request:
+                request.side_effect = fake_transport(self.respond)
+                assert self.get_titles(SampleResourceModel.objects.all()[3:]) == ['d', 'e']
+                assert get_url_params(request.call_args[0][1]) == {'start': '3'}
+
+    def test_first_and_exists(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            assert SampleResourceModel.objects.all().first().title == 'a'
+            assert get_url_params(request.call_args[0][1]) == {'limit': '1'}
+            assert SampleResourceModel.objects.all().exists()
+            assert not SampleResourceModel.objects.all()[5:].exists()
+
+    def test_evaluated_once(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            qs = SampleResourceModel.objects.all()
+            list(qs)
+            assert self.get_titles(qs[1:3]) == ['b', 'c']
+            assert qs[0].title == 'a'
+            assert qs.first().title == 'a'
+            assert request.call_count == 1
+
+    def test_iterator(self):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            objs = SampleResourceModel.objects.filter(title='a').iterator()
+            assert not request.called
+            assert self.get_titles(objs) == TITLES
+
+    def test_sliced_iterator(self):
+        paginator = OffsetPaginator(limit=2)
+        with mock.patch.dict(SampleResourceModel._meta, {'paginator': paginator}), \
+                mock.patch('requests.Session.request') as request:
+            request.side_effect = fake_transport(self.respond)
+            objs = SampleResourceModel.objects.all()[1:3].iterator()
+            assert self.get_titles(objs) == ['b', 'c']
+
+        # the last page isn't requested
+        assert request.call_count == 2
+
+    def test_hashable(self):
+        qs = SampleResourceModel.objects.all()
+        assert {qs: 1}[qs] == 1
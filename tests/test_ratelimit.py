@@ -0,0 +1,157 @@
+from __future__ import unicode_literals
+import json
+import os
+import tempfile
+import time
+
+import mock
+import pytest
+
+from nap.ratelimit import RateLimiter, FileRateLimiter
+
+from . import SampleResourceModel
+
+KEY = 'http://foo.com'
+
+
+def fake_response(headers=None, status_code=200, content=''):
+    r = mock.Mock()
+    r.status_code = status_code
+    r.headers = headers or {}
+    r.content = content
+    return r
+
+
+class FakeClock(object):
+
+    def __init__(self, now=1500000000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.now += delay
+
+
+class TestRateLimiter(object):
+
+    def get_limiter(self, **kwargs):
+        limiter = RateLimiter(**kwargs)
+        self.clock = FakeClock()
+        limiter.sleep = mock.Mock(side_effect=self.clock.sleep)
+        patcher = mock.patch('nap.ratelimit.time.time', side_effect=self.clock.time)
+        patcher.start()
+        self.patchers = [patcher]
+        return limiter
+
+    def teardown_method(self, method):
+        for patcher in getattr(self, 'patchers', []):
+            patcher.stop()
+
+    def test_get_key(self):
+        limiter = RateLimiter()
+        assert limiter.get_key(SampleResourceModel, 'http://foo.com/v1/note/') == KEY
+
+        limiter = RateLimiter(scope='model')
+        assert limiter.get_key(SampleResourceModel, 'http://foo.com/v1/note/') == 'note'
+
+    def test_token_bucket(self):
+        limiter = self.get_limiter(rate=2, burst=2)
+
+        limiter.acquire(KEY)
+        limiter.acquire(KEY)
+        assert not limiter.sleep.called
+
+        limiter.acquire(KEY)
+        limiter.sleep.assert_called_once_with(0.5)
+
+        # other keys have their own bucket
+        limiter.acquire('http://bar.com')
+        assert limiter.sleep.call_count == 1
+
+    def test_waits_for_quota_reset(self):
+        limiter = self.get_limiter()
+        limiter.update(KEY, fake_response({
+            'x-ratelimit-remaining': '0',
+            'x-ratelimit-reset': str(int(self.clock.now) + 60),
+        }))
+
+        limiter.acquire(KEY)
+        limiter.sleep.assert_called_once_with(60)
+
+    def test_relative_reset_and_pacing(self):
+        limiter = self.get_limiter()
+        limiter.update(KEY, fake_response({
+            'x-ratelimit-remaining': '3',
+            'x-ratelimit-reset': '40',
+        }))
+
+        limiter.acquire(KEY)
+        assert not limiter.sleep.called
+
+        # 2 remaining requests spread over the rest of the window
+        limiter.acquire(KEY)
+        assert limiter.sleep.call_args[0][0] == pytest.approx(40 / 3.0)
+
+    def test_no_pacing(self):
+        limiter = self.get_limiter(pace=False)
+        limiter.update(KEY, fake_response({
+            'x-ratelimit-remaining': '3',
+            'x-ratelimit-reset': '40',
+        }))
+
+        for i in range(3):
+            limiter.acquire(KEY)
+        assert not limiter.sleep.called
+
+        limiter.acquire(KEY)
+        limiter.sleep.assert_called_once_with(40)
+
+    def test_retry_after(self):
+        limiter = self.get_limiter()
+        limiter.update(KEY, fake_response({'retry-after': '5'}, status_code=429))
+
+        limiter.acquire(KEY)
+        limiter.sleep.assert_called_once_with(5)
+
+    def test_engine_rate_limiter(self):
+        limiter = self.get_limiter()
+        headers = {
+            'x-ratelimit-remaining': '0',
+            'x-ratelimit-reset': str(int(self.clock.now) + 30),
+        }
+
+        with mock.patch.dict(SampleResourceModel._meta, {'rate_limiter': limiter}):
+            with mock.patch('requests.Session.request') as request:
+                request.return_value = fake_response(
+                    headers, content=json.dumps({'title': 'hello'}))
+                SampleResourceModel.objects.get_from_uri('xyz', skip_cache=True)
+                assert not limiter.sleep.called
+
+                SampleResourceModel.objects.get_from_uri('xyz', skip_cache=True)
+                limiter.sleep.assert_called_once_with(30)
+
+
+class TestFileRateLimiter(object):
+
+    def test_state_shared_through_file(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            limiter = FileRateLimiter(path)
+            limiter.update(KEY, fake_response({'retry-after': '60'}))
+
+            other_process_limiter = FileRateLimiter(path)
+            other_process_limiter.sleep = mock.Mock(side_effect=Exception('waited'))
+            with mock.patch('nap.ratelimit.time.time', return_value=time.time()):
+                try:
+                    other_process_limiter.acquire(KEY)
+                except Exception:
+                    pass
+
+            assert other_process_limiter.sleep.called
+            with open(path) as state_file:
+                assert 'paused_until' in json.load(state_file)[KEY]
+        finally:
+            os.remove(path)
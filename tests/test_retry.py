@@ -0,0 +1,133 @@
+from __future__ import unicode_literals
+import json
+
+import mock
+import pytest
+import requests
+
+from nap.retry import RetryBudget, RetryPolicy
+
+from . import SampleResourceModel
+
+
+def fake_response(status_code=200, headers=None, content=''):
+    r = mock.Mock()
+    r.status_code = status_code
+    r.headers = headers or {}
+    r.content = content
+    return r
+
+
+class TestRetryBudget(object):
+
+    def test_withdraw_until_empty(self):
+        budget = RetryBudget(ratio=0.5, reserve=1)
+        assert budget.withdraw()
+        assert not budget.withdraw()
+
+        budget.deposit()
+        budget.deposit()
+        assert budget.withdraw()
+
+    def test_max_tokens(self):
+        budget = RetryBudget(ratio=10, reserve=0, max_tokens=2)
+        budget.deposit()
+        assert budget.tokens == 2
+
+
+class TestRetryPolicy(object):
+
+    def get_policy(self, **kwargs):
+        policy = RetryPolicy(**kwargs)
+        policy.sleep = mock.Mock()
+        return policy
+
+    def test_retries_status(self):
+        policy = self.get_policy(max_retries=3)
+        send = mock.Mock(side_effect=[
+            fake_response(503), fake_response(502), fake_response(200)])
+
+        response = policy.call('GET', send)
+
+        assert response.status_code == 200
+        assert send.call_count == 3
+        assert policy.sleep.call_count == 2
+
+    def test_gives_up_after_max_retries(self):
+        policy = self.get_policy(max_retries=2)
+        send = mock.Mock(return_value=fake_response(503))
+
+        response = policy.call('GET', send)
+
+        assert response.status_code == 503
+        assert send.call_count == 3
+
+    def test_retries_exceptions(self):
+        policy = self.get_policy(max_retries=1)
+        send = mock.Mock(side_effect=[requests.ConnectionError(), fake_response()])
+        assert policy.call('GET', send).status_code == 200
+
+        send = mock.Mock(side_effect=requests.ConnectionError())
+        with pytest.raises(requests.ConnectionError):
+            policy.call('GET', send)
+        assert send.call_count == 2
+
+    def test_non_idempotent_methods(self):
+        policy = self.get_policy(max_retries=3)
+
+        send = mock.Mock(return_value=fake_response(503))
+        assert policy.call('POST', send).status_code == 503
+        assert send.call_count == 1
+
+        send = mock.Mock(side_effect=requests.ReadTimeout())
+        with pytest.raises(requests.ReadTimeout):
+            policy.call('POST', send)
+        assert send.call_count == 1
+
+        send = mock.Mock(side_effect=[requests.ConnectTimeout(), fake_response(201)])
+        assert policy.call('POST', send).status_code == 201
+
+    def test_budget_limits_retries(self):
+        policy = self.get_policy(max_retries=3, budget=RetryBudget(ratio=0, reserve=1))
+        send = mock.Mock(return_value=fake_response(503))
+
+        policy.call('GET', send)
+        assert send.call_count == 2
+
+        send.reset_mock()
+        policy.call('GET', send)
+        assert send.call_count == 1
+
+    def test_decorrelated_jitter(self):
+        policy = RetryPolicy(base_delay=1, max_delay=5)
+        for i in range(50):
+            delay = policy.get_delay(2)
+            assert 1 <= delay <= 5
+
+    def test_retry_after(self):
+        policy = RetryPolicy(max_delay=60)
+        assert policy.get_delay(1, fake_response(503, {'retry-after': '7'})) == 7
+        assert policy.get_delay(1, fake_response(503, {'retry-after': '120'})) == 60
+
+        past_date = 'Wed, 21 Oct 2015 07:28:00 GMT'
+        assert policy.get_retry_after(fake_response(503, {'retry-after': past_date})) == 0
+        assert policy.get_retry_after(fake_response(503, {'retry-after': 'junk'})) is None
+
+        policy.respect_retry_after = False
+        assert policy.get_delay(1, fake_response(503, {'retry-after': '7'})) < 7
+
+
+def test_engine_retry_policy():
+    policy = RetryPolicy(max_retries=2)
+    policy.sleep = mock.Mock()
+
+    with mock.patch.dict(SampleResourceModel._meta, {'retry_policy': policy}):
+        with mock.patch('requests.Session.request') as request:
+            request.side_effect = [
+                requests.ConnectionError(),
+                fake_response(200, content=json.dumps({'title': 'hello'})),
+            ]
+            obj = SampleResourceModel.objects.get_from_uri('xyz', skip_cache=True)
+
+    assert obj.title == 'hello'
+    assert request.call_count == 2
@@ -1,9 +1,12 @@
 from __future__ import unicode_literals
 import json
 
+import mock
 import pytest
 
-from nap.serializers import BaseSerializer, JSONSerializer
+from nap.serializers import (BaseSerializer, JSONSerializer,
+    OrjsonSerializer, UjsonSerializer, MsgspecSerializer,
+    get_fastest_json_serializer_class)
 
 
 def test_base_serializer():
@@ -43,3 +46,60 @@ class TestJSONSerializer(object):
 
         assert json_dict['a'] == 1
         assert json_dict['b'] == 2
+
+    def test_deserialize_bytes(self):
+        serializer = self.get_serializer()
+
+        json_dict = serializer.deserialize('{"title": "caf\xe9"}'.encode('utf-8'))
+        assert json_dict == {'title': 'caf\xe9'}
+
+    def test_deserialize_invalid(self):
+        serializer = self.get_serializer()
+
+        with pytest.raises(ValueError):
+            serializer.deserialize(b'<html>Bad Gateway</html>')
+
+
+class TestOrjsonSerializer(TestJSONSerializer):
+
+    def get_serializer(self):
+        pytest.importorskip('orjson')
+        return OrjsonSerializer()
+
+    def test_serialize_bytes(self):
+        assert self.get_serializer().serialize({'a': 1}) == b'{"a":1}'
+
+
+class TestUjsonSerializer(TestJSONSerializer):
+
+    def get_serializer(self):
+        pytest.importorskip('ujson')
+        return UjsonSerializer()
+
+
+class TestMsgspecSerializer(TestJSONSerializer):
+
+    def get_serializer(self):
+        pytest.importorskip('msgspec')
+        return MsgspecSerializer()
+
+
+def test_msgspec_decode_error_is_value_error():
+    class DecodeError(Exception):
+        pass
+
+    msgspec = mock.Mock(DecodeError=DecodeError)
+    msgspec.json.Decoder.return_value.decode.side_effect = DecodeError("JSON is malformed")
+    with mock.patch.dict('sys.modules', {'msgspec': msgspec}):
+        serializer = MsgspecSerializer()
+
+    with pytest.raises(ValueError):
+        serializer.deserialize(b'<html>Bad Gateway</html>')
+
+
+def test_fastest_json_serializer_class():
+    serializer_class = get_fastest_json_serializer_class()
+    assert issubclass(serializer_class, BaseSerializer)
+
+    with mock.patch.dict('sys.modules', {'orjson': None, 'msgspec': None, 'ujson': None}):
+        assert get_fastest_json_serializer_class() is JSONSerializer
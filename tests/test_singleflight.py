@@ -0,0 +1,72 @@
+from __future__ import unicode_literals
+import threading
+import time
+
+import pytest
+
+from nap.singleflight import SingleFlight
+
+
+def run_concurrently(target, count):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = target()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return results
+
+
+class TestSingleFlight(object):
+
+    def test_collapses_concurrent_calls(self):
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def slow_call():
+            calls.append(1)
+            release.wait(1)
+            return object()
+
+        def call():
+            return group.do('key', slow_call)
+
+        def release_later():
+            # give every thread a chance to join the in-flight call
+            time.sleep(0.1)
+            release.set()
+
+        threading.Thread(target=release_later).start()
+        results = run_concurrently(call, 5)
+
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert group.stats() == {'calls': 1, 'collapsed': 4, 'in_flight': 0}
+
+    def test_different_keys_not_collapsed(self):
+        group = SingleFlight()
+        assert group.do('a', lambda: 'a') == 'a'
+        assert group.do('b', lambda: 'b') == 'b'
+        assert group.calls == 2
+        assert group.collapsed == 0
+
+    def test_exception_shared_and_cleared(self):
+        group = SingleFlight()
+
+        def fail():
+            raise ValueError('upstream down')
+
+        with pytest.raises(ValueError):
+            group.do('key', fail)
+
+        # a failed call doesn't leave the key stuck in flight
+        assert group.do('key', lambda: 'ok') == 'ok'
@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+import json
+
+import pytest
+
+from nap.streaming import JSONArrayStream
+
+
+def chunked(text, size=3):
+    data = text.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestJSONArrayStream(object):
+
+    def test_top_level_array(self):
+        items = [{'title': 'a'}, {'title': 'b', 'tags': [1, 2]}, {'title': 'c'}]
+        stream = JSONArrayStream(chunked(json.dumps(items)))
+
+        assert list(stream) == items
+        assert stream.extra_data == {}
+
+    def test_collection_field(self):
+        doc = {
+            'meta': {'next': None, 'total': 2},
+            'objects': [{'title': 'a'}, {'title': 'b'}],
+            'count': 2,
+        }
+        stream = JSONArrayStream(chunked(json.dumps(doc)), collection_field='objects')
+
+        assert list(stream) == doc['objects']
+        assert stream.extra_data == {'meta': {'next': None, 'total': 2}, 'count': 2}
+
+    def test_items_yielded_while_reading(self):
+        read = []
+
+        def chunks():
+            for chunk in chunked('[{"a": 1}, {"a": 2}, {"a": 3}]', size=1):
+                read.append(chunk)
+                yield chunk
+
+        stream = iter(JSONArrayStream(chunks()))
+        assert next(stream) == {'a': 1}
+        assert len(read) < 15
+
+    def test_scalars_split_across_chunks(self):
+        stream = JSONArrayStream(chunked('[12345, true, null, "x\\u00e9y", 1.5e3]', size=2))
+        assert list(stream) == [12345, True, None, 'x\xe9y', 1500.0]
+
+    def test_multibyte_characters_split_across_chunks(self):
+        text = '[{"title": "caf\xe9 ☃"}]'
+        assert list(JSONArrayStream(chunked(text, size=1))) == [{'title': 'caf\xe9 ☃'}]
+
+    def test_whitespace_and_empty(self):
+        assert list(JSONArrayStream(chunked(' [\n ]\n'))) == []
+
+        stream = JSONArrayStream(chunked('{"objects": [], "x": 1}'), collection_field='objects')
+        assert list(stream) == []
+        assert stream.extra_data == {'x': 1}
+
+    @pytest.mark.parametrize('text', [
+        '[{"a": 1}, {"a": ',
+        '[{"a": 1} {"a": 2}]',
+        '[1, 2] 3',
+        '{"meta": {}}',
+        '"foo"',
+        '',
+    ])
+    def test_invalid(self, text):
+        with pytest.raises(ValueError):
+            list(JSONArrayStream(chunked(text), collection_field='objects'))
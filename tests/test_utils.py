@@ -1,6 +1,9 @@
 from __future__ import unicode_literals
 
-from nap.utils import make_url, is_string_like, handle_slash
+import mock
+
+from nap.utils import (make_url, is_string_like, handle_slash, get_url_params,
+    set_url_params, parse_retry_after)
 
 def test_url_is_normalized():
     base_url = "https://example.com/path/"
@@ -71,3 +74,23 @@ class TestHandleTest(object):
         uri = "something.com/?q=bob&x=sue"
         new_uri = handle_slash(uri, add_slash=False)
         assert new_uri == "something.com?q=bob&x=sue"
+
+
+def test_get_url_params():
+    params = get_url_params("http://foo.com/note/?b=2&a=1&a=3&c=")
+    assert params == {'a': ['1', '3'], 'b': '2', 'c': ''}
+    assert get_url_params("note/") == {}
+
+
+def test_set_url_params():
+    url = set_url_params("http://foo.com/note/?b=2", {'offset': 20, 'b': '2'})
+    assert url == "http://foo.com/note/?b=2&offset=20"
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after('30') == 30
+    assert parse_retry_after('nonsense') is None
+
+    with mock.patch('nap.utils.time.time', return_value=1445412470):
+        assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 10
@@ -1,4 +1,6 @@
 from __future__ import unicode_literals
+import mock
+
 from nap.http import NapRequest
 
 
@@ -11,3 +13,45 @@ def get_nap_request(method='GET', url='http://www.foo.com',
     request = NapRequest(method, url, headers, auth, *args, **kwargs)
 
     return request
+
+
+def get_mock_response(status_code=200, content='', headers=None, chunk_size=7):
+    """
+    Fake a requests response, streamed in small chunks
+    """
+    r = mock.Mock()
+    r.status_code = status_code
+    r.headers = headers if headers is not None else {}
+    r.encoding = None
+    r.content = content
+    r.iter_content.side_effect = lambda *args, **kwargs: (
+        content[i:i + chunk_size] for i in range(0, len(content), chunk_size))
+
+    return r
+
+
+def fake_transport(respond):
+    """
+    Fake requests.Session.request
+
+    ``respond(method, url, **kwargs)`` returns the arguments of
+    ``get_mock_response`` for each request, e.g. ``(404, '')``.
+    """
+    def request(method, url, *args, **kwargs):
+        return get_mock_response(*respond(method, url, **kwargs))
+
+    return request
+
+
+def request_count(request, url, method='GET'):
+    """
+    Number of times a faked transport was called with ``method`` and ``url``
+    """
+    return len([call for call in request.call_args_list if call[0] == (method, url)])
+
+
+def patch_meta(model, **options):
+    """
+    Patch a model's Meta options for the duration of a ``with`` block
+    """
+    return mock.patch.dict(model._meta, options)